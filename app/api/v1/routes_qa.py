@@ -8,7 +8,7 @@ retrieval_service = RetrievalGenerationService()
 
 @router.post("/ask-question", response_model=QAResponse)
 async def ask_question(request: QueryRequest):
-    result = retrieval_service.get_answer(request.query)
+    result = retrieval_service.get_answer(request.query, entities=request.entities)
 
     if result.get("error"):
         raise HTTPException(status_code=500, detail=result["error"])
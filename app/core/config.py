@@ -2,6 +2,7 @@ from pydantic_settings import BaseSettings
 # from pydantic import BaseSettings
 from pydantic import Field
 from functools import lru_cache
+from typing import List
 from dotenv import load_dotenv
 import os
 # import spacy
@@ -28,14 +29,15 @@ class Settings(BaseSettings):
     FAISS_DB_DIR: str = Field(default="C:/Users/Admin/Documents/medical-research-assistant/data/db_vector_store")  # Example folder path
     FAISS_INDEX_NAME: str = "faiss_index.index"             # FAISS index file name
     TOP_K: int = Field(default=5)  # Number of top results to retrieve
+    FAISS_USE_PRECOMPUTED_EMBEDDINGS: bool = True  # Build the index from the stored `embedding` column instead of re-encoding
     # archive path for cord 19
     # cord19_archive_path:str = os.path.join(base_dir, "data//raw//cord-19_2022-06-02.tar.gz")
     # cord19_extracted_path:str = os.join(base_dir, "data//intermediate//cord-19_2022-06-02")
-    # cord19_archive_path: str = os.path.join(base_dir, "data", "raw", "cord-19_2022-06-02.tar.gz")
+    cord19_archive_path: str = os.path.join(base_dir, "data", "raw", "cord-19_2022-06-02.tar.gz")
     # cord19_extracted_path: str = os.path.join(base_dir, "data", "intermediate", "cord-19_2022-06-02")
     
     # Base directory for extracted JSON folders like `pdf_json`, `pmc_json`, etc.
-    # cord19_extracted_path: str = os.getenv("CORD19_EXTRACTED_PATH", os.path.join(base_dir, "data/raw"))
+    cord19_extracted_path: str = os.getenv("CORD19_EXTRACTED_PATH", os.path.join(base_dir, "data/raw"))
 
     # JSON data folders (new additions for Phase 1)
     # Example URLs (replace with your actual file URLs)
@@ -45,6 +47,7 @@ class Settings(BaseSettings):
     
     # Metadata CSV path for CORD-19
     cord19_metadata_path: str = os.path.join(base_dir, "data", "raw", "metadata.csv")
+    cord19_metadata_cache_path: str = os.path.join(base_dir, "data", "processed", "metadata_by_paper_id.parquet")
 
     
     # Output cleaned CSV path
@@ -58,16 +61,54 @@ class Settings(BaseSettings):
     
     parquet_input_path: str = os.path.join(base_dir, "data", "processed", "cord19_enriched.parquet")
 
+    # Extraction settings
+    EXTRACTION_WORKERS: int = 1  # Parser processes for JSON extraction (1 = serial, 0 = all CPU cores)
+    EXTRACTION_POOL_CHUNKSIZE: int = 64  # Files handed to a worker at a time
+    EXTRACT_FROM_ARCHIVE: bool = False  # Stream papers out of cord19_archive_path instead of unpacked JSON folders
+    EXTRACTION_ROW_GROUP_SIZE: int = 500  # Records buffered per parquet row group (bounds extraction memory)
+    JSON_BACKEND: str = "auto"  # "auto" (orjson when installed), "orjson" (required) or "json"
+    JSON_SKIP_REFERENCE_SECTIONS: bool = True  # Count bib/ref entries instead of decoding them
+    EXTRACTION_RETRY_FAILED: bool = True  # Parse files that failed in an earlier run again
+    DEDUP_SOURCE_PREFERENCE: List[str] = ["pmc_json", "pdf_json"]  # Which parse to keep when a paper appears twice
+    extraction_manifest_path: str = os.path.join(base_dir, "data", "processed", "extraction_manifest.jsonl")
+
     
+    # NLP settings
+    SPACY_MODEL_NAME: str = "en_core_web_sm"
+    NLP_PIPE_BATCH_SIZE: int = 32  # Texts per nlp.pipe batch
+    NLP_PIPE_N_PROCESS: int = 1  # Processes used by nlp.pipe
+    STORE_SENTENCE_OFFSETS: bool = False  # Store sentences as int32 offsets into clean_text instead of the `sentences` column
+    STORE_ENTITY_TABLE: bool = False  # Write entities to a columnar table under <nlp output>/entities instead of the `named_entities` column
+    NLP_POOL_WORKERS: int = 1  # Batch files processed in parallel by nlp_pipeline (1 = serial, 0 = all cores)
+
     # Chunking settings
     CHUNK_SIZE: int = 500  # Number of words per chunk
     CHUNK_OVERLAP: int = 50  # Overlap between chunks
+    CHUNKING_MODE: str = "words"  # "words" (CHUNK_SIZE-word windows), "tokens" (sized with the embedding model's tokenizer) or "sentences" (packed precomputed sentences)
+    CHUNK_SENTENCE_OVERLAP: int = 1  # Sentences repeated between consecutive chunks in "sentences" mode
+    CHUNK_TOKEN_SIZE: int = 0  # Tokens per chunk in "tokens" mode (0 = the embedding model's limit)
+    CHUNK_TOKEN_OVERLAP: int = 32  # Overlapping tokens between chunks in "tokens" mode
+    TOKENIZER_BATCH_SIZE: int = 64  # Texts tokenized per call in "tokens" mode
+    CHUNK_PAPER_BATCH_SIZE: int = 500  # Papers read per streamed batch
+    CHUNK_BATCH_ROWS: int = 10000  # Max chunk rows per batch yielded by ChunkingService.iter_chunk_batches
+    papers_table_path: str = os.path.join(base_dir, "data", "embeddings", "papers.parquet")  # Paper-level fields of chunked papers
 
     # Embedding settings
     PROCESS_CHUNK_SIZE: int = 200 # total process chunk for embedding in single run 
     EMBEDDING_BATCH_SIZE: int = 20  # Batch size for embedding generation
+    EMBEDDING_ENCODE_BATCH_SIZE: int = 32  # Texts per forward pass of the model
+    EMBEDDING_LENGTH_BUCKETING: bool = False  # Encode each batch in token-length order to cut padding (output order unchanged)
+    EMBEDDING_WORKERS: int = 1  # Encoding processes, each holding its own model (1 = in-process, 0 = all cores)
+    EMBEDDING_WORKER_THREADS: int = 0  # Torch threads per encoding process (0 = cores / EMBEDDING_WORKERS)
+    EMBEDDING_PIPELINE_DEPTH: int = 2  # Batches queued between the prefetch, encode and write stages (0 = sequential)
+    EMBEDDING_BACKEND: str = "torch"  # Inference backend: "torch" (fp32), "onnx" or "onnx-int8" (dynamic int8 quantization)
+    onnx_model_path: str = os.path.join(base_dir, "data", "models", "onnx")  # Exported ONNX graphs, one folder per model
+    EMBEDDING_STORAGE_DTYPE: str = "float32"  # Vector column type in embedding batches: "float32" or "float16" (half the size)
     embedding_output_path: str = os.path.join(base_dir, "data", "embeddings", "embedding_batches")
     combine_embedding_path: str = os.path.join(base_dir, "data", "embeddings", "combine_embedding.parquet")
+    EMBEDDING_CACHE_ENABLED: bool = False  # Reuse vectors of texts embedded before (pipeline and query path)
+    EMBEDDING_CACHE_MAX_ENTRIES: int = 200_000  # Least recently used vectors are evicted beyond this (0 = unbounded)
+    embedding_cache_path: str = os.path.join(base_dir, "data", "embeddings", "embedding_cache.sqlite")
     
     
     # chroma db setting 
@@ -75,6 +116,7 @@ class Settings(BaseSettings):
     input_chroma_data: str = os.path.join(base_dir, "data", "embeddings", "embedding_batches")
     # input_chroma_data: str = os.path.join(base_dir, "data", "embeddings", "combine_embedding.parquet") 
     vector_db_path: str = os.path.join(base_dir, "data", "db_vector_store")
+    entity_index_path: str = os.path.join(base_dir, "data", "db_vector_store", "entity_index")
 
     # Logging level
     logging_level: str = "INFO"
@@ -17,6 +17,7 @@ class LangchainWrapper:
             retriever: The retriever instance for fetching relevant documents.
         """
         try:
+            self.retriever = retriever
             self.qa_chain = RetrievalQA.from_chain_type(
                 llm=llm,
                 retriever=retriever,
@@ -27,19 +28,27 @@ class LangchainWrapper:
             logger.error(f"Error initializing LangChain Retrieval QA chain: {e}", exc_info=True)
             raise RuntimeError(f"Initialization failed: {e}")
 
-    def ask(self, query: str) -> dict:
+    def ask(self, query: str, **retriever_kwargs) -> dict:
         """
         Process the query using the LangChain RAG pipeline.
 
         Args:
             query (str): The user's input question.
+            **retriever_kwargs: Per-call retriever arguments (e.g. `rows` for an entity filter).
+                The same chain is reused: documents are fetched with these arguments and then
+                handed to the chain's answer step.
 
         Returns:
             dict: A dictionary containing the answer and source documents.
         """
         try:
             logger.info(f"Processing query: {query}")
-            response = self.qa_chain(query)
+            if retriever_kwargs:
+                documents = self.retriever.invoke(query, **retriever_kwargs)
+                answer = self.qa_chain.combine_documents_chain.run(input_documents=documents, question=query)
+                response = {"result": answer, "source_documents": documents}
+            else:
+                response = self.qa_chain(query)
 
             if not response or 'result' not in response:
                 logger.warning("Query processed but no result found.")
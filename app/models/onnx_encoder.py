@@ -0,0 +1,277 @@
+import os
+import re
+import json
+import inspect
+from typing import List, Optional
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from app.core.config import get_settings
+from app.core.logger import get_logger
+
+try:
+    import onnxruntime as ort  # Optional CPU inference backend
+except ImportError:
+    ort = None
+
+
+settings = get_settings()
+logger = get_logger("OnnxEncoder")
+
+# Pooling modes of sentence-transformers' Pooling module that are reproduced after the ONNX graph
+SUPPORTED_POOLING = {"mean", "cls", "max"}
+# Pooling config flag -> mode name (as in Pooling.get_pooling_mode_str)
+POOLING_FLAGS = {
+    "pooling_mode_cls_token": "cls",
+    "pooling_mode_max_tokens": "max",
+    "pooling_mode_mean_tokens": "mean",
+    "pooling_mode_mean_sqrt_len_tokens": "mean_sqrt_len_tokens",
+    "pooling_mode_weightedmean_tokens": "weightedmean",
+    "pooling_mode_lasttoken": "lasttoken",
+}
+
+
+def onnx_model_dir(model_name: str) -> str:
+    """
+    Directory holding the exported (and quantized) ONNX graphs of a model.
+    """
+    return os.path.join(settings.onnx_model_path, re.sub(r"[^A-Za-z0-9._-]+", "_", model_name.strip("/")))
+
+
+def export_onnx_model(model_name: str, quantize: bool = False) -> str:
+    """
+    Export a sentence-transformers model's transformer to ONNX, optionally with int8 dynamic quantization.
+
+    Exports are cached under `onnx_model_path` and reused on later calls.
+
+    Args:
+        model_name (str): sentence-transformers model name or path.
+        quantize (bool): Also write (and return) an int8 dynamically quantized graph.
+
+    Returns:
+        str: Path of the ONNX graph to load.
+    """
+    output_dir = onnx_model_dir(model_name)
+    fp32_path = os.path.join(output_dir, "model.onnx")
+    int8_path = os.path.join(output_dir, "model.int8.onnx")
+
+    if not os.path.exists(fp32_path):
+        # torch is only needed to export; a cached graph is loaded without it
+        import torch
+        from sentence_transformers import SentenceTransformer
+
+        logger.info(f"Exporting {model_name} to ONNX at {fp32_path}")
+        os.makedirs(output_dir, exist_ok=True)
+        transformer = SentenceTransformer(model_name, device="cpu")[0]
+        auto_model = transformer.auto_model.eval()
+
+        sample = transformer.tokenizer(["export sample"], return_tensors="pt")
+        input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+        dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+        dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+        # Newer torch defaults to the dynamo exporter; the TorchScript one handles these models as-is
+        export_kwargs = {"dynamo": False} if "dynamo" in inspect.signature(torch.onnx.export).parameters else {}
+
+        tmp_path = fp32_path + ".tmp"
+        with torch.no_grad():
+            torch.onnx.export(
+                auto_model,
+                tuple(sample[name] for name in input_names),
+                tmp_path,
+                input_names=input_names,
+                output_names=["last_hidden_state"],
+                dynamic_axes=dynamic_axes,
+                opset_version=14,
+                **export_kwargs
+            )
+        os.replace(tmp_path, fp32_path)
+
+    if not quantize:
+        return fp32_path
+
+    if not os.path.exists(int8_path):
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        logger.info(f"Quantizing {fp32_path} to int8")
+        tmp_path = int8_path + ".tmp"
+        quantize_dynamic(fp32_path, tmp_path, weight_type=QuantType.QInt8)
+        os.replace(tmp_path, int8_path)
+
+    return int8_path
+
+
+def _model_repo(model_name: str) -> str:
+    """
+    Local directory or hub repo of a sentence-transformers model (short names live under sentence-transformers/).
+    """
+    if os.path.isdir(model_name) or "/" in model_name:
+        return model_name
+    return f"sentence-transformers/{model_name}"
+
+
+def _read_model_json(repo: str, filename: str) -> Optional[dict]:
+    """
+    Read a JSON file of a model from its local directory or the hub, or None when the model has no such file.
+    """
+    if os.path.isdir(repo):
+        path = os.path.join(repo, filename)
+        if not os.path.exists(path):
+            return None
+    else:
+        from huggingface_hub import hf_hub_download
+        from huggingface_hub.utils import EntryNotFoundError
+
+        try:
+            path = hf_hub_download(repo, filename)
+        except EntryNotFoundError:
+            return None
+
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_sentence_transformer_config(model_name: str) -> dict:
+    """
+    Read the module layout, pooling and sequence length of a sentence-transformers model from its
+    config files, without loading the torch model.
+
+    Returns:
+        dict: "repo", "transformer_path", "module_types", "pooling_mode", "dimension" and "max_seq_length"
+            (None when the model does not set it).
+    """
+    repo = _model_repo(model_name)
+    modules = _read_model_json(repo, "modules.json")
+    if modules is None:
+        # A plain transformers model: sentence-transformers adds mean pooling
+        from transformers import AutoConfig
+
+        return {"repo": repo, "transformer_path": "", "module_types": ["Transformer", "Pooling"],
+                "pooling_mode": "mean", "dimension": AutoConfig.from_pretrained(repo).hidden_size,
+                "max_seq_length": None}
+
+    modules = sorted(modules, key=lambda module: module["idx"])
+    module_types = [module["type"].rsplit(".", 1)[-1] for module in modules]
+    if module_types[:2] != ["Transformer", "Pooling"] or any(t != "Normalize" for t in module_types[2:]):
+        raise ValueError(f"ONNX backend supports Transformer + Pooling (+ Normalize) models, got {module_types}.")
+
+    transformer_path, pooling_path = modules[0]["path"], modules[1]["path"]
+    pooling = _read_model_json(repo, f"{pooling_path}/config.json" if pooling_path else "config.json")
+    pooling_modes = [mode for flag, mode in POOLING_FLAGS.items() if pooling.get(flag)]
+
+    # Newer releases keep it in the Transformer module's own folder
+    st_config = (_read_model_json(repo, "sentence_bert_config.json")
+                 or (_read_model_json(repo, f"{transformer_path}/sentence_bert_config.json") if transformer_path else None)
+                 or {})
+
+    return {
+        "repo": repo,
+        "transformer_path": transformer_path,
+        "module_types": module_types,
+        "pooling_mode": "+".join(pooling_modes),
+        "dimension": pooling["word_embedding_dimension"] * max(len(pooling_modes), 1),
+        "max_seq_length": st_config.get("max_seq_length"),
+    }
+
+
+class OnnxSentenceEncoder:
+    """
+    ONNX Runtime stand-in for SentenceTransformer on CPU.
+
+    Runs the exported transformer graph and reproduces the model's pooling (and Normalize layer)
+    in NumPy. Exposes the parts of the SentenceTransformer interface the services use: `encode`,
+    `tokenizer`, `max_seq_length` and `get_sentence_embedding_dimension`.
+
+    Only the tokenizer and the model's config files are loaded here; torch is needed just once,
+    to export the graph when no cached export exists.
+    """
+
+    def __init__(self, model_name: str, quantize: bool = False, num_threads: Optional[int] = None):
+        if ort is None:
+            raise ImportError("The ONNX embedding backend requires onnxruntime (pip install onnxruntime onnx).")
+
+        from transformers import AutoTokenizer
+
+        config = load_sentence_transformer_config(model_name)
+        self.pooling_mode = config["pooling_mode"]
+        if self.pooling_mode not in SUPPORTED_POOLING:
+            raise ValueError(f"ONNX backend does not support '{self.pooling_mode}' pooling.")
+
+        self.model_name = model_name
+        self.quantize = quantize
+        subfolder = {"subfolder": config["transformer_path"]} if config["transformer_path"] else {}
+        self.tokenizer = AutoTokenizer.from_pretrained(config["repo"], **subfolder)
+        self.max_seq_length = config["max_seq_length"]
+        if self.max_seq_length is None:
+            # Same fallback as sentence-transformers when the model does not set it
+            from transformers import AutoConfig
+
+            model_config = AutoConfig.from_pretrained(config["repo"], **subfolder)
+            self.max_seq_length = min(self.tokenizer.model_max_length,
+                                      getattr(model_config, "max_position_embeddings", self.tokenizer.model_max_length))
+        self.normalize = "Normalize" in config["module_types"]
+        self.dimension = config["dimension"]
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        model_path = export_onnx_model(model_name, quantize=quantize)
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = [node.name for node in self.session.get_inputs()]
+        logger.info(f"Loaded ONNX encoder from {model_path} (pooling: {self.pooling_mode}).")
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dimension
+
+    def _pool(self, hidden: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+        if self.pooling_mode == "cls":
+            return hidden[:, 0]
+
+        mask = attention_mask[..., None].astype(hidden.dtype)
+        if self.pooling_mode == "max":
+            return np.where(mask > 0, hidden, -1e9).max(axis=1)
+        return (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+
+    def encode(self, sentences: List[str], batch_size: int = 32, show_progress_bar: bool = False,
+               normalize_embeddings: bool = False, **kwargs) -> np.ndarray:
+        """
+        Encode sentences like SentenceTransformer.encode (NumPy output only).
+
+        Returns:
+            np.ndarray: float32 matrix of shape (len(sentences), d).
+        """
+        sentences = list(sentences)
+        if not sentences:
+            return np.empty((0, self.dimension), dtype=np.float32)
+
+        # Same trick as sentence-transformers: batch texts of similar length together
+        order = np.argsort([-len(text) for text in sentences], kind="stable")
+        vectors = np.empty((len(sentences), self.dimension), dtype=np.float32)
+
+        for start in range(0, len(sentences), batch_size):
+            batch_idx = order[start:start + batch_size]
+            features = self.tokenizer([sentences[i] for i in batch_idx], padding=True, truncation=True,
+                                      max_length=self.max_seq_length, return_tensors="np")
+            inputs = {name: features[name].astype(np.int64) for name in self.input_names}
+            hidden = self.session.run(None, inputs)[0]
+            vectors[batch_idx] = self._pool(hidden, features["attention_mask"])
+
+        if normalize_embeddings or self.normalize:
+            vectors /= np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+        return vectors
+
+
+class OnnxEmbeddings(Embeddings):
+    """
+    LangChain embeddings backed by OnnxSentenceEncoder, for the query path.
+    """
+
+    def __init__(self, encoder: OnnxSentenceEncoder):
+        self.encoder = encoder
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.encoder.encode(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.encoder.encode([text])[0].tolist()
@@ -3,6 +3,7 @@ from pydantic import BaseModel
 
 class QueryRequest(BaseModel):
     query: str
+    entities: Optional[List[str]] = None  # Only retrieve chunks mentioning these entities
 
 class SourceDocument(BaseModel):
     metadata: Dict[str, str]
@@ -1,6 +1,9 @@
 import os
 import sys
+import threading
 import traceback
+from typing import List, Optional
+import numpy as np
 from langchain_groq import ChatGroq
 from langchain_community.vectorstores import FAISS
 from langchain_community.embeddings import SentenceTransformerEmbeddings
@@ -9,6 +12,15 @@ from app.core.config import get_settings
 from app.core.logger import get_logger
 from app.models.langchain_wrapper import get_groq_llm
 from app.models.groq_llm_model import LangchainWrapper
+from app.services.entity_index_service import EntityIndex
+from app.models.onnx_encoder import OnnxEmbeddings, OnnxSentenceEncoder
+from app.services.embedding_cache_service import CachedEmbeddings, cache_namespace, get_embedding_cache
+from app.utils.vector_db import check_embedding_info, load_embedding_info
+from app.services.entity_filtered_retriever import (
+    EntityFilteredRetriever,
+    build_row_lookup,
+    rows_for_entities,
+)
 
 # Get the absolute path to the project root directory
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
@@ -32,6 +44,7 @@ class RetrievalGenerationService:
             self._load_embedding_model()
             self._load_vector_store()
             self._initialize_retriever()
+            self._load_entity_index()
             self._initialize_llm_chain()
             logger.info("RetrievalService initialized successfully.")
         except Exception as e:
@@ -44,7 +57,17 @@ class RetrievalGenerationService:
         """Load the embedding model."""
         try:
             logger.info(f"Loading embedding model: {self.embedding_model_name}")
-            self.embedding_function = SentenceTransformerEmbeddings(model_name=self.embedding_model_name)
+            backend = settings.EMBEDDING_BACKEND
+            if backend in ("onnx", "onnx-int8"):
+                encoder = OnnxSentenceEncoder(self.embedding_model_name, quantize=backend == "onnx-int8")
+                self.embedding_function = OnnxEmbeddings(encoder)
+            else:
+                self.embedding_function = SentenceTransformerEmbeddings(model_name=self.embedding_model_name)
+            cache = get_embedding_cache()
+            if cache is not None:
+                # Repeated queries are answered from the on-disk cache instead of re-encoding
+                namespace = cache_namespace(self.embedding_model_name, normalize=False, backend=backend)
+                self.embedding_function = CachedEmbeddings(self.embedding_function, cache, namespace)
             logger.info("Embedding model loaded successfully.")
         except Exception as e:
             logger.error(f"Error loading embedding model: {e}")
@@ -65,16 +88,38 @@ class RetrievalGenerationService:
             logger.error(f"Error loading FAISS index: {e}")
             raise FileNotFoundError(f"FAISS index not found at {self.FAISS_DB_DIR}/{self.FAISS_INDEX_NAME}")
 
+        index_info = load_embedding_info(self.FAISS_DB_DIR) or {}
+        check_embedding_info(index_info, self.embedding_model_name, self.db.index.d, self.FAISS_DB_DIR)
+        if index_info.get("backend", settings.EMBEDDING_BACKEND) != settings.EMBEDDING_BACKEND:
+            # Close but not identical vectors: retrieval still works, slightly less precisely
+            logger.warning(f"Index vectors were produced with the '{index_info['backend']}' backend, "
+                           f"queries are encoded with '{settings.EMBEDDING_BACKEND}'.")
+
     def _initialize_retriever(self):
-        """Initialize the FAISS retriever."""
+        """Initialize the FAISS retriever (entity filters are passed to it per query)."""
         try:
             logger.info(f"Initializing retriever with Top-K: {self.TOP_K}")
-            self.retriever = self.db.as_retriever(search_kwargs={"k": self.TOP_K})
+            self.retriever = EntityFilteredRetriever(vector_store=self.db, k=self.TOP_K)
             logger.info("Retriever initialized successfully.")
         except Exception as e:
             logger.error(f"Error initializing retriever: {e}")
             raise
 
+    def _load_entity_index(self):
+        """Load the entity index used to pre-filter retrieval (optional)."""
+        self.entity_index = None
+        self._row_lookup = None
+        self._row_lookup_lock = threading.Lock()
+        try:
+            entity_index = EntityIndex.load(settings.entity_index_path)
+            if not entity_index.doc_postings:
+                logger.info(f"No entity index at {settings.entity_index_path}; entity filtering disabled.")
+                return
+            self.entity_index = entity_index
+            logger.info(f"Entity index loaded with {len(entity_index.doc_postings)} entities.")
+        except Exception as e:
+            logger.error(f"Error loading entity index, entity filtering disabled: {e}")
+
     def _initialize_llm_chain(self):
         """Initialize the Groq LLM and LangChain QA wrapper."""
         try:
@@ -86,19 +131,42 @@ class RetrievalGenerationService:
             logger.error(f"Error initializing QA chain: {e}")
             raise
 
-    def get_answer(self, query: str) -> dict:
+    @property
+    def row_lookup(self):
+        """Chunk/paper id -> FAISS rows, built from the docstore on the first entity-filtered query."""
+        if self._row_lookup is None:
+            with self._row_lookup_lock:
+                if self._row_lookup is None:
+                    self._row_lookup = build_row_lookup(self.db)
+                    logger.info(f"Row lookup built for {len(self.db.index_to_docstore_id)} indexed chunks.")
+        return self._row_lookup
+
+    def _entity_rows(self, entities: List[str]) -> np.ndarray:
+        """FAISS rows of the chunks mentioning `entities`, passed to the retriever as a per-query filter."""
+        if self.entity_index is None:
+            raise ValueError("Entity filtering requested but no entity index is loaded.")
+
+        rows = rows_for_entities(self.entity_index, self.row_lookup, entities)
+        logger.info(f"Entity filter {entities} matched {len(rows)} chunks.")
+        return rows
+
+    def get_answer(self, query: str, entities: Optional[List[str]] = None) -> dict:
         """
         Process a user query and return the answer along with source documents.
 
         Args:
             query (str): User input query.
+            entities (List[str]): Optional entities; only chunks mentioning any of them are retrieved.
 
         Returns:
             dict: Dictionary containing the query, answer, source documents, and error (if any).
         """
         try:
             logger.info(f"Processing query: {query}")
-            response = self.qa_chain.ask(query)
+            if entities:
+                response = self.qa_chain.ask(query, rows=self._entity_rows(entities))
+            else:
+                response = self.qa_chain.ask(query)
 
             answer = response.get('answer', '')
             sources = response.get('source_documents', [])
@@ -1,3 +1,100 @@
+import os
+import sys
+import time
+import tarfile
+from typing import Dict, Iterator, List, Optional, Tuple
+from app.core.config import get_settings
+from app.core.logger import get_logger
+
+# Ensure project root is in system path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+settings = get_settings()
+logger = get_logger("Archive Logger")
+
+# The CORD-19 release wraps the paper parses in a nested tarball
+NESTED_ARCHIVE_SUFFIX = "document_parses.tar.gz"
+
+
+def _member_key(name: str, sources: List[str]) -> Optional[Tuple[str, str]]:
+    """
+    Map an archive member name to (manifest key, source).
+
+    The key starts at the source folder (e.g. `pdf_json/<sha>.json`), which is the same key the
+    unpacked-directory extraction uses, so both ingest modes share one manifest.
+    """
+    parts = name.split("/")
+    for idx, part in enumerate(parts[:-1]):
+        if part in sources:
+            return "/".join(parts[idx:]), part
+    return None
+
+
+def _iter_tar(tar: tarfile.TarFile, sources: List[str], stats: Dict[str, float]) -> Iterator[Tuple[str, str, int, int, bytearray]]:
+    for member in tar:
+        if not member.isfile():
+            continue
+
+        if member.name.endswith(NESTED_ARCHIVE_SUFFIX):
+            logger.info(f"Streaming nested archive: {member.name}")
+            with tarfile.open(fileobj=tar.extractfile(member), mode="r|gz") as nested:
+                yield from _iter_tar(nested, sources, stats)
+            continue
+
+        if not member.name.endswith(".json"):
+            continue
+
+        mapped = _member_key(member.name, sources)
+        if mapped is None:
+            continue
+
+        key, source = mapped
+        raw = bytearray(member.size)
+        tar.extractfile(member).readinto(raw)
+
+        stats["files"] += 1
+        stats["bytes"] += member.size
+        yield key, source, member.size, int(member.mtime) * 1_000_000_000, raw
+
+
+def iter_archive_members(archive_path: str = None, sources: List[str] = ["pdf_json", "pmc_json"],
+                         stats: Optional[Dict[str, float]] = None) -> Iterator[Tuple[str, str, int, int, bytearray]]:
+    """
+    Stream JSON papers straight out of the compressed CORD-19 release, without unpacking to disk.
+
+    Args:
+        archive_path (str): Path to the .tar.gz release. Defaults to config setting.
+        sources (List[str]): Source folders to read (e.g. `pdf_json`, `pmc_json`).
+        stats (Dict[str, float]): Optional dict updated with files, bytes and seconds read.
+
+    Yields:
+        Tuple[str, str, int, int, bytearray]: (manifest key, source, size, mtime in ns, raw JSON).
+    """
+    archive_path = archive_path or settings.cord19_archive_path
+    if not os.path.exists(archive_path):
+        raise FileNotFoundError(f"Archive not found as :{archive_path}")
+
+    stats = stats if stats is not None else {}
+    stats.update(files=0, bytes=0, seconds=0.0)
+    start = time.perf_counter()
+
+    logger.info(f"Streaming papers from archive: {archive_path}")
+    try:
+        with tarfile.open(archive_path, "r|gz") as tar:
+            yield from _iter_tar(tar, sources, stats)
+    finally:
+        stats["seconds"] = time.perf_counter() - start
+        log_read_throughput("archive", stats)
+
+
+def log_read_throughput(label: str, stats: Dict[str, float]) -> None:
+    seconds = stats.get("seconds") or 0.0
+    if seconds <= 0:
+        return
+    logger.info(f"Read {int(stats['files'])} files ({stats['bytes'] / 1e6:.1f} MB) from {label} in {seconds:.1f}s: "
+                f"{stats['files'] / seconds:.1f} files/sec, {stats['bytes'] / 1e6 / seconds:.1f} MB/sec")
+
+
 # from app.core.config import get_settings
 # from app.core.logger import get_logger
 # import os, tarfile
@@ -1,12 +1,18 @@
 import os
+import re
 import sys
-import uuid
-from typing import List, Dict
+import hashlib
+from typing import List, Dict, Iterable, Iterator, Union
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 from tqdm import tqdm
 
 from app.core.config import get_settings
 from app.core.logger import get_logger
+from app.services.data_storage_service import iter_dataframe_batches
+from pipeline.sentence_view import get_sentences
 
 # Ensure the project root is in the system path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
@@ -14,21 +20,297 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../'
 settings = get_settings()
 logger = get_logger("ChunkingService")
 
+# Chunk rows reference their paper by paper_id; paper-level fields live once per paper in the paper table
+CHUNK_COLUMNS = ["chunk_id", "paper_id", "chunk_index", "chunk_text"]
+
+# Paper table column -> column in the input papers
+PAPER_FIELDS = {
+    "title": "title",
+    "abstract": "abstract_text",
+    "journal": "journal",
+    "publish_time": "publish_time",
+    "doi": "doi",
+    "source": "source",
+}
+
+
+def make_chunk_id(paper_id: str, params_key: str, text: str) -> str:
+    """
+    Content-addressed chunk id: the same paper, chunking parameters and chunk text always give
+    the same id, so unchanged chunks can be recognised across reruns.
+
+    The position of the chunk is deliberately not part of the id: chunks that repeat the same
+    text within one paper (e.g. a repeated boilerplate paragraph) share an id and are embedded
+    and indexed once, which keeps duplicate hits out of retrieval.
+
+    Args:
+        paper_id (str): Paper the chunk belongs to.
+        params_key (str): Chunking parameters (see ChunkingService.params_key).
+        text (str): Chunk text.
+
+    Returns:
+        str: Hex digest identifying the chunk.
+    """
+    text_hash = hashlib.sha1(text.encode("utf-8")).hexdigest()
+    return hashlib.sha1(f"{paper_id}|{params_key}|{text_hash}".encode("utf-8")).hexdigest()
+
 
 class ChunkingService:
-    def __init__(self, chunk_size: int = None, overlap: int = None):
+    def __init__(self, chunk_size: int = None, overlap: int = None, mode: str = None,
+                 tokenizer=None, max_seq_length: int = None, sentence_overlap: int = None):
+        """
+        Args:
+            chunk_size (int): Words per chunk in "words" mode. Defaults to config setting.
+            overlap (int): Overlapping words in "words" mode. Defaults to config setting.
+            mode (str): "words" (whitespace windows), "tokens" (windows sized with the embedding
+                model's tokenizer) or "sentences" (whole precomputed sentences packed into windows
+                of up to `chunk_size` words). Defaults to config setting.
+            sentence_overlap (int): Sentences repeated between consecutive chunks in "sentences"
+                mode. Defaults to config setting.
+            tokenizer: Fast tokenizer of the embedding model (e.g. `SentenceTransformer.tokenizer`).
+                Loaded from EMBEDDING_MODEL_NAME when None in "tokens" mode.
+            max_seq_length (int): Tokens the embedding model encodes before truncating
+                (e.g. `SentenceTransformer.max_seq_length`). Defaults to the tokenizer's limit.
+        """
         self.chunk_size = chunk_size or settings.CHUNK_SIZE
         self.overlap = overlap or settings.CHUNK_OVERLAP
+        self.mode = mode or settings.CHUNKING_MODE
 
         if self.overlap >= self.chunk_size:
             raise ValueError("Overlap must be smaller than chunk size.")
 
+        self.sentence_overlap = settings.CHUNK_SENTENCE_OVERLAP if sentence_overlap is None else sentence_overlap
+
+        if self.mode == "tokens":
+            self._init_tokenizer(tokenizer, max_seq_length)
+        elif self.mode not in ("words", "sentences"):
+            raise ValueError(f"Unknown chunking mode: {self.mode}")
+
+    def _init_tokenizer(self, tokenizer, max_seq_length: int = None) -> None:
+        if tokenizer is None:
+            from transformers import AutoTokenizer
+            logger.info(f"🔍 Loading tokenizer for chunking: {settings.EMBEDDING_MODEL_NAME}")
+            tokenizer = AutoTokenizer.from_pretrained(settings.EMBEDDING_MODEL_NAME, use_fast=True)
+
+        if not getattr(tokenizer, "is_fast", False):
+            raise ValueError("Token-aware chunking needs a fast tokenizer (offset mapping support).")
+
+        # Tokenizers without a configured limit report a huge sentinel value
+        model_limit = max_seq_length or min(tokenizer.model_max_length, 512)
+
+        self.tokenizer = tokenizer
+        self.token_limit = model_limit - tokenizer.num_special_tokens_to_add(pair=False)
+        self.token_chunk_size = min(settings.CHUNK_TOKEN_SIZE or self.token_limit, self.token_limit)
+        self.token_overlap = settings.CHUNK_TOKEN_OVERLAP
+
+        if self.token_overlap >= self.token_chunk_size:
+            raise ValueError("Token overlap must be smaller than the token chunk size.")
+
+        self.truncation_stats = {
+            "texts": 0, "tokens": 0, "token_chunks": 0,
+            "word_chunks": 0, "word_chunks_truncated": 0, "word_chunk_tokens": 0, "word_tokens_lost": 0,
+        }
+        logger.info(f"✅ Token chunking: {self.token_chunk_size}-token windows, {self.token_overlap}-token overlap, "
+                    f"model limit {self.token_limit} tokens (excluding special tokens).")
+
+    def _token_windows(self, text: str, offsets, word_ids, window: int) -> List[str]:
+        """
+        Slice `text` into windows of at most `window` tokens, ending and starting on word boundaries.
+        """
+        chunks = []
+        n_tokens = len(offsets)
+        start = 0
+
+        while start < n_tokens:
+            end = min(start + window, n_tokens)
+
+            # Back off so a word is not split across windows (unless the word alone fills the window)
+            if end < n_tokens:
+                boundary = end
+                while boundary > start + 1 and word_ids[boundary] == word_ids[boundary - 1]:
+                    boundary -= 1
+                if word_ids[boundary] != word_ids[boundary - 1]:
+                    end = boundary
+
+            chunk = text[offsets[start][0]:offsets[end - 1][1]].strip()
+            if chunk:
+                chunks.append(chunk)
+            if end >= n_tokens:
+                break
+
+            next_start = max(end - self.token_overlap, start + 1)
+            while next_start > start + 1 and word_ids[next_start] == word_ids[next_start - 1]:
+                next_start -= 1
+            start = next_start
+
+        return chunks
+
+    def _record_word_truncation(self, text: str, offsets, n_chunks: int) -> None:
+        """
+        Measure how many tokens the word chunker's windows over `text` would lose to encoder truncation.
+        """
+        stats = self.truncation_stats
+        token_starts = np.fromiter((start for start, _ in offsets), dtype=np.int64, count=len(offsets))
+        word_spans = [(m.start(), m.end()) for m in re.finditer(r'\S+', text)]
+
+        for i in range(0, len(word_spans), self.chunk_size - self.overlap):
+            first = word_spans[i]
+            last = word_spans[min(i + self.chunk_size, len(word_spans)) - 1]
+            n_tokens = int(np.searchsorted(token_starts, last[1]) - np.searchsorted(token_starts, first[0]))
+
+            stats["word_chunks"] += 1
+            stats["word_chunk_tokens"] += n_tokens
+            if n_tokens > self.token_limit:
+                stats["word_chunks_truncated"] += 1
+                stats["word_tokens_lost"] += n_tokens - self.token_limit
+
+        stats["texts"] += 1
+        stats["tokens"] += len(offsets)
+        stats["token_chunks"] += n_chunks
+
+    def log_truncation_report(self) -> None:
+        """
+        Log how much text word-based chunking lost to truncation, next to the token-based result.
+        """
+        if self.mode != "tokens" or not self.truncation_stats["texts"]:
+            return
+
+        stats = self.truncation_stats
+        word_chunks = stats["word_chunks"] or 1
+        word_chunk_tokens = stats["word_chunk_tokens"] or 1
+        logger.info(
+            f"📏 {stats['texts']} texts, {stats['tokens']} tokens -> {stats['token_chunks']} token chunks "
+            f"(<= {self.token_chunk_size} tokens, nothing truncated). "
+            f"Word chunking ({self.chunk_size} words) would make {stats['word_chunks']} chunks, "
+            f"{stats['word_chunks_truncated'] / word_chunks:.1%} of them over the {self.token_limit}-token limit, "
+            f"losing {stats['word_tokens_lost']} tokens ({stats['word_tokens_lost'] / word_chunk_tokens:.1%} of chunked text)."
+        )
+
+    def pack_sentences(self, sentences, max_words: int = None) -> List[str]:
+        """
+        Pack whole sentences into chunks of up to `max_words` words, overlapping by
+        `sentence_overlap` sentences. A sentence longer than a chunk is split into word windows.
+
+        Args:
+            sentences: Sentences of one text (list of strings or a SentenceView).
+            max_words (int): Optional chunk size override. Defaults to `chunk_size`.
+
+        Returns:
+            List[str]: Chunks of joined sentences.
+        """
+        size = max_words or self.chunk_size
+        sentences = list(sentences) if sentences is not None else []
+        lengths = [len(sentence.split()) for sentence in sentences]
+        chunks = []
+        start = 0
+        covered = 0  # Sentences before this index are already in a chunk
+
+        while start < len(sentences):
+            if lengths[start] > size:
+                chunks.extend(self._word_windows(sentences[start], size))
+                start = covered = start + 1
+                continue
+
+            end, words = start, 0
+            while end < len(sentences) and lengths[end] <= size and words + lengths[end] <= size:
+                words += lengths[end]
+                end += 1
+
+            if end <= covered:
+                # Only overlap sentences would fit before the next long sentence
+                start = covered
+                continue
+
+            chunks.append(' '.join(sentences[start:end]))
+            covered = end
+            if end >= len(sentences):
+                break
+            start = max(end - self.sentence_overlap, start + 1)
+
+        return chunks
+
+    def params_key(self, size_override: int = None) -> str:
+        """
+        The chunking parameters that shape chunk text, as used in chunk ids.
+
+        Args:
+            size_override (int): The chunk size override passed to the chunking call (the
+                `max_tokens` argument), in the mode's unit: tokens in "tokens" mode (capped at
+                the model limit), words in "words" and "sentences" mode.
+        """
+        if self.mode == "tokens":
+            max_tokens = min(size_override or self.token_chunk_size, self.token_chunk_size)
+            tokenizer_name = getattr(self.tokenizer, "name_or_path", "") or type(self.tokenizer).__name__
+            return f"tokens:{max_tokens}:{self.token_overlap}:{tokenizer_name}"
+
+        max_words = size_override or self.chunk_size
+        if self.mode == "sentences":
+            return f"sentences:{max_words}:{self.sentence_overlap}"
+        return f"words:{max_words}:{self.overlap}"
+
+    def input_columns(self, available: List[str], text_column: str = 'body_text') -> List[str]:
+        """
+        Columns of the input papers this chunker reads (for column-pruned streaming reads).
+        """
+        if self.mode == "sentences":
+            wanted = ['paper_id', 'sentences'] if 'sentences' in available else \
+                ['paper_id', 'clean_text', 'sentence_starts', 'sentence_ends']
+        else:
+            wanted = ['paper_id', text_column]
+        return [column for column in wanted if column in available]
+
+    def chunk_texts(self, texts: List[str], max_tokens: int = None) -> List[List[str]]:
+        """
+        Chunk a batch of texts. In "tokens" mode the texts are tokenized together in
+        TOKENIZER_BATCH_SIZE groups.
+
+        Args:
+            texts (List[str]): Texts to chunk.
+            max_tokens (int): Optional window size override (words, or tokens capped at the model limit).
+
+        Returns:
+            List[List[str]]: Chunks of each text.
+        """
+        if self.mode != "tokens":
+            return [self.chunk_text(text, max_tokens=max_tokens) for text in texts]
+
+        results: List[List[str]] = [[] for _ in texts]
+        valid = [(i, text) for i, text in enumerate(texts) if isinstance(text, str) and text.strip()]
+        if len(valid) < len(texts):
+            logger.warning(f"{len(texts) - len(valid)} empty or invalid texts encountered during chunking.")
+
+        window = min(max_tokens or self.token_chunk_size, self.token_chunk_size)
+        batch_size = settings.TOKENIZER_BATCH_SIZE
+
+        for batch_start in range(0, len(valid), batch_size):
+            batch = valid[batch_start:batch_start + batch_size]
+            encodings = self.tokenizer(
+                [text for _, text in batch],
+                add_special_tokens=False,
+                return_offsets_mapping=True,
+                verbose=False
+            )
+            for j, (i, text) in enumerate(batch):
+                offsets = encodings["offset_mapping"][j]
+                results[i] = self._token_windows(text, offsets, encodings.word_ids(j), window)
+                self._record_word_truncation(text, offsets, len(results[i]))
+
+        return results
+
     def chunk_text(self, text: str, max_tokens: int = None) -> List[str]:
+        if self.mode == "tokens":
+            return self.chunk_texts([text], max_tokens=max_tokens)[0]
+
         if not isinstance(text, str) or not text.strip():
             logger.warning("Empty or invalid text encountered during chunking.")
             return []
 
-        chunk_size = max_tokens or self.chunk_size
+        chunks = self._word_windows(text, max_tokens or self.chunk_size)
+
+        logger.debug(f"Chunked text into {len(chunks)} chunks.")
+        return chunks
+
+    def _word_windows(self, text: str, chunk_size: int) -> List[str]:
         words = text.split()
         chunks = []
 
@@ -37,7 +319,6 @@ class ChunkingService:
             if chunk:
                 chunks.append(chunk)
 
-        logger.debug(f"Chunked text into {len(chunks)} chunks.")
         return chunks
 
     def chunk_dataframe(self, df: pd.DataFrame, text_column: str = 'body_text', max_tokens: int = None) -> pd.DataFrame:
@@ -48,14 +329,16 @@ class ChunkingService:
             raise ValueError(f"Missing '{text_column}' column in input DataFrame.")
 
         records: List[Dict] = []
+        params_key = self.params_key(max_tokens)
 
         try:
-            for row in tqdm(df.itertuples(index=False), total=len(df), desc="Chunking articles"):
-                chunks = self.chunk_text(getattr(row, text_column, ''), max_tokens=max_tokens)
+            all_chunks = self._chunk_papers(df, text_column, max_tokens)
+            for row, chunks in tqdm(zip(df.itertuples(index=False), all_chunks), total=len(df), desc="Chunking articles"):
+                paper_id = getattr(row, 'paper_id', '')
                 for idx, chunk in enumerate(chunks):
                     records.append({
-                        "chunk_id": str(uuid.uuid4()),
-                        "paper_id": getattr(row, 'paper_id', ''),
+                        "chunk_id": make_chunk_id(paper_id, params_key, chunk),
+                        "paper_id": paper_id,
                         "chunk_index": idx,
                         "chunk_text": chunk,
                         "title": getattr(row, 'title', ''),
@@ -71,9 +354,122 @@ class ChunkingService:
 
         chunk_df = pd.DataFrame(records)
         logger.info(f"✅ Chunking complete. Generated {len(chunk_df)} chunks.")
+        self.log_truncation_report()
         return chunk_df
 
 
+    def iter_chunk_batches(self, papers: Union[pd.DataFrame, Iterable[pd.DataFrame]], text_column: str = 'body_text',
+                           max_tokens: int = None, batch_rows: int = None) -> Iterator[pd.DataFrame]:
+        """
+        Stream chunks of papers as bounded DataFrames.
+
+        Chunk rows only carry CHUNK_COLUMNS; paper-level fields (title, abstract, journal, ...)
+        are written once per paper by `write_paper_table` and joined back on `paper_id`.
+        In "sentences" mode the papers need `sentences` or sentence offsets plus `clean_text`.
+
+        Args:
+            papers (Union[pd.DataFrame, Iterable[pd.DataFrame]]): Papers, whole or as a stream of batches.
+            text_column (str): Column holding the text to chunk.
+            max_tokens (int): Optional chunk size override (tokens in "tokens" mode, words otherwise).
+            batch_rows (int): Max chunk rows per yielded DataFrame. Defaults to config setting.
+
+        Yields:
+            pd.DataFrame: Chunk batches with CHUNK_COLUMNS.
+        """
+        if isinstance(papers, pd.DataFrame):
+            papers = [papers]
+        batch_rows = batch_rows or settings.CHUNK_BATCH_ROWS
+
+        buffer: Dict[str, List] = {column: [] for column in CHUNK_COLUMNS}
+        params_key = self.params_key(max_tokens)
+        total_chunks = 0
+        progress = tqdm(desc="Chunking articles", unit="papers")
+
+        try:
+            for paper_df in papers:
+                paper_ids = paper_df['paper_id'] if 'paper_id' in paper_df.columns else [''] * len(paper_df)
+                paper_chunks = self._chunk_papers(paper_df, text_column, max_tokens)
+                for paper_id, chunks in zip(paper_ids, paper_chunks):
+                    for idx, chunk in enumerate(chunks):
+                        buffer["chunk_id"].append(make_chunk_id(paper_id, params_key, chunk))
+                        buffer["paper_id"].append(paper_id)
+                        buffer["chunk_index"].append(idx)
+                        buffer["chunk_text"].append(chunk)
+
+                        if len(buffer["chunk_id"]) >= batch_rows:
+                            total_chunks += batch_rows
+                            yield pd.DataFrame(buffer)
+                            buffer = {column: [] for column in CHUNK_COLUMNS}
+
+                progress.update(len(paper_df))
+
+            if buffer["chunk_id"]:
+                total_chunks += len(buffer["chunk_id"])
+                yield pd.DataFrame(buffer)
+        finally:
+            progress.close()
+
+        logger.info(f"✅ Streaming chunking complete. Generated {total_chunks} chunks.")
+        self.log_truncation_report()
+
+    def _chunk_papers(self, paper_df: pd.DataFrame, text_column: str, max_tokens: int = None) -> List[List[str]]:
+        if self.mode == "sentences":
+            # Sentence boundaries come from the NLP stage; nothing is re-parsed here
+            return [self.pack_sentences(sentences, max_tokens) for sentences in get_sentences(paper_df)]
+
+        if text_column not in paper_df.columns:
+            logger.error(f"Input DataFrame must contain a '{text_column}' column.")
+            raise ValueError(f"Missing '{text_column}' column in input DataFrame.")
+        return self.chunk_texts(paper_df[text_column].tolist(), max_tokens=max_tokens)
+
+    def paper_table(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Paper-level fields of a batch of papers, one row per paper.
+        """
+        papers = pd.DataFrame({"paper_id": df['paper_id'] if 'paper_id' in df.columns else ''}, index=df.index)
+        for name, column in PAPER_FIELDS.items():
+            papers[name] = df[column] if column in df.columns else ''
+        return papers.reset_index(drop=True)
+
+    def write_paper_table(self, input_path: str = None, output_path: str = None) -> str:
+        """
+        Stream the paper-level fields of a papers Parquet file into the paper table.
+
+        Only the paper-level columns are read, so body text never has to be loaded.
+
+        Args:
+            input_path (str): Papers Parquet file. Defaults to config setting.
+            output_path (str): Paper table path. Defaults to config setting.
+
+        Returns:
+            str: Path of the written paper table.
+        """
+        input_path = input_path or settings.parquet_input_path
+        output_path = output_path or settings.papers_table_path
+        tmp_path = output_path + ".tmp"
+
+        available = set(pq.read_schema(input_path).names)
+        columns = [c for c in ['paper_id', *PAPER_FIELDS.values()] if c in available]
+
+        # Every field is stored as a nullable string so all batches share one schema
+        schema = pa.schema([(name, pa.string()) for name in ['paper_id', *PAPER_FIELDS]])
+
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        rows = 0
+        with pq.ParquetWriter(tmp_path, schema) as writer:
+            for batch in iter_dataframe_batches(input_path, columns=columns):
+                papers = self.paper_table(batch)
+                writer.write_table(pa.table({
+                    name: pa.array([str(v) if pd.notna(v) else None for v in papers[name]], pa.string())
+                    for name in schema.names
+                }, schema=schema))
+                rows += len(papers)
+
+        os.replace(tmp_path, output_path)
+        logger.info(f"✅ Paper table with {rows} papers saved to {output_path}")
+        return output_path
+
+
 # import os
 # import sys 
 # import uuid
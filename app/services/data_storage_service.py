@@ -2,8 +2,11 @@ import os
 import sys
 import json
 import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import List, Dict, Iterator, Optional
 from app.core.config import get_settings
 from app.core.logger import get_logger
 
@@ -40,6 +43,40 @@ def save_dataframe(df:pd.DataFrame, path: str = None) -> Path: # type: ignore
     
     return save_path
 
+def save_dataset(dataset: ds.Dataset, path: str = None, batch_size: int = None) -> Path:
+    """
+    Streams a (lazily scanned) dataset into a single Parquet file without loading it into memory.
+
+    Args:
+        dataset (ds.Dataset): Data to save.
+        path (str): Optional custom output path. Defaults to config setting.
+        batch_size (int): Rows per written row group. Defaults to config setting.
+
+    Returns:
+        Path: Path to saved file.
+    """
+    
+    save_path = Path(path or settings.clean_parquet_output_path) # type: ignore
+    tmp_path = save_path.with_name(save_path.name + ".tmp")
+    batch_size = batch_size or settings.EXTRACTION_ROW_GROUP_SIZE
+    
+    try:
+        save_path.parent.mkdir(parents=True, exist_ok=True)
+        rows = 0
+        with pq.ParquetWriter(str(tmp_path), dataset.schema) as writer:
+            for batch in dataset.to_batches(batch_size=batch_size):
+                if batch.num_rows:
+                    writer.write_batch(batch)
+                    rows += batch.num_rows
+        os.replace(tmp_path, save_path)
+        logger.info(f"Dataset with {rows} rows saved to {save_path}")
+    
+    except Exception as e:
+        logger.exception(f"Failed to save dataset to {save_path}: {e}")
+        raise
+    
+    return save_path
+
 def load_dataframe(path: str = None) -> pd.DataFrame:
     """
     Loads a DataFrame from a Parquet file.
@@ -62,4 +99,100 @@ def load_dataframe(path: str = None) -> pd.DataFrame:
         return df
     except Exception as e:
         logger.exception("Failed to load DataFrame  from {load_path}: {e}")
-        raise
\ No newline at end of file
+        raise
+
+
+def iter_dataframe_batches(path: str = None, columns: Optional[List[str]] = None,
+                           batch_size: int = None) -> Iterator[pd.DataFrame]:
+    """
+    Streams a Parquet file as bounded DataFrames instead of loading it whole.
+
+    Args:
+        path (str): Optional custom path. Defaults to config setting.
+        columns (List[str]): Optional subset of columns to read.
+        batch_size (int): Rows per yielded DataFrame. Defaults to config setting.
+
+    Yields:
+        pd.DataFrame: Consecutive slices of the file.
+    """
+
+    load_path = Path(path or settings.clean_parquet_output_path) # type: ignore
+    if not load_path.exists():
+        logger.error(f"file not found: {load_path}")
+        raise FileNotFoundError(f"{load_path} does not exist")
+
+    batch_size = batch_size or settings.CHUNK_PAPER_BATCH_SIZE
+    parquet_file = pq.ParquetFile(str(load_path))
+    for batch in parquet_file.iter_batches(batch_size=batch_size, columns=columns):
+        yield batch.to_pandas()
+
+class ParquetBatchWriter:
+    """
+    Streams records into numbered `batch_N.parquet` files with bounded memory.
+
+    Records are buffered column-wise and flushed as one row group every `row_group_size`
+    rows, so memory depends on the row-group size rather than on the batch size. Each batch
+    file is written under a temporary name and only renamed to `batch_N.parquet` once complete.
+    """
+
+    def __init__(self, output_dir: str, schema: pa.Schema, row_group_size: int, start_batch: int = 1):
+        self.output_dir = output_dir
+        self.schema = schema
+        self.row_group_size = row_group_size
+        self.batch_number = start_batch
+
+        self._writer = None
+        self._tmp_path = None
+        self._buffer = {name: [] for name in schema.names}
+        self._buffered_rows = 0
+        self.rows_in_batch = 0
+
+        os.makedirs(self.output_dir, exist_ok=True)
+
+    @property
+    def batch_path(self) -> str:
+        return os.path.join(self.output_dir, f"batch_{self.batch_number}.parquet")
+
+    def write(self, record: Dict) -> None:
+        for name in self.schema.names:
+            self._buffer[name].append(record.get(name))
+        self._buffered_rows += 1
+        self.rows_in_batch += 1
+
+        if self._buffered_rows >= self.row_group_size:
+            self._flush_row_group()
+
+    def _flush_row_group(self) -> None:
+        if not self._buffered_rows:
+            return
+
+        if self._writer is None:
+            self._tmp_path = self.batch_path + ".tmp"
+            self._writer = pq.ParquetWriter(self._tmp_path, self.schema)
+
+        self._writer.write_batch(pa.RecordBatch.from_pydict(self._buffer, schema=self.schema))
+        self._buffer = {name: [] for name in self.schema.names}
+        self._buffered_rows = 0
+
+    def finish_batch(self) -> Optional[str]:
+        """
+        Close the current batch file and advance to the next batch number.
+
+        Returns:
+            Optional[str]: Path of the completed batch file, or None if the batch was empty.
+        """
+        self._flush_row_group()
+        if self._writer is None:
+            return None
+
+        self._writer.close()
+        output_path = self.batch_path
+        os.replace(self._tmp_path, output_path)
+        logger.info(f"Saved batch {self.batch_number} with {self.rows_in_batch} records to {output_path}")
+
+        self._writer = None
+        self._tmp_path = None
+        self.rows_in_batch = 0
+        self.batch_number += 1
+        return output_path
+
@@ -0,0 +1,179 @@
+import os
+import sys
+import math
+import hashlib
+from typing import Dict, List, Optional, Set
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from tqdm import tqdm
+
+from app.core.config import get_settings
+from app.core.logger import get_logger
+from pipeline.metadata_store import MetadataStore
+
+# Ensure project root is in system path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+settings = get_settings()
+logger = get_logger("DedupService")
+
+
+def body_text_hash(text: Optional[str]) -> Optional[str]:
+    """
+    Hash body text after lowercasing and collapsing whitespace, so near-identical parses collide.
+
+    Returns:
+        Optional[str]: Hex digest, or None for empty text (empty bodies are not duplicates of each other).
+    """
+    if not isinstance(text, str):
+        return None
+    normalized = " ".join(text.lower().split())
+    if not normalized:
+        return None
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+
+def estimate_chunk_count(word_count: int, chunk_size: int = None, overlap: int = None) -> int:
+    """
+    Approximate number of chunks for a body of `word_count` words, as "words" mode would chunk it.
+
+    Only an estimate: chunks are cut from the cleaned text (and other modes size them differently).
+    """
+    chunk_size = chunk_size or settings.CHUNK_SIZE
+    overlap = overlap or settings.CHUNK_OVERLAP
+    return math.ceil(word_count / (chunk_size - overlap)) if word_count > 0 else 0
+
+
+def _load_metadata_store() -> Optional[MetadataStore]:
+    if not (os.path.exists(settings.cord19_metadata_path) or os.path.exists(settings.cord19_metadata_cache_path)):
+        logger.warning("No metadata.csv found; duplicates across pdf_json and pmc_json are only "
+                       "detected by identical body text.")
+        return None
+    return MetadataStore()
+
+
+def _load_processed_batches() -> Set[str]:
+    """
+    Batch files the NLP stage has already taken (its `processed_files.txt` checkpoint).
+    """
+    checkpoint_file = os.path.join(settings.input_for_embedding, "processed_files.txt")
+    if not os.path.exists(checkpoint_file):
+        return set()
+    with open(checkpoint_file, "r") as f:
+        return {line.strip() for line in f if line.strip()}
+
+
+def deduplicate_batches(batch_dir: str = None, source_preference: List[str] = None,
+                        text_column: str = "body_text",
+                        metadata_store: Optional[MetadataStore] = None,
+                        processed_batches: Optional[Set[str]] = None) -> Dict[str, int]:
+    """
+    Remove papers that appear more than once across the extracted batch files.
+
+    Two papers are duplicates when they are the same CORD-19 paper or share the hash of their
+    normalized body text. A pdf_json parse (keyed by sha) and a pmc_json parse (keyed by PMCID)
+    never share a `paper_id`, so papers are identified by the `cord_uid` that metadata.csv maps
+    both ids to, and by `paper_id` when the metadata has no entry for them. Papers are claimed in
+    order of source preference (then batch/row order), so with the default preference a PMC parse
+    wins over the PDF parse of the same paper. Batch files that lose rows are rewritten in place.
+
+    Batch files that later stages already processed are never rewritten: their papers are claimed
+    first, whatever their source, and a duplicate in a newer batch is the copy that is removed.
+    An incremental run therefore only trims its own new batches.
+
+    Args:
+        batch_dir (str): Optional custom batch directory. Defaults to config setting.
+        source_preference (List[str]): Sources from most to least preferred. Defaults to config setting.
+        text_column (str): Column holding the paper body.
+        metadata_store (MetadataStore): Paper id -> cord_uid mapping. Loaded from the configured
+            metadata when not given.
+        processed_batches (Set[str]): Names of batch files already processed downstream.
+            Defaults to the NLP stage checkpoint.
+
+    Returns:
+        Dict[str, int]: Papers scanned, papers removed and the estimated number of chunks removed.
+    """
+    batch_dir = batch_dir or settings.extracted_parquet_path
+    source_preference = source_preference or settings.DEDUP_SOURCE_PREFERENCE
+    source_rank = {source: rank for rank, source in enumerate(source_preference)}
+
+    # Numeric order, so ties between equally preferred sources go to the earlier batch
+    batch_names = [
+        f for f in os.listdir(batch_dir) if f.startswith("batch_") and f.endswith(".parquet")
+    ] if os.path.exists(batch_dir) else []
+    batch_files = [
+        os.path.join(batch_dir, f) for f in sorted(batch_names, key=lambda f: int(f.split("_")[1].split(".")[0]))
+    ]
+
+    if not batch_files:
+        logger.warning(f"No batch files found to deduplicate in: {batch_dir}")
+        return {"papers_scanned": 0, "papers_removed": 0, "chunks_removed_estimate": 0}
+
+    metadata_store = metadata_store or _load_metadata_store()
+    processed_batches = _load_processed_batches() if processed_batches is None else processed_batches
+
+    # Pass 1: collect keys only (paper key, source, body hash, word count), one batch at a time
+    candidates = []
+    for file_idx, file_path in enumerate(tqdm(batch_files, desc="Hashing papers")):
+        processed = os.path.basename(file_path) in processed_batches
+        table = pq.read_table(file_path, columns=["paper_id", "source", text_column])
+        paper_ids = table.column("paper_id").to_pylist()
+        if metadata_store is not None:
+            cord_uids = metadata_store.cord_uids(pd.Series(paper_ids)).tolist()
+            paper_keys = [("uid", uid) if isinstance(uid, str) and uid else ("id", paper_id)
+                          for uid, paper_id in zip(cord_uids, paper_ids)]
+        else:
+            paper_keys = [("id", paper_id) for paper_id in paper_ids]
+
+        for row_idx, (paper_key, source, text) in enumerate(zip(
+            paper_keys,
+            table.column("source").to_pylist(),
+            table.column(text_column).to_pylist()
+        )):
+            word_count = len(text.split()) if isinstance(text, str) else 0
+            candidates.append((not processed, source_rank.get(source, len(source_rank)), file_idx, row_idx,
+                               paper_key, body_text_hash(text), word_count))
+
+    # Already processed batches, then preferred sources, claim their paper key and body hash first
+    seen_keys = set()
+    removed_rows: Dict[int, set] = {}
+    chunks_removed_estimate = 0
+    processed_duplicates = 0
+
+    for is_new, _, file_idx, row_idx, paper_key, text_hash, word_count in sorted(candidates):
+        keys = []
+        if paper_key[1]:
+            keys.append(paper_key)
+        if text_hash:
+            keys.append(("body", text_hash))
+
+        if any(key in seen_keys for key in keys):
+            if is_new:
+                removed_rows.setdefault(file_idx, set()).add(row_idx)
+                chunks_removed_estimate += estimate_chunk_count(word_count)
+            else:
+                processed_duplicates += 1
+        seen_keys.update(keys)
+
+    if processed_duplicates:
+        logger.warning(f"{processed_duplicates} duplicate papers were kept: their batch files were already "
+                       f"processed downstream before deduplication ran.")
+
+    # Pass 2: rewrite only the batches that lost rows
+    for file_idx, rows in tqdm(sorted(removed_rows.items()), desc="Rewriting batches"):
+        file_path = batch_files[file_idx]
+        table = pq.read_table(file_path)
+        keep = pa.array([i not in rows for i in range(table.num_rows)])
+
+        tmp_path = file_path + ".tmp"
+        pq.write_table(table.filter(keep), tmp_path, row_group_size=settings.EXTRACTION_ROW_GROUP_SIZE)
+        os.replace(tmp_path, file_path)
+        logger.info(f"Removed {len(rows)} duplicate papers from {os.path.basename(file_path)}")
+
+    papers_removed = sum(len(rows) for rows in removed_rows.values())
+    logger.info(f"Deduplication complete: scanned {len(candidates)} papers, removed {papers_removed} duplicates "
+                f"(an estimated ~{chunks_removed_estimate} chunks no longer cleaned, tagged, embedded or indexed).")
+
+    return {"papers_scanned": len(candidates), "papers_removed": papers_removed,
+            "chunks_removed_estimate": chunks_removed_estimate}
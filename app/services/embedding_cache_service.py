@@ -0,0 +1,268 @@
+import os
+import sys
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from app.core.config import get_settings
+from app.core.logger import get_logger
+
+# Ensure project root is in system path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+settings = get_settings()
+logger = get_logger("EmbeddingCache")
+
+# SQLite limits the number of bound parameters per statement
+SQLITE_BATCH_SIZE = 500
+# Buffered last-used refreshes are written once this many are pending (or on the next insert)
+TOUCH_FLUSH_SIZE = 10_000
+# Eviction trims the cache to this fraction of `max_entries`, so it does not run on every insert
+EVICTION_LOW_WATER = 0.9
+
+# One cache (SQLite connection) per process
+_caches: Dict[Tuple[int, str], "EmbeddingCache"] = {}
+_caches_lock = threading.Lock()
+
+
+def text_hash(text: str) -> str:
+    """
+    Hash text after collapsing whitespace (which the tokenizer ignores anyway).
+    """
+    return hashlib.sha1(" ".join(str(text).split()).encode("utf-8")).hexdigest()
+
+
+def cache_namespace(model_name: str, normalize: bool, backend: str = "torch") -> str:
+    """
+    Cache namespace for one model + normalization setting + inference backend; vectors are only reused within it.
+    """
+    namespace = f"{model_name}|normalized={bool(normalize)}"
+    # Quantized or exported models give (slightly) different vectors than the fp32 torch model
+    return namespace if backend == "torch" else f"{namespace}|{backend}"
+
+
+class EmbeddingCache:
+    """
+    On-disk embedding cache keyed by (namespace, normalized text hash), backed by SQLite.
+
+    Lookups and inserts are done in bulk. Hits refresh the entries' last-used time; the refreshes
+    are buffered and written with the next insert. Once the cache holds more than `max_entries`
+    vectors, the least recently used ones are evicted down to EVICTION_LOW_WATER of the cap. The
+    row count is tracked in memory (as an upper bound) so inserts do not count the table.
+
+    Attributes:
+        hits (int): Texts served from the cache since the last `reset_stats`.
+        misses (int): Texts that had to be encoded since the last `reset_stats`.
+    """
+
+    def __init__(self, path: str = None, max_entries: int = None):
+        self.path = path or settings.embedding_cache_path
+        self.max_entries = settings.EMBEDDING_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=60)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " namespace TEXT NOT NULL, text_hash TEXT NOT NULL, vector BLOB NOT NULL, last_used REAL NOT NULL,"
+            " PRIMARY KEY (namespace, text_hash))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+        self._conn.commit()
+
+        self._touched: Dict[Tuple[str, str], float] = {}
+        self._rows = self._count() if self.max_entries else 0
+
+    def _count(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def get_many(self, namespace: str, hashes: Sequence[str]) -> Dict[str, np.ndarray]:
+        """
+        Look up many text hashes at once.
+
+        Returns:
+            Dict[str, np.ndarray]: Hash -> float32 vector, for the hashes found.
+        """
+        found = {}
+        unique_hashes = list(dict.fromkeys(hashes))
+        with self._lock:
+            for i in range(0, len(unique_hashes), SQLITE_BATCH_SIZE):
+                batch = unique_hashes[i:i + SQLITE_BATCH_SIZE]
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE namespace = ? "
+                    f"AND text_hash IN ({','.join('?' * len(batch))})",
+                    [namespace, *batch]
+                ).fetchall()
+                found.update((h, np.frombuffer(vector, dtype=np.float32)) for h, vector in rows)
+
+            if found:
+                now = time.time()
+                self._touched.update(((namespace, h), now) for h in found)
+                if len(self._touched) >= TOUCH_FLUSH_SIZE:
+                    self._flush_touched()
+                    self._conn.commit()
+        return found
+
+    def _flush_touched(self) -> None:
+        """
+        Write the buffered last-used refreshes (caller holds the lock and commits).
+        """
+        if not self._touched:
+            return
+        self._conn.executemany(
+            "UPDATE embeddings SET last_used = ? WHERE namespace = ? AND text_hash = ?",
+            [(now, namespace, h) for (namespace, h), now in self._touched.items()]
+        )
+        self._touched = {}
+
+    def put_many(self, namespace: str, hashes: Sequence[str], vectors: np.ndarray) -> None:
+        """
+        Insert (or refresh) many vectors at once, evicting if the cache grows past `max_entries`.
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        now = time.time()
+        with self._lock:
+            self._flush_touched()
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (namespace, text_hash, vector, last_used) VALUES (?, ?, ?, ?)",
+                [(namespace, h, vector.tobytes(), now) for h, vector in zip(hashes, vectors)]
+            )
+            # Replaced rows are counted too, so this overestimates; `_evict` recounts before deleting
+            self._rows += len(hashes)
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        if not self.max_entries or self._rows <= self.max_entries:
+            return
+        count = self._count()
+        if count > self.max_entries:
+            target = int(self.max_entries * EVICTION_LOW_WATER)
+            self._conn.execute(
+                "DELETE FROM embeddings WHERE rowid IN "
+                "(SELECT rowid FROM embeddings ORDER BY last_used LIMIT ?)",
+                (count - target,)
+            )
+            logger.info(f"Evicted {count - target} least recently used embeddings from the cache.")
+            count = target
+        self._rows = count
+
+    def lookup(self, texts: Sequence[str], namespace: str) -> Tuple[List[str], Dict[str, np.ndarray], Dict[str, str]]:
+        """
+        First half of `encode`: find cached vectors and the distinct texts that still need encoding.
+
+        Returns:
+            Tuple: Hash of each text, cached vectors by hash, and missing texts by hash.
+        """
+        hashes = [text_hash(text) for text in texts]
+        vectors = self.get_many(namespace, hashes)
+
+        missing = {}
+        for h, text in zip(hashes, texts):
+            if h not in vectors and h not in missing:
+                missing[h] = text
+
+        # Repeats of a text within `texts` are encoded once and count as hits
+        self.hits += len(hashes) - len(missing)
+        self.misses += len(missing)
+        return hashes, vectors, missing
+
+    def fill(self, namespace: str, hashes: List[str], vectors: Dict[str, np.ndarray],
+             missing: Dict[str, str], encoded: Optional[np.ndarray]) -> np.ndarray:
+        """
+        Second half of `encode`: store the vectors of the missing texts and assemble the output matrix.
+        """
+        if missing:
+            encoded = np.asarray(encoded, dtype=np.float32)
+            self.put_many(namespace, list(missing.keys()), encoded)
+            vectors.update(zip(missing.keys(), encoded))
+
+        if not hashes:
+            return np.empty((0, 0), dtype=np.float32)
+        return np.vstack([vectors[h] for h in hashes])
+
+    def encode(self, texts: Sequence[str], namespace: str,
+               encode_fn: Callable[[List[str]], np.ndarray]) -> np.ndarray:
+        """
+        Embed `texts`, calling `encode_fn` only for texts not in the cache (each distinct text once).
+
+        Args:
+            texts (Sequence[str]): Texts to embed.
+            namespace (str): Cache namespace (see `cache_namespace`).
+            encode_fn (Callable): Encodes a list of texts into an (n, d) array.
+
+        Returns:
+            np.ndarray: float32 matrix of shape (len(texts), d), in input order.
+        """
+        hashes, vectors, missing = self.lookup(texts, namespace)
+        encoded = encode_fn(list(missing.values())) if missing else None
+        return self.fill(namespace, hashes, vectors, missing, encoded)
+
+    def log_stats(self, label: str = "Embedding cache") -> None:
+        total = self.hits + self.misses
+        hit_rate = self.hits / total if total else 0.0
+        logger.info(f"{label}: {self.hits} hits, {self.misses} misses ({hit_rate:.1%} hit rate).")
+
+    def reset_stats(self) -> None:
+        self.hits = 0
+        self.misses = 0
+
+    def flush(self) -> None:
+        """
+        Write buffered last-used refreshes.
+        """
+        with self._lock:
+            self._flush_touched()
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._flush_touched()
+            self._conn.commit()
+            self._conn.close()
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    LangChain embeddings wrapper that serves repeated texts (e.g. repeated queries) from an EmbeddingCache.
+    """
+
+    def __init__(self, embeddings: Embeddings, cache: EmbeddingCache, namespace: str):
+        self.embeddings = embeddings
+        self.cache = cache
+        self.namespace = namespace
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        vectors = self.cache.encode(texts, self.namespace, self.embeddings.embed_documents)
+        self.cache.log_stats("Document embedding cache")
+        return vectors.tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        # Queries get their own namespace: some models embed queries differently from documents
+        vectors = self.cache.encode([text], f"{self.namespace}|query",
+                                    lambda texts: [self.embeddings.embed_query(texts[0])])
+        self.cache.log_stats("Query embedding cache")
+        return vectors[0].tolist()
+
+
+def get_embedding_cache() -> Optional[EmbeddingCache]:
+    """
+    The configured embedding cache, or None when caching is disabled.
+
+    The cache is shared by all callers in a process; forked worker processes open their own.
+    """
+    if not settings.EMBEDDING_CACHE_ENABLED:
+        return None
+
+    key = (os.getpid(), settings.embedding_cache_path)
+    with _caches_lock:
+        if key not in _caches:
+            _caches[key] = EmbeddingCache(settings.embedding_cache_path, settings.EMBEDDING_CACHE_MAX_ENTRIES)
+        return _caches[key]
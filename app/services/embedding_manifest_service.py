@@ -0,0 +1,173 @@
+import os
+import sys
+import json
+import base64
+import hashlib
+import threading
+from typing import Dict, Iterable, List, Set
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+from app.core.logger import get_logger
+
+# Ensure project root is in system path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+logger = get_logger("EmbeddingManifest")
+
+EMBEDDING_MANIFEST_FILE = "embedding_manifest.jsonl"
+
+
+def batch_number(batch_file: str) -> int:
+    """
+    Batch number of a `batch_N.parquet` file name.
+    """
+    return int(batch_file.split("_")[1].split(".")[0])
+
+
+def row_keys(df: pd.DataFrame, column: str = "chunk_text") -> List[str]:
+    """
+    Key identifying each chunk row: its chunk_id, or for frames without one a hash of paper id and text.
+    """
+    if "chunk_id" in df.columns:
+        return df["chunk_id"].astype(str).tolist()
+
+    paper_ids = df["paper_id"].astype(str) if "paper_id" in df.columns else pd.Series("", index=df.index)
+    return [
+        hashlib.sha1(f"{paper_id}|{text}".encode("utf-8")).hexdigest()
+        for paper_id, text in zip(paper_ids, df[column].astype(str))
+    ]
+
+
+def key_digests(keys: Iterable[str]) -> np.ndarray:
+    """
+    64-bit digest of each row key (the first 8 bytes of its SHA-1), as stored in the manifest.
+
+    At 64 bits, the chance that two of ten million chunks collide is below one in a million.
+    """
+    return np.frombuffer(
+        b"".join(hashlib.sha1(key.encode("utf-8")).digest()[:8] for key in keys), dtype="<u8"
+    )
+
+
+def _encode_digests(keys: List[str]) -> str:
+    return base64.b64encode(key_digests(keys).tobytes()).decode("ascii")
+
+
+def _decode_digests(encoded: str) -> np.ndarray:
+    return np.frombuffer(base64.b64decode(encoded), dtype="<u8")
+
+
+class EmbeddingManifest:
+    """
+    Append-only record of which embedding batch files are complete.
+
+    One JSON entry per line, later lines win: {"batch", "status", "rows", "keys"}. An entry is appended
+    only after its batch file is fully on disk, so a batch whose write or encoding failed simply has
+    no "done" entry and its chunks are embedded again on the next run, whatever the batch size then is.
+    `keys` holds the 64-bit digests of the batch's row keys (see `key_digests`), base64-encoded:
+    about 11 bytes per chunk, so resuming reads the manifest only, not every batch file.
+    """
+
+    def __init__(self, output_dir: str):
+        self.output_dir = output_dir
+        self.path = os.path.join(output_dir, EMBEDDING_MANIFEST_FILE)
+        self.entries: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def load(self) -> "EmbeddingManifest":
+        self.entries = {}
+        if not os.path.exists(self.path):
+            return self
+
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # Typically a torn last line from an interrupted run; that batch is reconciled from its file
+                    logger.warning(f"Skipping corrupt manifest line in {self.path}")
+                    continue
+                self.entries[entry["batch"]] = entry
+
+        logger.info(f"Loaded embedding manifest with {len(self.entries)} batches from {self.path}")
+        return self
+
+    def _append(self, entries: List[Dict]) -> None:
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                for entry in entries:
+                    f.write(json.dumps(entry) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            for entry in entries:
+                self.entries[entry["batch"]] = entry
+
+    def record_batch(self, batch_file: str, keys: List[str]) -> None:
+        """
+        Record a batch file and the row keys it holds as complete (call once the file is in place).
+        """
+        self._append([{"batch": batch_file, "status": "done", "rows": len(keys), "keys": _encode_digests(keys)}])
+
+    def record_failure(self, batch_file: str, rows: int, error: str) -> None:
+        self._append([{"batch": batch_file, "status": "failed", "rows": rows, "error": error}])
+
+    def batch_keys(self, batch_file: str, column: str = "chunk_text") -> List[str]:
+        """
+        Row keys (see `row_keys`) of a batch file, reading only the key columns.
+        """
+        batch_path = os.path.join(self.output_dir, batch_file)
+        names = pq.read_schema(batch_path).names
+        key_columns = ["chunk_id"] if "chunk_id" in names else [c for c in ("paper_id", column) if c in names]
+        return row_keys(pq.read_table(batch_path, columns=key_columns).to_pandas(), column)
+
+    def reconcile(self, column: str = "chunk_text") -> None:
+        """
+        Bring the manifest in line with the batch files on disk.
+
+        Batch files without a "done" entry (written before the manifest existed, or by a run that
+        stopped between the rename and the manifest append) are recorded, reading their key columns.
+        Entries whose file has been deleted are marked missing, so their chunks are embedded again.
+        """
+        on_disk = {
+            f for f in os.listdir(self.output_dir)
+            if f.startswith("batch_") and f.endswith(".parquet")
+        }
+
+        recovered = []
+        for batch_file in sorted(on_disk, key=batch_number):
+            entry = self.entries.get(batch_file, {})
+            if entry.get("status") == "done" and "keys" in entry:
+                continue
+            keys = self.batch_keys(batch_file, column)
+            recovered.append({"batch": batch_file, "status": "done", "rows": len(keys), "keys": _encode_digests(keys)})
+
+        missing = [
+            {"batch": batch_file, "status": "missing", "rows": entry["rows"]}
+            for batch_file, entry in self.entries.items()
+            if entry["status"] == "done" and batch_file not in on_disk
+        ]
+
+        if recovered or missing:
+            logger.info(f"Manifest reconciled: recorded {len(recovered)} unlisted batch files, "
+                        f"{len(missing)} listed batch files are missing.")
+            self._append(recovered + missing)
+
+    def done_batches(self) -> List[str]:
+        return sorted((batch_file for batch_file, entry in self.entries.items() if entry["status"] == "done"),
+                      key=batch_number)
+
+    def embedded_keys(self) -> Set[int]:
+        """
+        Key digests (see `key_digests`) of the chunks in all "done" batch files.
+
+        Run `reconcile` first, so that every batch file on disk has a "done" entry with its keys.
+        """
+        keys = set()
+        for batch_file in self.done_batches():
+            keys.update(_decode_digests(self.entries[batch_file]["keys"]).tolist())
+        return keys
+
+    def last_batch_number(self) -> int:
+        return max((batch_number(batch_file) for batch_file in self.entries), default=-1)
@@ -1,12 +1,32 @@
 import os 
 import sys
+import copy
+import time
+import queue
+import threading
+import multiprocessing as mp
+from collections import deque
 from sentence_transformers import SentenceTransformer
 from tqdm import tqdm
 import pandas as pd
-from typing import Optional
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
 
 from app.core.config import get_settings
 from app.core.logger import get_logger
+from app.utils.vector_db import (
+    EMBEDDING_COLUMN,
+    load_embedding_info,
+    save_embedding_info,
+    check_embedding_info,
+    vectors_to_arrow,
+    as_fixed_size_embeddings,
+)
+from app.services.embedding_cache_service import cache_namespace, get_embedding_cache
+from app.models.onnx_encoder import OnnxSentenceEncoder
+from app.services.embedding_manifest_service import EmbeddingManifest, batch_number, key_digests, row_keys
 
 
 # # Get the absolute path to the project root directory
@@ -20,24 +40,237 @@ logger = get_logger("EmbeddingService")
 os.environ["HUGGINGFACE_HUB_TOKEN"] = settings.huggingface_api_key
 
 
+def padded_tokens(lengths: np.ndarray, batch_size: int) -> int:
+    """
+    Tokens the model processes when `lengths` are encoded in consecutive batches of `batch_size`,
+    each padded to its longest sequence.
+    """
+    return int(sum(lengths[i:i + batch_size].max() * len(lengths[i:i + batch_size])
+                   for i in range(0, len(lengths), batch_size)))
+
+
+# Marks the end of a stage's output in the pipeline queues
+_END_OF_STAGE = object()
+
+
+class _StageFailure:
+    """
+    Exception raised in a pipeline thread, handed to the consuming thread to re-raise.
+    """
+
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+def _prefetch(items: Iterable, depth: int) -> Iterator:
+    """
+    Produce `items` in a background thread, at most `depth` ahead of the consumer.
+
+    Whatever work the iterable does (reading and chunking papers, cache lookups, tokenizing)
+    then overlaps with the consumer's encoding.
+    """
+    buffer = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in items:
+                if not put(item):
+                    return
+        except BaseException as e:
+            put(_StageFailure(e))
+            return
+        put(_END_OF_STAGE)
+
+    producer = threading.Thread(target=produce, name="embedding-prefetch", daemon=True)
+    producer.start()
+    try:
+        while True:
+            item = buffer.get()
+            if item is _END_OF_STAGE:
+                return
+            if isinstance(item, _StageFailure):
+                raise item.error
+            yield item
+    finally:
+        # Consumer stopped (done, limit reached or failed): release the producer
+        stop.set()
+        producer.join()
+
+
+def write_batch_file(table: pa.Table, path: str) -> None:
+    """
+    Write a batch so it only appears under its final name once fully on disk (temp file, fsync, rename).
+    """
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        pq.write_table(table, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class _BatchWriter:
+    """
+    Background thread that serializes and writes embedding batches, in submission order.
+
+    `submit` blocks once `depth` batches are waiting, so encoding never runs far ahead of the disk.
+    A failed write is re-raised on the next `submit` or on `close`, unless `close` is given the
+    exception that is already ending the run.
+    """
+
+    def __init__(self, output_dir: str, depth: int, manifest: EmbeddingManifest, column: str = "chunk_text"):
+        self.output_dir = output_dir
+        self.manifest = manifest
+        self.column = column
+        self.pending = queue.Queue(maxsize=depth)
+        self.error: Optional[BaseException] = None
+        self.thread = threading.Thread(target=self._run, name="embedding-writer", daemon=True)
+        self.thread.start()
+
+    def _run(self) -> None:
+        while True:
+            item = self.pending.get()
+            if item is _END_OF_STAGE:
+                return
+            if self.error is not None:
+                continue  # Drain without writing after a failure
+
+            batch_number, batch_df, vectors = item
+            try:
+                save_embedding_batch(batch_df, vectors, self.output_dir, batch_number, self.manifest, self.column)
+            except BaseException as e:
+                self.error = e
+
+    def _raise_error(self) -> None:
+        if self.error is not None:
+            raise self.error
+
+    def submit(self, batch_number: int, batch_df: pd.DataFrame, vectors: np.ndarray) -> None:
+        self._raise_error()
+        self.pending.put((batch_number, batch_df, vectors))
+
+    def close(self, active_error: Optional[BaseException] = None) -> None:
+        self.pending.put(_END_OF_STAGE)
+        self.thread.join()
+        if active_error is None:
+            self._raise_error()
+        elif self.error is not None and self.error is not active_error:
+            # Don't replace the exception already propagating; it is the cause of the failed run
+            logger.error(f"❌ Batch writer also failed while the run was aborting: {self.error!r}")
+
+
+def save_embedding_batch(batch_df: pd.DataFrame, vectors: np.ndarray, output_dir: str, batch_number: int,
+                         manifest: EmbeddingManifest, column: str = "chunk_text") -> None:
+    """
+    Save chunk rows with their vectors as `batch_<batch_number>.parquet`, then record it in the manifest.
+
+    Raises:
+        RuntimeError: If the batch could not be written (recorded as failed in the manifest).
+    """
+    batch_file = f"batch_{batch_number}.parquet"
+    try:
+        # Vectors go in as one fixed-width column, not as per-row Python lists
+        batch_table = pa.Table.from_pandas(batch_df, preserve_index=False).append_column(
+            EMBEDDING_COLUMN, vectors_to_arrow(vectors, settings.EMBEDDING_STORAGE_DTYPE)
+        )
+        write_batch_file(batch_table, os.path.join(output_dir, batch_file))
+    except Exception as e:
+        logger.exception(f"❌ Failed to process batch {batch_number}: {e}")
+        manifest.record_failure(batch_file, len(batch_df), str(e))
+        raise RuntimeError(f"Batch {batch_number} failed: {e}")
+
+    manifest.record_batch(batch_file, row_keys(batch_df, column))
+    logger.info(f"✅ Saved batch {batch_number} to {os.path.join(output_dir, batch_file)}")
+
+
+# Per-worker embedding service, loaded once by the pool initializer
+_worker_state: Dict = {}
+
+
+def _init_worker(model_name: str, length_bucketing: bool, backend: str, num_threads: int) -> None:
+    """
+    Pool initializer: pin torch's thread count, then load the model once per worker.
+    """
+    import torch
+
+    torch.set_num_threads(num_threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass  # Only allowed before torch starts any parallel work
+    _worker_state["service"] = EmbeddingService(model_name, length_bucketing=length_bucketing,
+                                                backend=backend, num_threads=num_threads)
+
+
+def _encode_in_worker(texts: List[str]) -> Tuple[np.ndarray, Dict[str, int]]:
+    """
+    Encode one batch with the service held by the current process.
+
+    Returns:
+        Tuple[np.ndarray, Dict[str, int]]: Vectors, and this batch's cache and padding counts.
+    """
+    service = _worker_state["service"]
+    cache = service.cache
+    if cache is not None:
+        cache.reset_stats()
+    service.padding_stats = {"tokens": 0, "padded": 0, "padded_unsorted": 0}
+
+    vectors = service.encode(texts)
+
+    stats = dict(service.padding_stats)
+    stats["cache_hits"] = cache.hits if cache is not None else 0
+    stats["cache_misses"] = cache.misses if cache is not None else 0
+    return vectors, stats
+
+
 class EmbeddingService:
-    def __init__(self, model_name: Optional[str] = None):
+    def __init__(self, model_name: Optional[str] = None, length_bucketing: Optional[bool] = None,
+                 backend: Optional[str] = None, num_threads: Optional[int] = None):
         """
         Initialize the EmbeddingService with the specified model.
+
+        Args:
+            model_name (str): Embedding model. Defaults to config setting.
+            length_bucketing (bool): Encode each window in token-length order. Defaults to config setting.
+            backend (str): "torch", "onnx" or "onnx-int8". Defaults to config setting.
+            num_threads (int): Intra-op threads of the ONNX backend (None = runtime default).
         """
         self.model_name = model_name or settings.EMBEDDING_MODEL_NAME
+        self.backend = backend or settings.EMBEDDING_BACKEND
+        self.num_threads = num_threads
         self.model = self._load_model()
+        self.cache = get_embedding_cache()
+        self.length_bucketing = settings.EMBEDDING_LENGTH_BUCKETING if length_bucketing is None else length_bucketing
+        self.encode_batch_size = settings.EMBEDDING_ENCODE_BATCH_SIZE
+        self.padding_stats = {"tokens": 0, "padded": 0, "padded_unsorted": 0}
+        self._length_tokenizer = None
 
-    def _load_model(self) -> SentenceTransformer:
+    def _load_model(self) -> Union[SentenceTransformer, OnnxSentenceEncoder]:
         """
-        Load the sentence transformer embedding model.
+        Load the sentence transformer embedding model for the configured backend.
 
         Returns:
-            SentenceTransformer: Loaded embedding model.
+            Union[SentenceTransformer, OnnxSentenceEncoder]: Loaded embedding model.
         """
         try:
-            logger.info(f"🔍 Loading embedding model: {self.model_name}")
-            model = SentenceTransformer(self.model_name)
+            logger.info(f"🔍 Loading embedding model: {self.model_name} (backend: {self.backend})")
+            if self.backend == "torch":
+                model = SentenceTransformer(self.model_name)
+            elif self.backend in ("onnx", "onnx-int8"):
+                model = OnnxSentenceEncoder(self.model_name, quantize=self.backend == "onnx-int8",
+                                            num_threads=self.num_threads)
+            else:
+                raise ValueError(f"Unknown embedding backend '{self.backend}'.")
             logger.info("✅ Embedding model loaded successfully.")
             return model
         except Exception as e:
@@ -45,171 +278,368 @@ class EmbeddingService:
             raise RuntimeError(f"Failed to load embedding model: {e}")
 
 
-    def generate_embeddings(
-        self,
-        df: pd.DataFrame,
-        column: str = "chunk_text",
-        batch_size: int = 5000,
-        process_chunk_size: int = 10000  # Number of chunks to process per run
-    ):
+    def encode(self, texts: List[str]) -> np.ndarray:
         """
-        Generate and save embeddings in batches with auto-resume support.
+        Encode texts into normalized embeddings, reusing cached vectors when the cache is enabled.
 
-        Args:
-            df (pd.DataFrame): Input DataFrame containing text chunks.
-            column (str): Column containing text to embed.
-            batch_size (int): Batch size for embedding generation.
-            process_chunk_size (int): Number of chunks to process in this run.
+        Returns:
+            np.ndarray: float32 matrix of shape (len(texts), d).
         """
-        output_dir = settings.embedding_output_path
-        os.makedirs(output_dir, exist_ok=True)
+        return self.encode_prepared(self.prepare(texts))
 
-        # Find all existing batch files to skip them
-        existing_batches = sorted([
-            int(f.split("_")[1].split(".")[0]) for f in os.listdir(output_dir)
-            if f.startswith("batch_") and f.endswith(".parquet")
-        ])
-        last_batch_index = max(existing_batches) if existing_batches else -1
-        logger.info(f"✅ Last completed batch index: {last_batch_index}")
+    def prepare(self, texts: List[str]) -> Dict[str, Any]:
+        """
+        The model-free part of encoding: cache lookup and, with length bucketing, tokenizing.
 
-        total_chunks = len(df)
-        logger.info(f"🚀 Total chunks in the dataset: {total_chunks}")
+        Kept separate from `encode_prepared` so it can run ahead of the model in the prefetch stage.
+        """
+        prepared = {"to_encode": texts, "lengths": None, "cached": None}
+        if self.cache is not None:
+            namespace = cache_namespace(self.model_name, normalize=True, backend=self.backend)
+            hashes, vectors, missing = self.cache.lookup(texts, namespace)
+            prepared["cached"] = (namespace, hashes, vectors, missing)
+            prepared["to_encode"] = list(missing.values())
+
+        if self.length_bucketing and prepared["to_encode"]:
+            prepared["lengths"] = self.token_lengths(prepared["to_encode"])
+        return prepared
+
+    def encode_prepared(self, prepared: Dict[str, Any]) -> np.ndarray:
+        """
+        Run the model on a batch returned by `prepare`.
+        """
+        to_encode = prepared["to_encode"]
+        encoded = None
+        if to_encode:
+            if self.length_bucketing:
+                encoded = self._encode_bucketed(to_encode, prepared["lengths"])
+            else:
+                encoded = self.model.encode(to_encode, batch_size=self.encode_batch_size,
+                                            show_progress_bar=False, normalize_embeddings=True)
+
+        if prepared["cached"] is None:
+            return encoded
+        return self.cache.fill(*prepared["cached"], encoded)
+
+    def token_lengths(self, texts: List[str]) -> np.ndarray:
+        """
+        Token count of each text as the model sees it (special tokens included, truncated to its limit).
+        """
+        # Own copy: this runs in the prefetch thread while the model tokenizes, and fast
+        # tokenizers fail ("Already borrowed") when used from two threads at once
+        if self._length_tokenizer is None:
+            self._length_tokenizer = copy.deepcopy(self.model.tokenizer)
+        input_ids = self._length_tokenizer(list(texts), add_special_tokens=True, truncation=True,
+                                           max_length=self.model.max_seq_length)["input_ids"]
+        return np.fromiter((len(ids) for ids in input_ids), dtype=np.int64, count=len(input_ids))
+
+    def _encode_bucketed(self, texts: List[str], lengths: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Encode `texts` in batches of similar token length, returning vectors in input order.
 
-        # Calculate starting index for this run
-        start_idx = (last_batch_index + 1) * batch_size
+        Sorting the whole window by token length means each batch is padded only to lengths close
+        to its own, instead of to the longest chunk that happens to share its slice of the window.
+        """
+        lengths = self.token_lengths(texts) if lengths is None else lengths
+        order = np.argsort(lengths, kind="stable")
+
+        vectors = None
+        for start in range(0, len(texts), self.encode_batch_size):
+            batch_idx = order[start:start + self.encode_batch_size]
+            batch_vectors = self.model.encode([texts[i] for i in batch_idx], batch_size=len(batch_idx),
+                                              show_progress_bar=False, normalize_embeddings=True)
+            if vectors is None:
+                vectors = np.empty((len(texts), batch_vectors.shape[1]), dtype=batch_vectors.dtype)
+            vectors[batch_idx] = batch_vectors
+
+        self.padding_stats["tokens"] += int(lengths.sum())
+        self.padding_stats["padded"] += padded_tokens(lengths[order], self.encode_batch_size)
+        self.padding_stats["padded_unsorted"] += padded_tokens(lengths, self.encode_batch_size)
+        return vectors
+
+    def log_padding_report(self) -> None:
+        """
+        Log the share of processed tokens that were padding, bucketed vs. batches in DataFrame order.
+        """
+        stats = self.padding_stats
+        if not stats["padded"]:
+            return
+        padding = 1 - stats["tokens"] / stats["padded"]
+        padding_unsorted = 1 - stats["tokens"] / stats["padded_unsorted"]
+        logger.info(f"✅ Padding ratio: {padding:.1%} with length bucketing "
+                    f"vs {padding_unsorted:.1%} for batches in DataFrame order.")
 
-        if start_idx >= total_chunks:
-            logger.info("🎉 All chunks have been processed. Nothing more to do.")
+    @staticmethod
+    def _iter_batches(data: Union[pd.DataFrame, Iterable[pd.DataFrame]], batch_size: int) -> Iterator[pd.DataFrame]:
+        """
+        Re-slice a DataFrame, or a stream of DataFrames, into consecutive `batch_size`-row batches.
+        """
+        if isinstance(data, pd.DataFrame):
+            for i in range(0, len(data), batch_size):
+                yield data.iloc[i:i + batch_size]
             return
 
-        # Limit how many chunks to process in this run
-        end_idx = min(start_idx + process_chunk_size, total_chunks)
-        logger.info(f"🚀 Processing from chunk index {start_idx} to {end_idx - 1}")
+        buffer = None
+        for frame in data:
+            buffer = frame if buffer is None or buffer.empty else pd.concat([buffer, frame], ignore_index=True)
+            start = 0
+            while len(buffer) - start >= batch_size:
+                yield buffer.iloc[start:start + batch_size]
+                start += batch_size
+            buffer = buffer.iloc[start:]
 
-        processed_chunks = 0
+        if buffer is not None and not buffer.empty:
+            yield buffer
 
-        for i in tqdm(range(start_idx, end_idx, batch_size), desc="Embedding Batches"):
+    @staticmethod
+    def _limit_batches(batches: Iterable[pd.DataFrame], process_chunk_size: int) -> Iterator[pd.DataFrame]:
+        processed_chunks = 0
+        for batch_df in batches:
+            # Limit how many chunks to process in this run; the last batch is cut down to the limit
             if processed_chunks >= process_chunk_size:
                 logger.info("✅ Reached the chunk processing limit for this run.")
-                break
-
-            batch_number = i // batch_size
+                return
+            batch_df = batch_df.iloc[:process_chunk_size - processed_chunks]
+            processed_chunks += len(batch_df)
+            yield batch_df
+            if processed_chunks >= process_chunk_size:
+                logger.info("✅ Reached the chunk processing limit for this run.")
+                return
 
-            batch_df = df.iloc[i:i + batch_size].copy()
-            batch_texts = batch_df[column].tolist()
+    def _prepare_batches(self, batches: Iterable[Tuple[int, pd.DataFrame]],
+                         column: str) -> Iterator[Tuple[int, pd.DataFrame, Dict[str, Any]]]:
+        for batch_number, batch_df in batches:
+            yield batch_number, batch_df, self.prepare(batch_df[column].tolist())
 
+    def _encode_serial(self, batches: Iterable[Tuple[int, pd.DataFrame, Dict[str, Any]]]
+                       ) -> Iterator[Tuple[int, pd.DataFrame, np.ndarray]]:
+        for batch_number, batch_df, prepared in batches:
             try:
                 logger.info(f"🚀 Generating embeddings for batch {batch_number}...")
-                batch_embeddings = self.model.encode(batch_texts, show_progress_bar=False, normalize_embeddings=True)
-                batch_df["embedding"] = batch_embeddings.tolist()
-
-                batch_file_path = os.path.join(output_dir, f"batch_{batch_number}.parquet")
-                batch_df.to_parquet(batch_file_path, index=False)
-
-                logger.info(f"✅ Saved batch {batch_number} to {batch_file_path}")
-
-                processed_chunks += len(batch_df)
-
+                yield batch_number, batch_df, self.encode_prepared(prepared)
             except Exception as e:
                 logger.exception(f"❌ Failed to process batch {batch_number}: {e}")
                 raise RuntimeError(f"Batch {batch_number} failed: {e}")
 
-        logger.info("🎯 Embedding completed and batches saved successfully.")
+    def _encode_parallel(self, batches: Iterable[Tuple[int, pd.DataFrame]], column: str,
+                         workers: int) -> Iterator[Tuple[int, pd.DataFrame, np.ndarray]]:
+        """
+        Encode batches in `workers` processes, each with its own model, yielding them in batch order.
+
+        At most two batches per worker are in flight, so a streamed input is never read far ahead.
+        """
+        num_threads = settings.EMBEDDING_WORKER_THREADS or max(1, (os.cpu_count() or 1) // workers)
+        logger.info(f"🚀 Encoding with {workers} worker processes, {num_threads} torch threads each.")
+
+        # spawn: forking a process that has already started torch threads can deadlock
+        context = mp.get_context("spawn")
+        pending = deque()
+
+        with context.Pool(processes=workers, initializer=_init_worker,
+                          initargs=(self.model_name, self.length_bucketing, self.backend, num_threads)) as pool:
+            def collect():
+                batch_number, batch_df, result = pending.popleft()
+                try:
+                    vectors, stats = result.get()
+                except Exception as e:
+                    logger.exception(f"❌ Failed to process batch {batch_number}: {e}")
+                    raise RuntimeError(f"Batch {batch_number} failed: {e}")
+
+                for key in self.padding_stats:
+                    self.padding_stats[key] += stats[key]
+                if self.cache is not None:
+                    self.cache.hits += stats["cache_hits"]
+                    self.cache.misses += stats["cache_misses"]
+                return batch_number, batch_df, vectors
+
+            for batch_number, batch_df in batches:
+                logger.info(f"🚀 Generating embeddings for batch {batch_number}...")
+                result = pool.apply_async(_encode_in_worker, (batch_df[column].tolist(),))
+                pending.append((batch_number, batch_df, result))
+                if len(pending) >= 2 * workers:
+                    yield collect()
 
+            while pending:
+                yield collect()
 
-    def combine_batches(self):
+    @staticmethod
+    def _iter_new_chunks(data: Union[pd.DataFrame, Iterable[pd.DataFrame]], embedded_keys: Set[int],
+                         stats: dict, column: str) -> Iterator[pd.DataFrame]:
         """
-        Combine all batch files into a single DataFrame and save to the configured path.
+        Drop chunks that the manifest lists as embedded, or that were already seen in this run.
+
+        Identical chunks of one paper share a chunk_id (see `make_chunk_id`) and are embedded once.
         """
-        output_dir = settings.embedding_output_path
-        batch_files = sorted([
-            os.path.join(output_dir, f) for f in os.listdir(output_dir)
-            if f.startswith("batch_") and f.endswith(".parquet")
-        ])
+        frames = [data] if isinstance(data, pd.DataFrame) else data
+        for frame in frames:
+            stats["seen"] += len(frame)
+            keys = pd.Series(key_digests(row_keys(frame, column)), index=frame.index)
+
+            embedded = np.fromiter((key in embedded_keys for key in keys.tolist()), dtype=bool, count=len(keys))
+            is_new = ~embedded & ~keys.duplicated().to_numpy()
+            new_chunks = frame[is_new]
+            embedded_keys.update(keys[is_new].tolist())
+            stats["skipped"] += len(frame) - len(new_chunks)
+            if not new_chunks.empty:
+                yield new_chunks
 
-        if not batch_files:
-            logger.warning("⚠️ No batch files found to combine.")
-            return None
+    def generate_embeddings(
+        self,
+        df: Union[pd.DataFrame, Iterable[pd.DataFrame]],
+        column: str = "chunk_text",
+        batch_size: int = 5000,
+        process_chunk_size: int = 10000,  # Number of chunks to process per run
+        workers: Optional[int] = None,
+        pipeline_depth: Optional[int] = None
+    ):
+        """
+        Generate and save embeddings in batches, skipping chunks that are already embedded.
 
-        logger.info(f"🚀 Combining {len(batch_files)} batches...")
+        Which chunks each batch file holds is recorded in the embedding manifest, matched on their
+        content-addressed `chunk_id`. A rerun encodes exactly the chunks not yet in a completed batch
+        (new papers, or chunks of a batch that failed), whatever `batch_size` was used before; they
+        are written to new batch files.
 
-        combined_df = pd.concat((pd.read_parquet(f) for f in batch_files), ignore_index=True)
-        logger.info(f"✅ Combined {len(batch_files)} batches. Total records: {len(combined_df)}")
+        Args:
+            df (Union[pd.DataFrame, Iterable[pd.DataFrame]]): Text chunks, whole or streamed
+                (e.g. from ChunkingService.iter_chunk_batches).
+            column (str): Column containing text to embed.
+            batch_size (int): Batch size for embedding generation.
+            process_chunk_size (int): Number of new chunks to process in this run.
+            workers (int): Encoding processes, each with its own model (1 = encode in this process,
+                0 = all cores). Batches are still written in order. Defaults to config setting.
+            pipeline_depth (int): Batches queued between the prefetch, encode and write stages
+                (0 = run the stages one after another). Defaults to config setting.
+        """
+        workers = settings.EMBEDDING_WORKERS if workers is None else workers
+        workers = workers or os.cpu_count() or 1
+        depth = settings.EMBEDDING_PIPELINE_DEPTH if pipeline_depth is None else pipeline_depth
+        output_dir = settings.embedding_output_path
+        os.makedirs(output_dir, exist_ok=True)
 
-        # Save the combined DataFrame to the configured path
-        combined_output_path = settings.combine_embedding_path
-        os.makedirs(os.path.dirname(combined_output_path), exist_ok=True)
-        combined_df.to_parquet(combined_output_path, index=False)
+        # Record which model produced the vectors so the index builder can verify them
+        dimension = self.model.get_sentence_embedding_dimension()
+        # `encode` always L2-normalizes
+        check_embedding_info(load_embedding_info(output_dir), self.model_name, dimension, output_dir,
+                             backend=self.backend, normalized=True)
+        save_embedding_info(output_dir, self.model_name, dimension, backend=self.backend, normalized=True)
 
-        logger.info(f"✅ Combined embeddings saved to {combined_output_path}")
+        # Leftovers of a write interrupted by a crash; their batches were never completed
+        for f in os.listdir(output_dir):
+            if f.startswith("batch_") and f.endswith(".parquet.tmp"):
+                os.remove(os.path.join(output_dir, f))
+                logger.info(f"🧹 Removed incomplete batch file {f}")
 
-        return combined_df
+        manifest = EmbeddingManifest(output_dir).load()
+        manifest.reconcile(column)
 
+        # New batches are numbered after every batch the manifest has seen, including failed ones
+        last_batch_index = manifest.last_batch_number()
+        logger.info(f"✅ Last batch index: {last_batch_index}")
 
+        embedded_keys = manifest.embedded_keys()
+        logger.info(f"✅ Chunks already embedded: {len(embedded_keys)}")
 
+        if self.cache is not None:
+            self.cache.reset_stats()
+        self.padding_stats = {"tokens": 0, "padded": 0, "padded_unsorted": 0}
+        start_time = time.perf_counter()
 
+        stats = {"seen": 0, "skipped": 0}
+        new_chunks = self._iter_new_chunks(df, embedded_keys, stats, column)
 
+        processed_chunks = 0
+        batches = self._limit_batches(self._iter_batches(new_chunks, batch_size), process_chunk_size)
+        numbered_batches = enumerate(batches, start=last_batch_index + 1)
+
+        # Pipeline: prefetch (read/chunk, cache lookup, tokenize) -> encode -> background writer
+        if workers > 1:
+            upstream = _prefetch(numbered_batches, depth) if depth else numbered_batches
+            encoded_batches = self._encode_parallel(upstream, column, workers)
+        else:
+            prepared_batches = self._prepare_batches(numbered_batches, column)
+            encoded_batches = self._encode_serial(_prefetch(prepared_batches, depth) if depth else prepared_batches)
+
+        writer = _BatchWriter(output_dir, depth, manifest, column) if depth else None
+        active_error = None
+        try:
+            for batch_number, batch_df, batch_embeddings in tqdm(encoded_batches, desc="Embedding Batches"):
+                if writer is not None:
+                    writer.submit(batch_number, batch_df, batch_embeddings)
+                else:
+                    save_embedding_batch(batch_df, batch_embeddings, output_dir, batch_number, manifest, column)
 
-# def generate_embeddings(
-#         self,
-#         df: pd.DataFrame,
-#         column: str = "chunk_text",
-#         batch_size: int = 5000,
-#         total_limit: int = 10000
-#     ):
-#         """
-#         Generate and save embeddings in batches with auto-resume support.
+                processed_chunks += len(batch_df)
+        except BaseException as e:
+            active_error = e
+            raise
+        finally:
+            # Stops the prefetch thread when the run ends early (failure or interrupt)
+            encoded_batches.close()
+            # Batches already encoded are still written, also when a later batch failed
+            if writer is not None:
+                writer.close(active_error=active_error)
+
+        if self.cache is not None:
+            self.cache.flush()
+            self.cache.log_stats("✅ Embedding cache")
+        logger.info(f"✅ Skipped {stats['skipped']} of {stats['seen']} chunks seen that were already embedded.")
+
+        if processed_chunks == 0:
+            logger.info("🎉 All chunks have been processed. Nothing more to do.")
+            return
 
-#         Args:
-#             df (pd.DataFrame): Input DataFrame containing text chunks.
-#             column (str): Column containing text to embed.
-#             batch_size (int): Batch size for embedding generation.
-#             total_limit (int): Total number of chunks to process.
-#         """
-#         output_dir = settings.embedding_output_path
-#         os.makedirs(output_dir, exist_ok=True)  
+        elapsed = time.perf_counter() - start_time
+        self.log_padding_report()
+        logger.info(f"🎯 Embedding completed: {processed_chunks} new chunks saved in batches "
+                    f"({processed_chunks / elapsed:.1f} chunks/sec).")
 
-#         # Find all existing batch files to skip them
-#         existing_batches = sorted([
-#             int(f.split("_")[1].split(".")[0]) for f in os.listdir(output_dir)
-#             if f.startswith("batch_") and f.endswith(".parquet")
-#         ])
-#         last_batch_index = max(existing_batches) if existing_batches else -1
-#         logger.info(f"✅ Last completed batch index: {last_batch_index}")
 
-#         total_chunks = min(len(df), total_limit)
-#         logger.info(f"🚀 Total chunks to process (limited to {total_limit}): {total_chunks}")
+    def combine_batch_tables(self) -> Optional[pa.Table]:
+        """
+        Combine all batch files into a single Arrow table and save it to the configured path.
 
-#         processed_chunks = 0
+        Batches are concatenated in batch-number order as Arrow tables, so the vectors stay in their
+        fixed-width column (batches written with list columns by older runs are converted on the way).
 
-#         for i in tqdm(range(0, total_chunks, batch_size), desc="Embedding Batches"):
-#             if processed_chunks >= total_limit:
-#                 logger.info("✅ Reached total processing limit.")
-#                 break
+        Returns:
+            Optional[pa.Table]: The combined table, or None when there are no batches.
+        """
+        output_dir = settings.embedding_output_path
+        batch_names = [f for f in os.listdir(output_dir) if f.startswith("batch_") and f.endswith(".parquet")]
+        batch_files = [os.path.join(output_dir, f) for f in sorted(batch_names, key=batch_number)]
 
-#             batch_number = i // batch_size
+        if not batch_files:
+            logger.warning("⚠️ No batch files found to combine.")
+            return None
 
-#             if batch_number <= last_batch_index:
-#                 logger.info(f"✅ Batch {batch_number} already exists. Skipping...")
-#                 continue
+        logger.info(f"🚀 Combining {len(batch_files)} batches...")
 
-#             batch_df = df.iloc[i:i + batch_size].copy()
-#             batch_texts = batch_df[column].tolist()
+        dtype = settings.EMBEDDING_STORAGE_DTYPE
+        combined = pa.concat_tables(
+            [as_fixed_size_embeddings(pq.read_table(f), dtype) for f in batch_files],
+            promote_options="default"
+        )
+        logger.info(f"✅ Combined {len(batch_files)} batches. Total records: {combined.num_rows}")
 
-#             try:
-#                 logger.info(f"🚀 Generating embeddings for batch {batch_number}...")
-#                 batch_embeddings = self.model.encode(batch_texts, show_progress_bar=False, normalize_embeddings=True)
-#                 batch_df["embedding"] = batch_embeddings.tolist()
+        # Save the combined table to the configured path
+        combined_output_path = settings.combine_embedding_path
+        os.makedirs(os.path.dirname(combined_output_path), exist_ok=True)
+        pq.write_table(combined, combined_output_path)
 
-#                 batch_file_path = os.path.join(output_dir, f"batch_{batch_number}.parquet")
-#                 batch_df.to_parquet(batch_file_path, index=False)
+        logger.info(f"✅ Combined embeddings saved to {combined_output_path}")
 
-#                 logger.info(f"✅ Saved batch {batch_number} to {batch_file_path}")
+        return combined
 
-#                 processed_chunks += len(batch_df)
+    def combine_batches(self) -> Optional[pd.DataFrame]:
+        """
+        Combine all batch files into a single DataFrame and save to the configured path.
 
-#             except Exception as e:
-#                 logger.exception(f"❌ Failed to process batch {batch_number}: {e}")
-#                 raise RuntimeError(f"Batch {batch_number} failed: {e}")
+        Same as `combine_batch_tables`, converted to pandas (one array per embedding row); prefer
+        `combine_batch_tables` for large corpora.
 
-#         logger.info("🎯 All embeddings generated and saved successfully.")
\ No newline at end of file
+        Returns:
+            Optional[pd.DataFrame]: The combined DataFrame, or None when there are no batches.
+        """
+        combined = self.combine_batch_tables()
+        return combined.to_pandas() if combined is not None else None
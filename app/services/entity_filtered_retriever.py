@@ -0,0 +1,99 @@
+import os
+import sys
+from typing import Any, Dict, Iterable, List, Optional
+import numpy as np
+import faiss
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from app.core.logger import get_logger
+from app.services.entity_index_service import EntityIndex
+
+# Ensure project root is in system path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+logger = get_logger("EntityFilteredRetriever")
+
+
+def build_row_lookup(vector_store) -> Dict[str, Dict[str, List[int]]]:
+    """
+    Map chunk ids and paper ids to their FAISS row ids, using the stored document metadata.
+
+    Args:
+        vector_store: LangChain FAISS vector store.
+
+    Returns:
+        Dict[str, Dict[str, List[int]]]: {"chunk_id": {...}, "paper_id": {...}} -> FAISS rows.
+    """
+    lookup = {"chunk_id": {}, "paper_id": {}}
+    for row, docstore_id in vector_store.index_to_docstore_id.items():
+        doc = vector_store.docstore.search(docstore_id)
+        if not isinstance(doc, Document):
+            continue
+        for key in lookup:
+            value = doc.metadata.get(key)
+            if value:
+                lookup[key].setdefault(value, []).append(row)
+    return lookup
+
+
+def rows_for_entities(entity_index: EntityIndex, row_lookup: Dict[str, Dict[str, List[int]]],
+                      entities: Iterable[str], match_all: bool = False) -> np.ndarray:
+    """
+    FAISS rows of the chunks mentioning the given entities.
+
+    Uses chunk postings when the index has them, and otherwise every chunk of the
+    papers mentioning the entities.
+
+    Returns:
+        np.ndarray: Sorted int64 row ids.
+    """
+    entities = list(entities)
+    if entity_index.chunk_postings:
+        ids, rows_by_id = entity_index.chunks_for(entities, match_all), row_lookup["chunk_id"]
+    else:
+        ids, rows_by_id = entity_index.docs_for(entities, match_all), row_lookup["paper_id"]
+
+    rows = [row for id_ in ids for row in rows_by_id.get(id_, ())]
+    return np.unique(np.asarray(rows, dtype=np.int64))
+
+
+class EntityFilteredRetriever(BaseRetriever):
+    """
+    Similarity search, optionally restricted to a set of FAISS rows given per call.
+
+    `retriever.invoke(query, rows=rows)` passes the candidate rows (e.g. chunks mentioning a
+    given drug) to FAISS as an ID selector, so the search only ever scores those vectors and no
+    text is scanned. Without `rows` it is a plain top-k similarity search, so one retriever (and
+    one QA chain) serves filtered and unfiltered queries alike.
+    """
+
+    vector_store: Any
+    k: int = 5
+
+    def _get_relevant_documents(self, query: str, *, run_manager=None,
+                                rows: Optional[np.ndarray] = None) -> List[Document]:
+        if rows is None:
+            return self.vector_store.similarity_search(query, k=self.k)
+
+        if len(rows) == 0:
+            logger.warning("No chunks match the requested entities; nothing to retrieve.")
+            return []
+
+        query_vector = np.asarray([self.vector_store.embeddings.embed_query(query)], dtype=np.float32)
+        if getattr(self.vector_store, "_normalize_L2", False):
+            faiss.normalize_L2(query_vector)
+
+        params = faiss.SearchParameters(sel=faiss.IDSelectorBatch(rows))
+        _, found = self.vector_store.index.search(query_vector, min(self.k, len(rows)), params=params)
+
+        documents = []
+        for row in found[0]:
+            if row < 0:
+                continue
+            doc = self.vector_store.docstore.search(self.vector_store.index_to_docstore_id[int(row)])
+            if isinstance(doc, Document):
+                documents.append(doc)
+
+        logger.info(f"Retrieved {len(documents)} documents from {len(rows)} entity-filtered chunks.")
+        return documents
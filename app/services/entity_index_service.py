@@ -0,0 +1,277 @@
+import os
+import re
+import sys
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from tqdm import tqdm
+
+from app.core.config import get_settings
+from app.core.logger import get_logger
+
+# Ensure project root is in system path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+settings = get_settings()
+logger = get_logger("EntityIndexService")
+
+# One row per entity mention; offsets point into the document's clean_text
+ENTITY_TABLE_SCHEMA = pa.schema([
+    ("doc_id", pa.dictionary(pa.int32(), pa.string())),
+    ("start", pa.int32()),
+    ("end", pa.int32()),
+    ("label", pa.dictionary(pa.int32(), pa.string())),
+    ("text", pa.string()),
+])
+
+DOC_POSTINGS_FILE = "entity_doc_postings.parquet"
+CHUNK_POSTINGS_FILE = "entity_chunk_postings.parquet"
+
+
+def normalize_entity(text: str) -> str:
+    """
+    Normalize entity text for indexing and lookup (lowercased, whitespace collapsed).
+    """
+    return " ".join(str(text).lower().split())
+
+
+def build_entity_table(doc_ids: Sequence[str], texts: Sequence[str],
+                       entity_spans: Sequence[Sequence[Tuple[int, int, str]]]) -> pa.Table:
+    """
+    Flatten per-document entity spans into one normalized, columnar entity table.
+
+    Args:
+        doc_ids (Sequence[str]): Paper id of each document.
+        texts (Sequence[str]): Text the spans point into (clean_text).
+        entity_spans (Sequence): Per document, a list of (start, end, label) spans.
+
+    Returns:
+        pa.Table: Table with ENTITY_TABLE_SCHEMA.
+    """
+    columns = {"doc_id": [], "start": [], "end": [], "label": [], "text": []}
+
+    for doc_id, text, spans in zip(doc_ids, texts, entity_spans):
+        for start, end, label in spans:
+            columns["doc_id"].append(doc_id)
+            columns["start"].append(start)
+            columns["end"].append(end)
+            columns["label"].append(label)
+            columns["text"].append(normalize_entity(text[start:end]))
+
+    return pa.table({
+        "doc_id": pa.array(columns["doc_id"], pa.string()).dictionary_encode(),
+        "start": pa.array(columns["start"], pa.int32()),
+        "end": pa.array(columns["end"], pa.int32()),
+        "label": pa.array(columns["label"], pa.string()).dictionary_encode(),
+        "text": pa.array(columns["text"], pa.string()),
+    }, schema=ENTITY_TABLE_SCHEMA)
+
+
+def entity_pattern(entities: Iterable[str]) -> "re.Pattern":
+    """
+    One regex finding any of `entities` as whole words in normalized text.
+
+    The match is a zero-width lookahead, so entities that overlap (e.g. "covid-19 vaccine" and
+    "vaccine") are all found; at a given start the longest entity wins.
+    """
+    alternatives = "|".join(re.escape(entity) for entity in sorted(set(entities), key=len, reverse=True))
+    return re.compile(rf"(?<!\w)(?=({alternatives})(?!\w))")
+
+
+def entity_table_path(output_dir: str, batch_name: str) -> str:
+    """
+    Location of the entity table written next to an enriched batch file.
+    """
+    return os.path.join(output_dir, "entities", batch_name)
+
+
+class EntityIndex:
+    """
+    Inverted index from normalized entity text to the documents and chunks that mention it.
+
+    Document postings come straight from the entity tables. A chunk is posted under an entity
+    of its paper when the entity occurs in the chunk text as a whole word ("ace" is not posted
+    for a chunk that only says "surface"). This is checked once at build time, so lookups never
+    scan text.
+
+    Attributes:
+        doc_postings (Dict[str, np.ndarray]): Entity -> paper ids.
+        chunk_postings (Dict[str, np.ndarray]): Entity -> chunk ids.
+    """
+
+    def __init__(self, doc_postings: Dict[str, np.ndarray] = None, chunk_postings: Dict[str, np.ndarray] = None):
+        self.doc_postings = doc_postings or {}
+        self.chunk_postings = chunk_postings or {}
+
+    @staticmethod
+    def _group(df: pd.DataFrame, key: str, value: str) -> Dict[str, np.ndarray]:
+        if df.empty:
+            return {}
+        return {entity: np.unique(group.to_numpy()) for entity, group in df.groupby(key, sort=False)[value]}
+
+    @classmethod
+    def build(cls, entity_dir: str = None, chunk_dir: str = None, labels: Optional[List[str]] = None) -> "EntityIndex":
+        """
+        Build the index from entity tables and (optionally) chunk batches.
+
+        Without entity tables (STORE_ENTITY_TABLE off), the `named_entities` column of the
+        enriched batch files in the NLP output is read instead.
+
+        Args:
+            entity_dir (str): Directory of entity tables. Defaults to the NLP output's `entities` folder.
+            chunk_dir (str): Directory of chunk/embedding batches with chunk_id, paper_id and chunk_text.
+                Chunk postings are skipped when None.
+            labels (List[str]): Only index entities with these labels. Defaults to all labels.
+
+        Returns:
+            EntityIndex: The built index.
+        """
+        entity_dir = entity_dir or os.path.join(settings.input_for_embedding, "entities")
+        files = sorted(f for f in os.listdir(entity_dir) if f.endswith(".parquet")) if os.path.exists(entity_dir) else []
+        if files:
+            mentions = [cls._read_entity_table(os.path.join(entity_dir, file), labels)
+                        for file in tqdm(files, desc="Reading entity tables")]
+        else:
+            mentions = cls._read_entity_columns(os.path.dirname(entity_dir), labels)
+
+        if not mentions:
+            logger.warning(f"No entity tables or named_entities columns found for: {entity_dir}")
+            return cls()
+
+        doc_mentions = pd.concat(mentions, ignore_index=True).drop_duplicates()
+        doc_mentions = doc_mentions[doc_mentions["text"] != ""]
+        doc_postings = cls._group(doc_mentions, "text", "doc_id")
+        logger.info(f"Indexed {len(doc_postings)} entities across {doc_mentions['doc_id'].nunique()} documents.")
+
+        chunk_postings = {}
+        if chunk_dir:
+            entities_by_doc = {doc_id: group.tolist() for doc_id, group in doc_mentions.groupby("doc_id")["text"]}
+            chunk_postings = cls._build_chunk_postings(chunk_dir, entities_by_doc)
+
+        return cls(doc_postings, chunk_postings)
+
+    @staticmethod
+    def _read_entity_table(path: str, labels: Optional[List[str]]) -> pd.DataFrame:
+        df = pq.read_table(path, columns=["doc_id", "label", "text"]).to_pandas()
+        if labels:
+            df = df[df["label"].isin(labels)]
+        return df[["text", "doc_id"]].astype(str).drop_duplicates()
+
+    @staticmethod
+    def _read_entity_columns(batch_dir: str, labels: Optional[List[str]]) -> List[pd.DataFrame]:
+        """
+        (text, doc_id) mentions from the `named_entities` (text, label) pairs of enriched batch files.
+        """
+        files = sorted(
+            f for f in os.listdir(batch_dir) if f.startswith("batch_") and f.endswith(".parquet")
+        ) if os.path.exists(batch_dir) else []
+
+        mentions = []
+        for file in tqdm(files, desc="Reading named_entities"):
+            path = os.path.join(batch_dir, file)
+            if "named_entities" not in pq.read_schema(path).names:
+                continue
+            table = pq.read_table(path, columns=["paper_id", "named_entities"])
+            texts, doc_ids = [], []
+            for paper_id, entities in zip(table.column("paper_id").to_pylist(), table.column("named_entities").to_pylist()):
+                for text, label in entities or ():
+                    if not labels or label in labels:
+                        texts.append(normalize_entity(text))
+                        doc_ids.append(str(paper_id))
+            mentions.append(pd.DataFrame({"text": texts, "doc_id": doc_ids}).drop_duplicates())
+        return mentions
+
+    @classmethod
+    def _build_chunk_postings(cls, chunk_dir: str, entities_by_doc: Dict[str, List[str]]) -> Dict[str, np.ndarray]:
+        """
+        Post each chunk under the entities of its paper that occur in it as whole words.
+
+        Chunks carry no character span into the clean_text the entity offsets refer to (and in
+        "words" mode are cut from the body text), so mentions are matched in the chunk text: one
+        regex per paper scans each chunk once. A paper's chunks are written consecutively, so the
+        regex is compiled once per paper and only the current one is kept.
+        """
+        files = sorted(f for f in os.listdir(chunk_dir) if f.startswith("batch_") and f.endswith(".parquet"))
+        entity_column, chunk_column = [], []
+        pattern_paper, pattern = None, None
+
+        for file in tqdm(files, desc="Posting chunks"):
+            table = pq.read_table(os.path.join(chunk_dir, file), columns=["chunk_id", "paper_id", "chunk_text"])
+            for chunk_id, paper_id, chunk_text in zip(*(table.column(c).to_pylist() for c in table.column_names)):
+                entities = entities_by_doc.get(paper_id)
+                if entities is None or not isinstance(chunk_text, str):
+                    continue
+                if paper_id != pattern_paper:
+                    pattern_paper, pattern = paper_id, entity_pattern(entities)
+                found = {match.group(1) for match in pattern.finditer(normalize_entity(chunk_text))}
+                entity_column.extend(found)
+                chunk_column.extend([chunk_id] * len(found))
+
+        chunk_mentions = pd.DataFrame({"text": entity_column, "chunk_id": chunk_column})
+        chunk_postings = cls._group(chunk_mentions, "text", "chunk_id")
+        logger.info(f"Posted {len(chunk_mentions)} entity mentions to {chunk_mentions['chunk_id'].nunique()} chunks.")
+        return chunk_postings
+
+    @staticmethod
+    def _save_postings(postings: Dict[str, np.ndarray], key: str, path: str) -> None:
+        entities = list(postings.keys())
+        table = pa.table({
+            "entity": pa.array(entities, pa.string()),
+            key: pa.array([postings[entity].tolist() for entity in entities], pa.list_(pa.string())),
+        })
+        tmp_path = path + ".tmp"
+        pq.write_table(table, tmp_path)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _load_postings(path: str, key: str) -> Dict[str, np.ndarray]:
+        if not os.path.exists(path):
+            return {}
+        table = pq.read_table(path)
+        return {
+            entity: np.asarray(ids, dtype=object)
+            for entity, ids in zip(table.column("entity").to_pylist(), table.column(key).to_pylist())
+        }
+
+    def save(self, index_dir: str = None) -> None:
+        """
+        Persist the postings as parquet files in `index_dir`.
+        """
+        index_dir = index_dir or settings.entity_index_path
+        os.makedirs(index_dir, exist_ok=True)
+        self._save_postings(self.doc_postings, "doc_ids", os.path.join(index_dir, DOC_POSTINGS_FILE))
+        self._save_postings(self.chunk_postings, "chunk_ids", os.path.join(index_dir, CHUNK_POSTINGS_FILE))
+        logger.info(f"Entity index saved to {index_dir}")
+
+    @classmethod
+    def load(cls, index_dir: str = None) -> "EntityIndex":
+        """
+        Load postings saved with `save`.
+        """
+        index_dir = index_dir or settings.entity_index_path
+        return cls(
+            cls._load_postings(os.path.join(index_dir, DOC_POSTINGS_FILE), "doc_ids"),
+            cls._load_postings(os.path.join(index_dir, CHUNK_POSTINGS_FILE), "chunk_ids"),
+        )
+
+    @staticmethod
+    def _lookup(postings: Dict[str, np.ndarray], entities: Iterable[str], match_all: bool) -> List[str]:
+        id_sets = [set(postings.get(normalize_entity(entity), ())) for entity in entities]
+        if not id_sets:
+            return []
+        ids = set.intersection(*id_sets) if match_all else set.union(*id_sets)
+        return sorted(ids)
+
+    def docs_for(self, entities: Iterable[str], match_all: bool = False) -> List[str]:
+        """
+        Paper ids mentioning any (or, with `match_all`, every) of the given entities.
+        """
+        return self._lookup(self.doc_postings, entities, match_all)
+
+    def chunks_for(self, entities: Iterable[str], match_all: bool = False) -> List[str]:
+        """
+        Chunk ids mentioning any (or, with `match_all`, every) of the given entities.
+        """
+        return self._lookup(self.chunk_postings, entities, match_all)
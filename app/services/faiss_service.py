@@ -1,16 +1,28 @@
 import os
 import sys
 import time
-from typing import List
+import uuid
+from typing import Dict, List, Optional
 import pandas as pd
 import numpy as np
 from tqdm import tqdm
 import faiss
+import pyarrow.parquet as pq
 from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
 from langchain_huggingface.embeddings import HuggingFaceEmbeddings
 from langchain_community.vectorstores import FAISS
+from langchain_community.docstore.in_memory import InMemoryDocstore
 from app.core.config import get_settings
 from app.core.logger import get_logger
+from app.utils.vector_db import (
+    EMBEDDING_COLUMN,
+    arrow_to_matrix,
+    load_embedding_info,
+    save_embedding_info,
+    check_embedding_info,
+)
+from app.services.embedding_manifest_service import batch_number
 
 # Ensure project root is in system path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
@@ -18,18 +30,56 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../'
 settings = get_settings()
 logger = get_logger("FAISSService")
 
+# Chunk-level columns copied into each document's metadata when present
+METADATA_COLUMNS = ["chunk_id", "paper_id", "chunk_index", "title", "journal", "publish_time", "doi", "source"]
+
+
+class LazyHuggingFaceEmbeddings(Embeddings):
+    """
+    HuggingFaceEmbeddings that only loads the model on first use.
+
+    Building the index from precomputed vectors never encodes anything, so the model is
+    only loaded for batches without an embedding column (or a dimension check). Vectors are
+    L2-normalized like EmbeddingService's, so both kinds can share one index.
+    """
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+        self._embeddings = None
+
+    @property
+    def embeddings(self) -> HuggingFaceEmbeddings:
+        if self._embeddings is None:
+            logger.info(f"Loading embedding model {self.model_name} for encoding in the index builder")
+            self._embeddings = HuggingFaceEmbeddings(model_name=self.model_name,
+                                                     encode_kwargs={"normalize_embeddings": True})
+        return self._embeddings
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embeddings.embed_query(text)
+
 
 class FAISSService:
-    def __init__(self, input_dir: str = None, output_dir: str = None, embedding_model: str = None):
+    def __init__(self, input_dir: str = None, output_dir: str = None, embedding_model: str = None,
+                 use_precomputed: Optional[bool] = None):
         self.input_dir = os.path.abspath(input_dir or settings.input_chroma_data)
         self.output_dir = os.path.abspath(output_dir or settings.vector_db_path)
         self.embedding_model = embedding_model or settings.EMBEDDING_MODEL_NAME
+        self.use_precomputed = settings.FAISS_USE_PRECOMPUTED_EMBEDDINGS if use_precomputed is None else use_precomputed
 
-        self.index_path = os.path.join(self.output_dir, "faiss_index.index")
+        # save_local writes faiss_index.faiss (vectors) and faiss_index.pkl (docstore)
+        self.index_path = os.path.join(self.output_dir, "faiss_index.faiss")
         self.dimension = None  # Dynamically set later
+        self.model_dimension = None  # Resolved lazily from the model only when needed
+        # Backend and normalization of the vectors in the index, recorded in its embedding info
+        self.vector_info = {}
 
-        self.embedding_function = HuggingFaceEmbeddings(model_name=self.embedding_model)
+        self.embedding_function = LazyHuggingFaceEmbeddings(self.embedding_model)
         self.processed_log_path = os.path.join(self.output_dir, "processed_batches.txt")
+        self.papers = self._load_paper_table()
 
         if not os.path.exists(self.input_dir):
             logger.error("Input batch directory not found at %s", self.input_dir)
@@ -48,28 +98,36 @@ class FAISSService:
         # Load or create FAISS index
         if os.path.exists(self.index_path):
             logger.info(f"Loading existing FAISS index from {self.index_path}")
-            self.index = faiss.read_index(self.index_path)
-            self.dimension = self.index.d
-
             # FIXED: Load the FAISS vector store with the security flag
-            from langchain_community.vectorstores import FAISS
             self.faiss_vector_store = FAISS.load_local(
                 folder_path=self.output_dir,
                 index_name="faiss_index",
                 embeddings=self.embedding_function,
                 allow_dangerous_deserialization=True  # Add this parameter
             )
+            self.index = self.faiss_vector_store.index
+            self.dimension = self.index.d
+            index_info = load_embedding_info(self.output_dir) or {}
+            check_embedding_info(index_info, self.embedding_model, self.dimension, self.output_dir)
+            self.vector_info = {key: index_info[key] for key in ("backend", "normalized") if key in index_info}
+
+            # Chunk ids double as docstore ids, so these are the chunks already indexed
+            self.indexed_chunk_ids = set(self.faiss_vector_store.index_to_docstore_id.values())
+            logger.info(f"Loaded {len(self.indexed_chunk_ids)} indexed chunks.")
         else:
             logger.info("Creating a new FAISS index")
             self.index = None  # Will initialize dynamically later
+            self.indexed_chunk_ids = set()
 
-
+        # Model info recorded next to the precomputed vectors, read once for every batch's check
+        self.input_embedding_info = load_embedding_info(self.input_dir)
 
     def _load_batch_files(self) -> List[str]:
+        # Numeric order (batch_2 before batch_10), the order the batches were embedded in
         batch_files = sorted([
             f for f in os.listdir(self.input_dir)
             if f.startswith("batch_") and f.endswith(".parquet")
-        ])
+        ], key=batch_number)
         if not batch_files:
             logger.error("No batch files found in embedding directory: %s", self.input_dir)
             raise FileNotFoundError("No batch files found in embedding directory.")
@@ -88,11 +146,124 @@ class FAISSService:
             os.fsync(f.fileno())
         logger.info(f"Logged processed batch: {batch_file}")
 
-    def _prepare_texts(self, df: pd.DataFrame) -> List[str]:
-        texts = df['chunk_text'].dropna().tolist()
-        if not texts:
+    def _valid_rows(self, df: pd.DataFrame) -> np.ndarray:
+        valid = df['chunk_text'].notna().to_numpy()
+        if not valid.any():
             raise ValueError("No valid texts found in the dataset.")
-        return texts
+        return valid
+
+    def _new_rows(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        Rows whose chunk_id is not already in the index (nor repeated within the batch).
+
+        Identical chunks of one paper share a chunk_id, so only the first is indexed (intended).
+        """
+        if "chunk_id" not in df.columns:
+            return np.ones(len(df), dtype=bool)
+        return (~df["chunk_id"].isin(self.indexed_chunk_ids) & ~df["chunk_id"].duplicated()).to_numpy()
+
+    @staticmethod
+    def _docstore_ids(chunks: pd.DataFrame) -> List[str]:
+        if "chunk_id" in chunks.columns:
+            return chunks["chunk_id"].astype(str).tolist()
+        return [str(uuid.uuid4()) for _ in range(len(chunks))]
+
+    def _load_paper_table(self) -> Optional[pd.DataFrame]:
+        """
+        Paper-level metadata for chunk batches that only reference their paper by paper_id.
+        """
+        papers_path = settings.papers_table_path
+        if not os.path.exists(papers_path):
+            return None
+
+        paper_columns = [col for col in METADATA_COLUMNS if col in pq.read_schema(papers_path).names]
+        papers = pd.read_parquet(papers_path, columns=paper_columns)
+        logger.info(f"Loaded paper table with {len(papers)} papers from {papers_path}")
+        return papers.drop_duplicates(subset=["paper_id"]).set_index("paper_id")
+
+    def _attach_paper_fields(self, df: pd.DataFrame) -> pd.DataFrame:
+        missing = [col for col in self.papers.columns if col not in df.columns] if self.papers is not None else []
+        if not missing or "paper_id" not in df.columns:
+            return df
+
+        paper_fields = self.papers[missing].reindex(df["paper_id"].to_numpy()).reset_index(drop=True)
+        return pd.concat([df.reset_index(drop=True), paper_fields], axis=1)
+
+    def _build_metadatas(self, df: pd.DataFrame, batch_file: str) -> List[Dict[str, str]]:
+        df = self._attach_paper_fields(df)
+        columns = [col for col in METADATA_COLUMNS if col in df.columns]
+        metadatas = []
+        for i, row in enumerate(df[columns].itertuples(index=False)):
+            metadata = {"batch_file": batch_file, "doc_id": f"{batch_file}_{i}"}
+            for col, value in zip(columns, row):
+                if value is not None and not (isinstance(value, float) and np.isnan(value)):
+                    metadata[col] = str(value)
+            metadatas.append(metadata)
+        return metadatas
+
+    def _get_model_dimension(self) -> int:
+        if self.model_dimension is None:
+            self.model_dimension = len(self.embedding_function.embed_query("dimension check"))
+        return self.model_dimension
+
+    def _check_precomputed_dimension(self, dimension: int) -> None:
+        """
+        Verify precomputed vectors against the stored embedding info, the existing index and the model.
+        """
+        embedding_info = self.input_embedding_info
+        check_embedding_info(embedding_info, self.embedding_model, dimension, self.input_dir)
+
+        if self.index is not None and self.index.d != dimension:
+            raise ValueError(f"Embedding dimension {dimension} does not match FAISS index dimension {self.index.d}.")
+
+        if embedding_info is not None:
+            self._use_vectors(embedding_info.get("backend"), embedding_info.get("normalized"))
+        else:
+            # No record of the producing model, so compare against the configured model itself
+            model_dimension = self._get_model_dimension()
+            if model_dimension != dimension:
+                raise ValueError(
+                    f"Embedding dimension {dimension} does not match model "
+                    f"'{self.embedding_model}' dimension {model_dimension}."
+                )
+
+    def _use_vectors(self, backend: Optional[str], normalized: Optional[bool]) -> None:
+        """
+        Check that vectors from `backend` may join the vectors already indexed, and record them.
+
+        Unknown values (None, e.g. from embedding info written by older runs) are not checked.
+        """
+        if self.index is not None:
+            check_embedding_info(self.vector_info, self.embedding_model, self.index.d, self.output_dir,
+                                 backend=backend, normalized=normalized)
+        if backend is not None:
+            self.vector_info["backend"] = backend
+        if normalized is not None:
+            self.vector_info["normalized"] = bool(normalized)
+
+    def _add_precomputed(self, texts: List[str], vectors: np.ndarray, metadatas: List[Dict[str, str]],
+                         ids: List[str]) -> None:
+        """
+        Add precomputed vectors straight into the FAISS index without re-encoding the texts.
+        """
+        if self.index is None:
+            self.index = faiss.IndexFlatL2(vectors.shape[1])
+            self.faiss_vector_store = FAISS(
+                embedding_function=self.embedding_function,
+                index=self.index,
+                docstore=InMemoryDocstore(),
+                index_to_docstore_id={}
+            )
+            logger.info("Created new LangChain FAISS vector store from precomputed embeddings.")
+
+        start = self.index.ntotal
+
+        self.index.add(vectors)
+        self.faiss_vector_store.docstore.add({
+            doc_id: Document(page_content=text, metadata=metadata)
+            for doc_id, text, metadata in zip(ids, texts, metadatas)
+        })
+        self.faiss_vector_store.index_to_docstore_id.update({start + i: doc_id for i, doc_id in enumerate(ids)})
 
     def build_faiss_index_with_resume(self) -> None:
         try:
@@ -113,30 +284,57 @@ class FAISSService:
 
                 start_time = time.time()
                 try:
-                    df = pd.read_parquet(batch_path)
-                    texts = self._prepare_texts(df)
+                    table = pq.read_table(batch_path)
+                    has_vectors = EMBEDDING_COLUMN in table.column_names
+                    df = (table.drop([EMBEDDING_COLUMN]) if has_vectors else table).to_pandas()
 
-                    if not texts:
-                        logger.warning(f"No texts to process in batch: {batch_file}")
+                    valid = self._valid_rows(df)
+                    keep = valid & self._new_rows(df)
+                    if keep.sum() < valid.sum():
+                        logger.info(f"Skipping {valid.sum() - keep.sum()} chunks already in the index.")
+
+                    if not keep.any():
                         self._log_processed_batch(batch_file)
                         continue
 
-                    # Prepare documents with metadata
-                    documents = []
-                    for i, text in enumerate(texts):
-                        documents.append(Document(page_content=text, metadata={"batch_file": batch_file, "doc_id": f"{batch_file}_{i}"}))
-
-                    if self.index is None:
-                        # Create FAISS vector store from documents
-                        self.faiss_vector_store = FAISS.from_documents(documents, self.embedding_function)
-                        self.index = self.faiss_vector_store.index
-                        logger.info("Created new LangChain FAISS vector store.")
+                    chunks = df[keep].reset_index(drop=True)
+                    ids = self._docstore_ids(chunks)
+                    texts = chunks['chunk_text'].tolist()
+                    metadatas = self._build_metadatas(chunks, batch_file)
+
+                    if self.use_precomputed and has_vectors:
+                        # Zero-copy view of the stored vectors; only copied when rows are dropped
+                        vectors = arrow_to_matrix(table.column(EMBEDDING_COLUMN))
+                        if not keep.all():
+                            vectors = vectors[keep]
+                        self._check_precomputed_dimension(vectors.shape[1])
+                        self._add_precomputed(texts, vectors, metadatas, ids)
+                        logger.info(f"Added {len(texts)} precomputed embeddings to the FAISS index.")
                     else:
-                        # FIXED: Correctly reuse existing vector store and add documents
-                        self.faiss_vector_store.add_documents(documents)
-                        logger.info("Added new documents to existing LangChain FAISS vector store.")
+                        if self.use_precomputed:
+                            logger.warning(f"No 'embedding' column in {batch_file}; encoding texts with the model.")
+
+                        # The fallback encoder is the normalized fp32 torch model
+                        self._use_vectors("torch", True)
+
+                        # Prepare documents with metadata
+                        documents = [
+                            Document(page_content=text, metadata=metadata)
+                            for text, metadata in zip(texts, metadatas)
+                        ]
+
+                        if self.index is None:
+                            # Create FAISS vector store from documents
+                            self.faiss_vector_store = FAISS.from_documents(documents, self.embedding_function, ids=ids)
+                            self.index = self.faiss_vector_store.index
+                            logger.info("Created new LangChain FAISS vector store.")
+                        else:
+                            # FIXED: Correctly reuse existing vector store and add documents
+                            self.faiss_vector_store.add_documents(documents, ids=ids)
+                            logger.info("Added new documents to existing LangChain FAISS vector store.")
 
                     self._save_index()
+                    self.indexed_chunk_ids.update(ids)
                     self._log_processed_batch(batch_file)
                     batches_processed += 1
 
@@ -161,6 +359,7 @@ class FAISSService:
     def _save_index(self):
         # FIXED: Directly save the existing faiss_vector_store
         self.faiss_vector_store.save_local(folder_path=self.output_dir, index_name="faiss_index")
+        save_embedding_info(self.output_dir, self.embedding_model, self.index.d, **self.vector_info)
         logger.info(f"FAISS vector store (index + metadata) saved at {self.output_dir}")
 
 
@@ -1,25 +1,176 @@
 import os
+import re
 import sys
 import json
+import time
+import hashlib
+import itertools
+import multiprocessing as mp
 from tqdm import tqdm
 import pandas as pd
-from typing import List, Dict, Optional
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from typing import List, Dict, Optional, Iterator, Set, Tuple, Union
 from app.core.config import get_settings
 from app.core.logger import get_logger
+from app.services.data_storage_service import ParquetBatchWriter
+from app.services.archive_service import iter_archive_members
 
 
 # # Get the absolute path to the project root directory
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
 
 
+try:
+    import orjson  # Optional faster JSON backend
+except ImportError:
+    orjson = None
+
+
 settings = get_settings()
 logger = get_logger("ExtrationLogger")
 
+# Columns produced by extract_sections, in output order
+EXTRACTION_SCHEMA = pa.schema([
+    ("paper_id", pa.string()),
+    ("title", pa.string()),
+    ("authors", pa.string()),
+    ("abstract_text", pa.string()),
+    ("body_text", pa.string()),
+    ("bib_entry_count", pa.int64()),
+    ("ref_entry_count", pa.int64()),
+    ("source", pa.string()),
+])
+
+# Reference sections are objects keyed by BIBREF0, ... (bib_entries) and FIGREF0 / TABREF0, ... (ref_entries)
+_SECTION_OPEN = re.compile(rb'"\w+"\s*:\s*\{')
+_BIB_ENTRY_KEY = re.compile(rb'"BIBREF\d+"\s*:')
+_REF_ENTRY_KEY = re.compile(rb'"(?:FIG|TAB)REF\d+"\s*:')
+
+# Extraction output files: batch_<number>.parquet
+_BATCH_FILE_NAME = re.compile(r"batch_(\d+)\.parquet")
+
+
+def json_backend() -> str:
+    """
+    JSON library used to decode papers: "orjson" or "json".
+
+    "auto" falls back to the stdlib when orjson is not installed; an explicit "orjson" does not.
+
+    Raises:
+        ImportError: If JSON_BACKEND is "orjson" but orjson is not installed.
+    """
+    if settings.JSON_BACKEND == "orjson" and orjson is None:
+        raise ImportError("JSON_BACKEND='orjson' requires orjson (pip install orjson).")
+    if orjson is not None and settings.JSON_BACKEND in ("auto", "orjson"):
+        return "orjson"
+    return "json"
+
+
+# Fail at import rather than silently decoding with the stdlib
+json_backend()
+
+
+def _json_loads(raw: Union[bytes, bytearray, memoryview]) -> dict:
+    if json_backend() == "orjson":
+        return orjson.loads(raw)
+    return json.loads(bytes(raw) if isinstance(raw, memoryview) else raw)
+
+
+def decode_paper(raw: Union[bytes, bytearray], skip_references: Optional[bool] = None) -> dict:
+    """
+    Decode a CORD-19 paper, optionally without materializing `bib_entries` / `ref_entries`.
+
+    CORD-19 papers store the reference sections after `body_text`, so the fast path decodes only
+    the leading part of the document and counts the reference entries by their keys
+    (`bib_entry_count` / `ref_entry_count`). For a bytearray the head is decoded in place,
+    without copying the document. Anything that does not fit this layout falls back to a full decode.
+
+    Args:
+        raw (bytes | bytearray): Raw JSON document.
+        skip_references (bool): Skip the reference sections. Defaults to config setting.
+
+    Returns:
+        dict: Decoded paper.
+    """
+    if skip_references is None:
+        skip_references = settings.JSON_SKIP_REFERENCE_SECTIONS
+
+    if not skip_references:
+        return _json_loads(raw)
+
+    bib_start = raw.find(b'"bib_entries"')
+    ref_start = raw.find(b'"ref_entries"', bib_start) if bib_start != -1 else -1
+
+    if ref_start == -1 or not (_SECTION_OPEN.match(raw, bib_start) and _SECTION_OPEN.match(raw, ref_start)):
+        return _json_loads(raw)
+
+    # The head ends at the comma separating body_text (and friends) from bib_entries
+    end = bib_start - 1
+    while end > 0 and raw[end] in b" \t\r\n":
+        end -= 1
+    if raw[end] != ord(","):
+        return _json_loads(raw)
+
+    try:
+        if isinstance(raw, bytearray):
+            raw[end] = ord("}")
+            try:
+                json_data = _json_loads(memoryview(raw)[:end + 1])
+            finally:
+                raw[end] = ord(",")
+        else:
+            json_data = _json_loads(raw[:end] + b"}")
+    except ValueError:
+        json_data = None
+
+    if not isinstance(json_data, dict) or "body_text" not in json_data:
+        return _json_loads(raw)
+
+    json_data["bib_entry_count"] = len(_BIB_ENTRY_KEY.findall(raw, bib_start, ref_start))
+    json_data["ref_entry_count"] = len(_REF_ENTRY_KEY.findall(raw, ref_start))
+    return json_data
+
+
+def load_json_bytes(raw: Union[bytes, bytearray], name: str) -> Optional[dict]:
+    """
+    Decode an in-memory paper (e.g. an archive member), logging malformed documents like load_json_file.
+    """
+    try:
+        return decode_paper(raw)
+
+    except json.JSONDecodeError as e:
+        logger.warning(f"Malformed JSON in file: {name} — Skipping. Error: {e}")
+        return None
+
+    except Exception as e:
+        logger.error(f"failed to decode the file: {name} — Error: {e}")
+        return None
+
+
+def read_file_bytes(filepath: str) -> bytearray:
+    with open(filepath, "rb") as f:
+        raw = bytearray(os.fstat(f.fileno()).st_size)
+        f.readinto(raw)
+    return raw
+
+
+def content_hash(raw: Union[bytes, bytearray]) -> str:
+    """
+    Change key of a paper file, identical whether it is read from disk or from the archive.
+    """
+    return hashlib.sha1(raw).hexdigest()
+
+
 # load the json file 
-def load_json_file(filepath: str, ) -> Optional[dict]:
+def load_json_file(filepath: str, fast: bool = True) -> Optional[dict]:
     try:
-        with open(filepath, "r", encoding="utf-8") as f:
-            return json.load(f)
+        if not fast:
+            with open(filepath, "r", encoding="utf-8") as f:
+                return json.load(f)
+
+        return decode_paper(read_file_bytes(filepath))
         
     except json.JSONDecodeError as e:
         logger.warning(f"Malformed JSON in file: {filepath} — Skipping. Error: {e}")
@@ -52,8 +203,9 @@ def extract_sections(json_data: Dict, source: str) -> Dict:
             for entry in json_data.get("body_text", [])
         )
 
-        bib_entry_count = len(json_data.get("bib_entries", {}))
-        ref_entry_count = len(json_data.get("ref_entries", {}))
+        # Counts are precomputed when the fast decoder skipped the reference sections
+        bib_entry_count = json_data.get("bib_entry_count", len(json_data.get("bib_entries", {})))
+        ref_entry_count = json_data.get("ref_entry_count", len(json_data.get("ref_entries", {})))
 
         return {
             "paper_id": paper_id,
@@ -95,30 +247,181 @@ def extract_sections(json_data: Dict, source: str) -> Dict:
 #         return {}
     
 
-def load_checkpoint() -> set:
-    ch_dir_path = settings.checkpoint_path
-    if os.path.exists(ch_dir_path):
-        try:
-            with open(ch_dir_path, "r") as f:
-                data = json.load(f)
-                return set(data.get("processed files", []))
-        
-        except Exception as e:
-            logger.warning(f"failed to load checkpoint: {e}")
-    return set()
+def load_manifest(manifest_path: str = None) -> Dict[str, Dict]:
+    """
+    Load the extraction manifest (one JSON entry per line, later lines win).
 
-    
+    Args:
+        manifest_path (str): Optional custom path. Defaults to config setting.
+
+    Returns:
+        Dict[str, Dict]: Manifest entries keyed by file path relative to the CORD-19 root.
+    """
+    manifest_path = manifest_path or settings.extraction_manifest_path
+    manifest = {}
+
+    if not os.path.exists(manifest_path):
+        return manifest
+
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                # Typically a torn last line from an interrupted run; that file stays pending
+                logger.warning(f"Skipping corrupt manifest line in {manifest_path}")
+                continue
+            manifest[entry["path"]] = entry
+
+    logger.info(f"Loaded manifest with {len(manifest)} files from {manifest_path}")
+    return manifest
+
+
+def save_manifest(manifest: Dict[str, Dict], manifest_path: str = None) -> None:
+    """
+    Rewrite the full manifest atomically (used after a scan finds new or changed files).
+    """
+    manifest_path = manifest_path or settings.extraction_manifest_path
+    os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+
+    tmp_path = manifest_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        for entry in manifest.values():
+            f.write(json.dumps(entry) + "\n")
+    os.replace(tmp_path, manifest_path)
+    logger.info(f"Manifest saved with {len(manifest)} files.")
+
+
+def update_manifest(entries: List[Dict], manifest_path: str = None) -> None:
+    """
+    Append updated entries to the manifest once their batch is safely on disk.
+    """
+    if not entries:
+        return
+
+    manifest_path = manifest_path or settings.extraction_manifest_path
+    os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+
+    with open(manifest_path, "a", encoding="utf-8") as f:
+        for entry in entries:
+            f.write(json.dumps(entry) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _scan_source_files(sources: List[str]) -> Dict[str, Dict]:
+    """
+    Stat every JSON file under the source folders.
+
+    Returns:
+        Dict[str, Dict]: Entries (path, source, size, mtime) keyed by path relative to the CORD-19 root.
+    """
+    base_dir = settings.cord19_extracted_path
+    files = {}
+
+    for source in sources:
+        dir_path = os.path.join(base_dir, source)
+        if not os.path.exists(dir_path):
+            logger.warning(f"Directory not found: {dir_path}")
+            continue
+
+        logger.info(f"Scanning directory: {dir_path}")
+        pending_dirs = [dir_path]
+
+        while pending_dirs:
+            with os.scandir(pending_dirs.pop()) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        pending_dirs.append(entry.path)
+                    elif entry.name.endswith(".json"):
+                        stat = entry.stat()
+                        key = os.path.relpath(entry.path, base_dir).replace(os.sep, "/")
+                        files[key] = {"path": key, "source": source, "size": stat.st_size, "mtime": stat.st_mtime_ns}
+
+    return files
+
+
+def _entry_paper_id(entry: Dict) -> str:
+    """
+    paper_id of the row a manifest entry produced (entries written before it was recorded: from the file name).
+    """
+    if entry.get("paper_id"):
+        return entry["paper_id"]
+    name = entry["path"].rsplit("/", 1)[-1]
+    return re.sub(r"(\.xml)?\.json$", "", name)
+
+
+def _mark_superseded(stale: Dict[int, Set[Tuple[str, str]]], entry: Dict) -> None:
+    """
+    Remember the row of a changed file that was already extracted, so it can be dropped from its batch.
+    """
+    if entry.get("status") == "done" and entry.get("batch") is not None:
+        stale.setdefault(entry["batch"], set()).add((entry["source"], _entry_paper_id(entry)))
+
+
+def _drop_superseded_rows(stale: Dict[int, Set[Tuple[str, str]]], output_dir: str = None) -> None:
+    """
+    Remove the earlier rows of re-extracted files from their batch files, which are rewritten in place.
+
+    Must run before the files' manifest entries are reset: if it is interrupted, the next
+    scan still sees the files as changed and simply drops the (remaining) rows again.
+    """
+    output_dir = output_dir or settings.extracted_parquet_path
+    for batch, rows in sorted(stale.items()):
+        file_path = os.path.join(output_dir, f"batch_{batch}.parquet")
+        if not os.path.exists(file_path):
+            continue
+
+        table = pq.read_table(file_path)
+        row_keys = list(zip(table.column("source").to_pylist(), table.column("paper_id").to_pylist()))
+        keep = [key not in rows for key in row_keys]
+        if all(keep):
+            continue
+
+        tmp_path = file_path + ".tmp"
+        pq.write_table(table.filter(pa.array(keep)), tmp_path)
+        os.replace(tmp_path, file_path)
+        logger.info(f"Removed {keep.count(False)} superseded rows of changed files from {os.path.basename(file_path)}")
+
+
+def _refresh_manifest(manifest: Dict[str, Dict], sources: List[str]) -> None:
+    """
+    Add new files to the manifest and reset files whose content changed.
+
+    A file whose size and mtime are unchanged is not read. When only the mtime differs (the file
+    was touched, or its entry was recorded from the archive), the content hash decides.
+    """
+    scanned = _scan_source_files(sources)
+    base_dir = settings.cord19_extracted_path
+    added = 0
+    changed = 0
+    touched = 0
+    stale: Dict[int, Set[Tuple[str, str]]] = {}
+
+    for key, entry in scanned.items():
+        known = manifest.get(key)
+        if known is None:
+            added += 1
+        elif (known["size"], known["mtime"]) == (entry["size"], entry["mtime"]):
+            continue
+        elif known["size"] == entry["size"] and known.get("sha1") and \
+                known["sha1"] == content_hash(read_file_bytes(os.path.join(base_dir, key))):
+            manifest[key] = {**known, "mtime": entry["mtime"]}
+            touched += 1
+            continue
+        else:
+            changed += 1
+            _mark_superseded(stale, known)
+        manifest[key] = {**entry, "status": "pending", "batch": None}
+
+    if added or changed or touched:
+        logger.info(f"Manifest refresh: {added} new, {changed} changed and {touched} touched but unchanged files.")
+        if stale:
+            _drop_superseded_rows(stale)
+        save_manifest(manifest)
+    else:
+        logger.info(f"Manifest is up to date ({len(scanned)} files scanned).")
 
-def save_checkpoint(processed_files: set):
-    try:
-        ch_dir_path = settings.checkpoint_path
-        os.makedirs(os.path.dirname(ch_dir_path), exist_ok = True)
-        with open(ch_dir_path, "w") as f:
-            json.dump({"processed_files": list(processed_files)}, f, indent=2)
-        logger.info(f"checkpoint saved with {len(processed_files)} files.")
-        
-    except Exception as e:
-        logger.error(f"failed to save checkpoint: {e}")
 
 #def extrat_all_document_to_df(sources: List[str] = ["pdf_json", "pmc_json"],  max_files: int = 3) -> pd.DataFrame:
 # def extrat_all_document_to_df(sources: List[str] = ["pdf_json", "pmc_json"]) -> pd.DataFrame:
@@ -164,85 +467,312 @@ def save_checkpoint(processed_files: set):
 #     return df  # ✅ Add this line    
     
 
-def extract_all_document(sources: List[str] = ["pdf_json", "pmc_json"], batch_size: int = 5000) -> pd.DataFrame:
+def _parse_document(task: Tuple[str, Union[str, bytearray], str]) -> Tuple[Optional[Dict], Optional[str], int, float]:
+    """
+    Load and extract a single paper from a file path or from raw archive bytes.
+    Runs inside pool workers, so it only returns plain data.
+
+    Returns:
+        Tuple[Optional[Dict], Optional[str], int, float]: Extracted record (or None), content hash
+            (None if the file could not be read), worker pid, parse time in seconds.
+    """
+    key, payload, source = task
+    start = time.perf_counter()
+
+    if isinstance(payload, str):
+        try:
+            payload = read_file_bytes(payload)
+        except Exception as e:
+            logger.error(f"failed to read the file: {key} — Error: {e}")
+            payload = None
+
+    # Hashed before decoding: the fast decoder briefly patches the buffer in place
+    digest = content_hash(payload) if payload is not None else None
+    json_data = load_json_bytes(payload, key) if payload is not None else None
+    doc = extract_sections(json_data, source) if json_data else None
+
+    return doc or None, digest, os.getpid(), time.perf_counter() - start
+
+
+def _iter_parsed_documents(tasks: Iterator[Tuple], workers: int,
+                           worker_stats: Dict[int, List[float]]) -> Iterator[Tuple[Tuple, Optional[Dict], Optional[str]]]:
+    """
+    Parse (manifest key, file path or raw bytes, source) tasks serially or across a process pool,
+    yielding (task, record, content hash) in task order.
+
+    Tasks are submitted in bounded windows so that the caller can stop early (per-source or
+    global limit) without the pool racing ahead through the whole corpus.
+    """
+    def record(pid: int, elapsed: float):
+        stats = worker_stats.setdefault(pid, [0, 0.0])
+        stats[0] += 1
+        stats[1] += elapsed
+
+    if workers <= 1:
+        for task in tasks:
+            doc, digest, pid, elapsed = _parse_document(task)
+            record(pid, elapsed)
+            yield task, doc, digest
+        return
+
+    chunksize = settings.EXTRACTION_POOL_CHUNKSIZE
+    window_size = workers * chunksize * 4
+
+    with mp.Pool(processes=workers) as pool:
+        while True:
+            window = list(itertools.islice(tasks, window_size))
+            if not window:
+                break
+
+            # imap keeps results in submission order, which keeps batches deterministic
+            for task, (doc, digest, pid, elapsed) in zip(window, pool.imap(_parse_document, window, chunksize=chunksize)):
+                record(pid, elapsed)
+                yield task, doc, digest
+
+
+def _log_worker_throughput(worker_stats: Dict[int, List[float]], wall_time: float) -> None:
+    total_files = 0
+    for pid, (files, busy) in sorted(worker_stats.items()):
+        total_files += files
+        rate = files / busy if busy > 0 else 0.0
+        logger.info(f"Worker {pid}: parsed {files} files in {busy:.1f}s ({rate:.1f} files/sec)")
+
+    if wall_time > 0:
+        logger.info(f"Parsed {total_files} files in {wall_time:.1f}s "
+                    f"({total_files / wall_time:.1f} files/sec across {len(worker_stats)} worker(s))")
+
+
+def _iter_archive_tasks(manifest: Dict[str, Dict], sources: List[str], exhausted_sources: set,
+                        retry_failed: bool, archive_path: str = None,
+                        adopted: Optional[Dict[Tuple[str, str], int]] = None) -> Iterator[Tuple[str, bytearray, str]]:
+    """
+    Yield parse tasks for archive members that the manifest does not already mark as processed.
+
+    Members are matched on size and content hash, like files on disk, so switching between the
+    archive and the unpacked folders does not re-extract the corpus. Members whose paper is
+    already in an adopted batch file (see `_adopt_unrecorded_batches`) are recorded, not parsed.
+    """
+    adopted = adopted or {}
+    adopted_entries = []
+    skipped = 0
+    try:
+        for key, source, size, mtime, raw in iter_archive_members(archive_path, sources):
+            if source in exhausted_sources:
+                continue
+
+            digest = content_hash(raw)
+            known = manifest.get(key)
+            if known and known["size"] == size and \
+                    (known["sha1"] == digest if known.get("sha1") else known["mtime"] == mtime):
+                if known["status"] == "done" or (known["status"] == "failed" and not retry_failed):
+                    skipped += 1
+                    continue
+            elif known:
+                stale: Dict[int, Set[Tuple[str, str]]] = {}
+                _mark_superseded(stale, known)
+                _drop_superseded_rows(stale)
+
+            manifest[key] = {"path": key, "source": source, "size": size, "mtime": mtime, "sha1": digest,
+                             "status": "pending", "batch": None}
+
+            paper_id = _entry_paper_id(manifest[key])
+            if not known and (source, paper_id) in adopted:
+                manifest[key].update(paper_id=paper_id, status="done", batch=adopted.pop((source, paper_id)))
+                adopted_entries.append(manifest[key])
+                skipped += 1
+                continue
+            yield key, raw, source
+    finally:
+        update_manifest(adopted_entries)
+    logger.info(f"Skipped {skipped} archive members already in the manifest.")
+
+
+def _adopt_unrecorded_batches(manifest: Dict[str, Dict], output_dir: str) -> Dict[Tuple[str, str], int]:
+    """
+    Record the papers of batch files that no manifest entry points to as done in those batches.
+
+    Such files are left by a run that stopped between finishing a batch file and appending its
+    manifest entries, or were written before the manifest existed. Their papers are matched to
+    manifest entries by source and file name; papers without an entry yet (archive members are
+    only added to the manifest once they are read) are returned so they can be matched later.
+
+    Returns:
+        Dict[Tuple[str, str], int]: Batch number of each unmatched (source, paper_id).
+    """
+    recorded = {entry["batch"] for entry in manifest.values() if entry["status"] == "done"}
+    unrecorded = sorted(
+        (int(f.split("_")[1].split(".")[0]), f) for f in os.listdir(output_dir)
+        if f.startswith("batch_") and f.endswith(".parquet") and int(f.split("_")[1].split(".")[0]) not in recorded
+    )
+    if not unrecorded:
+        return {}
+
+    by_paper = {
+        (entry["source"], _entry_paper_id(entry)): key
+        for key, entry in manifest.items() if entry["status"] != "done"
+    }
+    adopted = []
+    unmatched: Dict[Tuple[str, str], int] = {}
+
+    for batch, f in unrecorded:
+        table = pq.read_table(os.path.join(output_dir, f), columns=["source", "paper_id"])
+        for source, paper_id in zip(table.column("source").to_pylist(), table.column("paper_id").to_pylist()):
+            key = by_paper.pop((source, paper_id), None)
+            if key is None:
+                unmatched.setdefault((source, paper_id), batch)
+                continue
+            manifest[key] = {**manifest[key], "sha1": None, "paper_id": paper_id, "status": "done", "batch": batch}
+            adopted.append(manifest[key])
+        logger.info(f"Adopted {f}: written before its papers were recorded in the manifest.")
+
+    update_manifest(adopted)
+    if unmatched:
+        logger.info(f"{len(unmatched)} papers in adopted batch files have no manifest entry yet.")
+    return unmatched
+
+
+def extract_all_document(sources: List[str] = ["pdf_json", "pmc_json"], batch_size: int = 5000,
+                         workers: Optional[int] = None, rescan: bool = True,
+                         row_group_size: Optional[int] = None, from_archive: Optional[bool] = None,
+                         archive_path: Optional[str] = None, retry_failed: Optional[bool] = None) -> List[str]:
+    """
+    Extract pending CORD-19 papers into numbered `batch_N.parquet` files, resuming from the manifest.
+
+    Records are streamed to disk one row group at a time and are not kept in memory, so this
+    returns the paths of the batch files written instead of a DataFrame (use
+    `extract_all_document_to_df` for the records themselves).
+
+    Args:
+        sources (List[str]): Source folders to extract (e.g. `pdf_json`, `pmc_json`).
+        batch_size (int): Papers per batch file.
+        workers (int): Parser processes (1 = serial, 0 = all CPU cores). Defaults to config setting.
+        rescan (bool): Stat the source folders for new or changed files before resuming.
+        row_group_size (int): Records buffered per row group. Defaults to config setting.
+        from_archive (bool): Stream papers out of the release archive. Defaults to config setting.
+        archive_path (str): Optional custom archive path. Defaults to config setting.
+        retry_failed (bool): Parse files that failed in an earlier run again. Defaults to config setting.
+
+    Returns:
+        List[str]: Paths of the batch files written by this run.
+    """
     output_dir = settings.extracted_parquet_path
     os.makedirs(output_dir, exist_ok=True)
 
-    # Determine the last completed batch
-    existing_batches = sorted([
+    workers = settings.EXTRACTION_WORKERS if workers is None else workers
+    workers = workers or os.cpu_count() or 1
+    from_archive = settings.EXTRACT_FROM_ARCHIVE if from_archive is None else from_archive
+    retry_failed = settings.EXTRACTION_RETRY_FAILED if retry_failed is None else retry_failed
+
+    # Resume straight from the manifest; a rescan only stats files to pick up new or changed ones
+    manifest = load_manifest()
+    if not from_archive and (rescan or not manifest):
+        _refresh_manifest(manifest, sources)
+
+    unmatched = _adopt_unrecorded_batches(manifest, output_dir)
+    done = [entry for entry in manifest.values() if entry["status"] == "done"]
+    # Existing files count too: a changed file's entry no longer names the batch it was first written to
+    existing_batches = [
         int(f.split("_")[1].split(".")[0]) for f in os.listdir(output_dir)
         if f.startswith("batch_") and f.endswith(".parquet")
-    ])
-    last_batch = existing_batches[-1] if existing_batches else 0
-    batch_number = last_batch + 1
-    processed_count = last_batch * batch_size
+    ]
+    batch_number = max([entry["batch"] for entry in done] + existing_batches, default=0) + 1
+
+    total_limit = 100000
+    source_limits = {"pdf_json": 50000, "pmc_json": 50000}
+    source_counts = {src: sum(1 for entry in done if entry["source"] == src) for src in sources}
+    exhausted_sources = {src for src in sources if source_counts[src] >= source_limits[src]}
+
+    if sum(source_counts.values()) >= total_limit:
+        logger.info(f"Global extraction limit already reached: {total_limit}")
+        return []
+
+    if from_archive:
+        # Members arrive in archive order; the manifest filters out already processed ones
+        tasks = _iter_archive_tasks(manifest, sources, exhausted_sources, retry_failed, archive_path, unmatched)
+    else:
+        # Failed files are parsed again (they may have been fixed, or the error was transient)
+        retry_statuses = ("pending", "failed") if retry_failed else ("pending",)
+        pending = sorted(
+            (entry for entry in manifest.values() if entry["status"] in retry_statuses and entry["source"] in sources),
+            key=lambda entry: (sources.index(entry["source"]), entry["path"])
+        )
+
+        if not pending:
+            logger.info("All files are already extracted. Nothing to do.")
+            return []
+
+        logger.info(f"Files pending: {len(pending)}")
+        base_dir = settings.cord19_extracted_path
+        tasks = (
+            (entry["path"], os.path.join(base_dir, entry["path"]), entry["source"])
+            for entry in pending if entry["source"] not in exhausted_sources
+        )
 
-    logger.info(f"Last completed batch: {last_batch}")
+    logger.info(f"Files already extracted: {len(done)}")
     logger.info(f"Batch number starting from: {batch_number}")
-    logger.info(f"Skipping first {processed_count} files")
+    logger.info(f"Parsing with {workers} worker process(es)")
 
-    records = []
+    writer = ParquetBatchWriter(output_dir, EXTRACTION_SCHEMA,
+                                row_group_size=row_group_size or settings.EXTRACTION_ROW_GROUP_SIZE,
+                                start_batch=batch_number)
+    written_batches = []
+    batch_entries = []
     file_counter = 0
-    total_seen = 0
-    total_limit = 100000
-    source_limits = {"pdf_json": 50000, "pmc_json": 50000}
-    source_counts = {src: 0 for src in sources}
 
-    for source in sources:
-        if source_counts[source] >= source_limits[source]:
-            continue
+    worker_stats: Dict[int, List[float]] = {}
+    start_time = time.perf_counter()
 
-        dir_path = os.path.join(settings.cord19_extracted_path, source)
-        if not os.path.exists(dir_path):
-            logger.warning(f"Directory not found: {dir_path}")
-            continue
+    for (key, _, source), doc, digest in _iter_parsed_documents(tasks, workers, worker_stats):
+        if source in exhausted_sources:
+            continue  # Results still in flight after this source reached its limit
 
-        logger.info(f"Scanning directory: {dir_path}")
+        if doc:
+            batch_entries.append({**manifest[key], "sha1": digest, "paper_id": doc["paper_id"],
+                                  "status": "done", "batch": writer.batch_number})
+            writer.write(doc)
+            file_counter += 1
+            source_counts[source] += 1
 
-        for root, _, files in os.walk(dir_path):
-            for file in files:
-                if file.endswith(".json"):
-                    total_seen += 1
-                    if total_seen <= processed_count:
-                        continue  # Skip already processed files
-
-                    if source_counts[source] >= source_limits[source]:
-                        break  # Stop when limit for this source is reached
-
-                    file_path = os.path.join(root, file)
-                    json_data = load_json_file(file_path)
-
-                    if json_data:
-                        doc = extract_sections(json_data, source)
-                        if doc:
-                            records.append(doc)
-                            file_counter += 1
-                            source_counts[source] += 1
-
-                    if file_counter >= batch_size:
-                        batch_df = pd.DataFrame(records)
-                        output_file = os.path.join(output_dir, f"batch_{batch_number}.parquet")
-                        batch_df.to_parquet(output_file, index=False)
-                        logger.info(f"Saved batch {batch_number} with {len(batch_df)} records.")
-                        batch_number += 1
-                        file_counter = 0
-                        records = []
-
-                if sum(source_counts.values()) >= total_limit:
-                    logger.info(f"Reached global extraction limit: {total_limit}")
-                    break
-            if sum(source_counts.values()) >= total_limit:
-                break
+            if source_counts[source] >= source_limits[source]:
+                exhausted_sources.add(source)  # Stop when limit for this source is reached
+        else:
+            batch_entries.append({**manifest[key], "sha1": digest, "status": "failed", "batch": None})
+
+        if file_counter >= batch_size:
+            written_batches.append(writer.finish_batch())
+            update_manifest(batch_entries)
+            file_counter = 0
+            batch_entries = []
+
+        if sum(source_counts.values()) >= total_limit:
+            logger.info(f"Reached global extraction limit: {total_limit}")
+            break
 
     # Save any remaining records
-    if records:
-        batch_df = pd.DataFrame(records)
-        output_file = os.path.join(output_dir, f"batch_{batch_number}.parquet")
-        batch_df.to_parquet(output_file, index=False)
-        logger.info(f"Saved final batch {batch_number} with {len(batch_df)} records.")
+    final_batch = writer.finish_batch()
+    if final_batch:
+        written_batches.append(final_batch)
+    update_manifest(batch_entries)
+
+    _log_worker_throughput(worker_stats, time.perf_counter() - start_time)
+    logger.info(f"Extraction complete. Wrote {len(written_batches)} batch file(s).")
+    return written_batches
+
 
-    logger.info("Extraction complete.")
-    return pd.DataFrame(records)
+def extract_all_document_to_df(*args, **kwargs) -> pd.DataFrame:
+    """
+    Run `extract_all_document` and load the records it wrote into one DataFrame.
+
+    For callers of the earlier, DataFrame-returning API. Holds every new record in memory,
+    so prefer `extract_all_document` (or `combine_parquet_batches(lazy=True)`) for a full corpus.
+
+    Returns:
+        pd.DataFrame: Records extracted by this run (empty, with the extraction columns, if none).
+    """
+    batch_paths = extract_all_document(*args, **kwargs)
+    if not batch_paths:
+        return EXTRACTION_SCHEMA.empty_table().to_pandas()
+    return pa.concat_tables([pq.read_table(path) for path in batch_paths]).to_pandas()
 
 
 # def extract_all_document(sources: List[str] = ["pdf_json", "pmc_json"], batch_size: int = 20000) -> pd.DataFrame:
@@ -322,53 +852,81 @@ def extract_all_document(sources: List[str] = ["pdf_json", "pmc_json"], batch_si
 #     return pd.DataFrame(records)  # Return final batch for inspection
 
 
-def combine_parquet_batches() -> pd.DataFrame:
+def open_batch_dataset(batch_dir: str = None) -> ds.Dataset:
     """
-    Combines all .parquet batch files from a directory into a single DataFrame,
-    ensuring consistent columns across all batches.
+    Opens all batch_*.parquet files, in batch-number order, as one lazily scanned dataset.
+
+    The schema is unified from the parquet footers only (no data pages are read), and columns
+    missing from a batch are read back as nulls.
+
+    Args:
+        batch_dir (str): Optional custom batch directory. Defaults to config setting.
+
+    Returns:
+        ds.Dataset: Dataset over all readable batch files.
+
+    Raises:
+        FileNotFoundError: If the directory is missing or has no readable batch files.
     """
-    batch_dir = settings.extracted_parquet_path
+    batch_dir = batch_dir or settings.extracted_parquet_path
     logger.info(f"Combining parquet files from: {batch_dir}")
 
     if not os.path.exists(batch_dir):
         raise FileNotFoundError(f"Batch directory does not exist: {batch_dir}")
 
-    batch_files = sorted([
-        file for file in os.listdir(batch_dir) if file.endswith(".parquet")
-    ])
+    numbered = []
+    for file in os.listdir(batch_dir):
+        match = _BATCH_FILE_NAME.fullmatch(file)
+        if match:
+            numbered.append((int(match.group(1)), file))
+        elif file.startswith("batch_") and file.endswith(".parquet"):
+            logger.warning(f"Skipping {file}: not a numbered batch file")
+
+    # Numeric order (batch_2 before batch_10), the order the batches were extracted in
+    batch_files = [file for _, file in sorted(numbered)]
 
     if not batch_files:
-        raise FileNotFoundError(f"No .parquet batch files found in: {batch_dir}")
+        raise FileNotFoundError(f"No batch_*.parquet files found in: {batch_dir}")
 
-    all_batches = []
-    all_columns = set()
+    readable_files = []
+    schemas = []
 
-    # First pass: collect all column names
-    for file in tqdm(batch_files, desc="Analyzing batch schema"):
+    for file in tqdm(batch_files, desc="Reading batch footers"):
         file_path = os.path.join(batch_dir, file)
         try:
-            batch_df = pd.read_parquet(file_path, engine='pyarrow')
-            all_columns.update(batch_df.columns.tolist())
+            schemas.append(pq.read_schema(file_path).remove_metadata())
+            readable_files.append(file_path)
         except Exception as e:
             logger.warning(f"Failed to read {file_path}: {e}")
 
-    all_columns = sorted(all_columns)  # for consistent column order
+    if not readable_files:
+        raise FileNotFoundError(f"None of the {len(batch_files)} batch files in {batch_dir} could be read.")
 
-    # Second pass: read files and align columns
-    for file in tqdm(batch_files, desc="Reading & aligning batches"):
-        file_path = os.path.join(batch_dir, file)
-        try:
-            batch_df = pd.read_parquet(file_path, engine='pyarrow')
-            for col in all_columns:
-                if col not in batch_df.columns:
-                    batch_df[col] = pd.NA
-            batch_df = batch_df[all_columns]  # ensure column order
-            all_batches.append(batch_df)
-        except Exception as e:
-            logger.warning(f"Failed to read/align {file_path}: {e}")
+    unified = pa.unify_schemas(schemas)
+    schema = pa.schema(sorted(unified, key=lambda field: field.name))  # for consistent column order
+
+    dataset = ds.dataset(readable_files, schema=schema, format="parquet")
+    logger.info(f"Opened {len(readable_files)} batch files with {len(schema)} columns.")
+    return dataset
+
+
+def combine_parquet_batches(lazy: bool = False) -> Union[pd.DataFrame, ds.Dataset]:
+    """
+    Combines all .parquet batch files from a directory into a single DataFrame,
+    ensuring consistent columns across all batches.
+
+    Args:
+        lazy (bool): Return the lazily scanned dataset instead of loading it into memory.
+
+    Returns:
+        Union[pd.DataFrame, ds.Dataset]: Combined data.
+    """
+    dataset = open_batch_dataset()
+    if lazy:
+        return dataset
 
-    final_df = pd.concat(all_batches, ignore_index=True)
-    logger.info(f"Successfully combined {len(batch_files)} files.")
+    final_df = dataset.to_table().to_pandas()
+    logger.info(f"Successfully combined {len(dataset.files)} files.")
     logger.info(f"Final DataFrame shape: {final_df.shape}")
     return final_df
 
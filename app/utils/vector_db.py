@@ -0,0 +1,201 @@
+import os
+import sys
+import json
+from typing import Dict, Optional, Union
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from app.core.logger import get_logger
+
+# Ensure project root is in system path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+logger = get_logger("VectorDB")
+
+EMBEDDING_INFO_FILE = "embedding_info.json"
+EMBEDDING_COLUMN = "embedding"
+EMBEDDING_DTYPES = {"float32": pa.float32(), "float16": pa.float16()}
+
+
+def vectors_to_arrow(vectors: np.ndarray, dtype: str = "float32") -> pa.FixedSizeListArray:
+    """
+    Wrap an (n, d) matrix as a fixed-size list column, stored as one flat buffer of n * d values.
+
+    Args:
+        vectors (np.ndarray): Embedding matrix.
+        dtype (str): Storage type, "float32" or "float16" (half the size, ~3 significant digits).
+
+    Returns:
+        pa.FixedSizeListArray: Column of n vectors of length d.
+    """
+    if dtype not in EMBEDDING_DTYPES:
+        raise ValueError(f"Unsupported embedding storage dtype '{dtype}', expected one of {list(EMBEDDING_DTYPES)}.")
+
+    vectors = np.ascontiguousarray(vectors, dtype=np.dtype(dtype))
+    values = pa.array(vectors.reshape(-1), type=EMBEDDING_DTYPES[dtype])
+    return pa.FixedSizeListArray.from_arrays(values, vectors.shape[1])
+
+
+def arrow_to_matrix(column: Union[pa.Array, pa.ChunkedArray]) -> np.ndarray:
+    """
+    View an embedding column as a float32 (n, d) matrix.
+
+    Fixed-size float32 columns read from a single row group are returned without copying;
+    float16 columns are widened to float32 (FAISS only takes float32). Legacy variable-length
+    list columns are still accepted.
+
+    Args:
+        column (Union[pa.Array, pa.ChunkedArray]): Embedding column of an Arrow table.
+
+    Returns:
+        np.ndarray: C-contiguous float32 matrix of shape (n, d).
+    """
+    if isinstance(column, pa.ChunkedArray):
+        column = column.combine_chunks() if column.num_chunks != 1 else column.chunk(0)
+
+    if len(column) == 0:
+        return np.empty((0, 0), dtype=np.float32)
+
+    if pa.types.is_fixed_size_list(column.type):
+        dimension = column.type.list_size
+    else:
+        # Legacy list<double> column: every row must have the same length
+        lengths = column.value_lengths().to_numpy(zero_copy_only=False)
+        dimension = int(lengths[0])
+        if (lengths != dimension).any():
+            raise ValueError("Embedding column holds vectors of different lengths.")
+
+    matrix = column.flatten().to_numpy(zero_copy_only=False).reshape(-1, dimension)
+    return np.ascontiguousarray(matrix, dtype=np.float32)
+
+
+def as_fixed_size_embeddings(table: pa.Table, dtype: str = "float32") -> pa.Table:
+    """
+    Return `table` with its embedding column stored as fixed-size `dtype` vectors.
+    """
+    index = table.schema.get_field_index(EMBEDDING_COLUMN)
+    if index < 0:
+        return table
+
+    column_type = table.schema.field(index).type
+    if pa.types.is_fixed_size_list(column_type) and column_type.value_type == EMBEDDING_DTYPES[dtype]:
+        return table
+    return table.set_column(index, EMBEDDING_COLUMN, vectors_to_arrow(arrow_to_matrix(table.column(index)), dtype))
+
+
+def embeddings_to_matrix(embeddings: pd.Series) -> np.ndarray:
+    """
+    Stack a pandas column of per-row embedding vectors into one contiguous float32 matrix.
+    Prefer `arrow_to_matrix` on the Arrow column, which avoids the per-row objects.
+
+    Args:
+        embeddings (pd.Series): Column holding one vector per row.
+
+    Returns:
+        np.ndarray: C-contiguous float32 matrix of shape (n, d).
+    """
+    if embeddings.empty:
+        return np.empty((0, 0), dtype=np.float32)
+
+    matrix = np.vstack(embeddings.to_numpy())
+    return np.ascontiguousarray(matrix, dtype=np.float32)
+
+
+def load_embedding_info(directory: str) -> Optional[Dict]:
+    """
+    Load the embedding model info (model name, dimension, backend, normalization) stored next to the vectors.
+
+    Args:
+        directory (str): Directory holding the embedding batches or the index.
+
+    Returns:
+        Optional[Dict]: Stored info, or None when no info file exists.
+    """
+    info_path = os.path.join(directory, EMBEDDING_INFO_FILE)
+    if not os.path.exists(info_path):
+        return None
+
+    try:
+        with open(info_path, "r") as f:
+            return json.load(f)
+    except Exception as e:
+        logger.warning(f"Failed to read embedding info from {info_path}: {e}")
+        return None
+
+
+def embedding_quantization(backend: str) -> str:
+    """
+    Weight precision of an embedding backend ("torch", "onnx" or "onnx-int8").
+    """
+    return "int8" if backend == "onnx-int8" else "fp32"
+
+
+def save_embedding_info(directory: str, model_name: str, dimension: int,
+                        backend: str = "torch", normalized: bool = True) -> None:
+    """
+    Record which embedding model (and vector dimension) produced the vectors in a directory.
+
+    Args:
+        directory (str): Directory holding the embedding batches or the index.
+        model_name (str): Name of the embedding model.
+        dimension (int): Embedding dimension.
+        backend (str): Inference backend that produced the vectors ("torch", "onnx" or "onnx-int8").
+        normalized (bool): Whether the vectors are L2-normalized.
+    """
+    os.makedirs(directory, exist_ok=True)
+    info_path = os.path.join(directory, EMBEDDING_INFO_FILE)
+    info = {
+        "model_name": model_name,
+        "dimension": int(dimension),
+        "backend": backend,
+        "quantization": embedding_quantization(backend),
+        "normalized": bool(normalized),
+    }
+    with open(info_path, "w") as f:
+        json.dump(info, f, indent=2)
+
+
+def check_embedding_info(info: Optional[Dict], model_name: str, dimension: int, location: str,
+                         backend: Optional[str] = None, normalized: Optional[bool] = None) -> None:
+    """
+    Ensure stored embedding info matches the configured model and the observed dimension.
+
+    Backend (and with it quantization) and normalization are only compared when given and
+    recorded; info files written before they were recorded pass.
+
+    Raises:
+        ValueError: If the model name, the dimension, the backend or the normalization differ.
+    """
+    if not info:
+        return
+
+    stored_model = info.get("model_name")
+    stored_dimension = info.get("dimension")
+    stored_backend = info.get("backend")
+    stored_normalized = info.get("normalized")
+
+    if stored_model and stored_model != model_name:
+        raise ValueError(
+            f"Embeddings in {location} were created with '{stored_model}', "
+            f"but the configured model is '{model_name}'."
+        )
+
+    if stored_dimension and int(stored_dimension) != int(dimension):
+        raise ValueError(
+            f"Embedding dimension mismatch in {location}: "
+            f"stored {stored_dimension}, got {dimension}."
+        )
+
+    if backend is not None and stored_backend and stored_backend != backend:
+        raise ValueError(
+            f"Embeddings in {location} were created with the '{stored_backend}' backend "
+            f"({info.get('quantization', embedding_quantization(stored_backend))}), "
+            f"but got '{backend}' ({embedding_quantization(backend)})."
+        )
+
+    if normalized is not None and stored_normalized is not None and bool(stored_normalized) != bool(normalized):
+        raise ValueError(
+            f"Embedding normalization mismatch in {location}: "
+            f"stored normalized={bool(stored_normalized)}, got normalized={bool(normalized)}."
+        )
@@ -1,11 +1,14 @@
 import os
 import sys
+import time
 import pandas as pd
+import pyarrow.parquet as pq
 from app.core.logger import get_logger
 from app.core.config import get_settings
 from pipeline.cleaning import TextCleaner
-from pipeline.sentence_splitter import SentenceSplitter
-from pipeline.ner_extractor import NERExtractor
+from pipeline.sentence_entity_extractor import SentenceEntityExtractor
+from pipeline.metadata_store import MetadataStore
+from app.services.entity_index_service import build_entity_table, entity_table_path
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
 
@@ -14,7 +17,9 @@ settings = get_settings()
 
 
 class BatchProcessor:
-    def __init__(self, input_file_path: str, batch_name: str, output_base_dir: str, metadata_path: str, text_column: str = "body_text"):
+    def __init__(self, input_file_path: str, batch_name: str, output_base_dir: str, metadata_path: str, text_column: str = "body_text",
+                 metadata_store: MetadataStore = None, extractor: SentenceEntityExtractor = None,
+                 checkpoint_lock=None):
         self.input_file_path = input_file_path
         self.batch_name = batch_name
         self.output_base_dir = output_base_dir
@@ -24,17 +29,17 @@ class BatchProcessor:
         self.input_dir = input_file_path
         self.output_dir = self.output_base_dir
         self.checkpoint_file = os.path.join(self.output_dir, "processed_files.txt")
+        # Shared by pool workers so concurrent checkpoint appends never interleave
+        self.checkpoint_lock = checkpoint_lock
 
         self.cleaner = TextCleaner()
-        self.splitter = SentenceSplitter()
-        self.ner_extractor = NERExtractor()
+        # Models and metadata can be shared across batch files so they are only loaded once per run
+        self.extractor = extractor or SentenceEntityExtractor()
 
         os.makedirs(self.output_dir, exist_ok=True)
         self.processed_files = self._load_checkpoint()
 
-        self.metadata_df = pd.read_csv(self.metadata_path, low_memory=False)
-        self.metadata_df = self.metadata_df[['sha', 'publish_time', 'journal', 'doi', 'license', 'url']]
-        self.metadata_df.dropna(subset=['sha'], inplace=True)
+        self.metadata_store = metadata_store or MetadataStore(self.metadata_path)
 
     def _load_checkpoint(self):
         if os.path.exists(self.checkpoint_file):
@@ -46,45 +51,69 @@ class BatchProcessor:
             return set()
 
     def _update_checkpoint(self, filename):
+        if self.checkpoint_lock is None:
+            self._append_checkpoint(filename)
+            return
+
+        with self.checkpoint_lock:
+            self._append_checkpoint(filename)
+
+    def _append_checkpoint(self, filename):
         with open(self.checkpoint_file, "a") as f:
             f.write(filename + "\n")
+            f.flush()
+            os.fsync(f.fileno())
 
-    def process_file(self, file_path: str):
-        try:
-            filename = os.path.basename(file_path)
+    def process_file(self, file_path: str) -> dict:
+        """
+        Clean, split, tag and enrich one batch file.
 
+        Returns:
+            dict: File name, status (processed, skipped or failed), papers, characters and seconds.
+        """
+        filename = os.path.basename(file_path)
+        stats = {"file": filename, "status": "processed", "papers": 0, "characters": 0, "seconds": 0.0}
+        start = time.perf_counter()
+
+        try:
             if filename in self.processed_files:
                 logger.info(f"Skipping already processed file: {filename}")
-                return
+                stats["status"] = "skipped"
+                return stats
 
             logger.info(f"Processing file: {file_path}")
             df = pd.read_parquet(file_path)
+            stats["papers"] = len(df)
+            stats["characters"] = int(df[self.text_column].str.len().sum())
 
-            cleaned_texts = []
-            sentences_list = []
-            entities_list = []
+            cleaned_texts = self.cleaner.clean_batch(df[self.text_column].tolist())
 
-            for text in df[self.text_column]:
-                clean_text = self.cleaner.clean_text(text)
-                sentences = self.splitter.split_sentences(clean_text)
-                entities = self.ner_extractor.extract_entities(clean_text)
-
-                cleaned_texts.append(clean_text)
-                sentences_list.append(sentences)
-                entities_list.append(entities)
-
-            df["clean_text"] = cleaned_texts
-            df["sentences"] = sentences_list
-            df["named_entities"] = entities_list
-
-            merged_df = df.merge(
-                self.metadata_df,
-                how='left',
-                left_on='paper_id',
-                right_on='sha'
+            # One spaCy pass per text yields both sentences and entities
+            store_offsets = settings.STORE_SENTENCE_OFFSETS
+            store_entity_table = settings.STORE_ENTITY_TABLE
+            sentences_list, entities_list = self.extractor.process(
+                cleaned_texts, offsets=store_offsets, entity_offsets=store_entity_table
             )
 
-            merged_df.drop(columns=['sha'], inplace=True)
+            df["clean_text"] = cleaned_texts
+            if store_offsets:
+                # Sentences are kept as offsets into clean_text; read them with pipeline.sentence_view.get_sentences
+                df["sentence_starts"] = [starts for starts, _ in sentences_list]
+                df["sentence_ends"] = [ends for _, ends in sentences_list]
+            else:
+                df["sentences"] = sentences_list
+
+            if store_entity_table:
+                # Entities go to a columnar side table (one row per mention) instead of a tuple column
+                entity_file = entity_table_path(self.output_dir, filename)
+                os.makedirs(os.path.dirname(entity_file), exist_ok=True)
+                pq.write_table(build_entity_table(df["paper_id"].tolist(), cleaned_texts, entities_list), entity_file)
+                logger.info(f"Entity table saved to: {entity_file}")
+            else:
+                df["named_entities"] = entities_list
+
+            metadata = self.metadata_store.lookup(df['paper_id'])
+            merged_df = pd.concat([df.reset_index(drop=True), metadata], axis=1)
 
             output_file = os.path.join(self.output_dir, filename)
             merged_df.to_parquet(output_file, index=False)
@@ -94,5 +123,9 @@ class BatchProcessor:
 
         except Exception as e:
             logger.error(f"Error processing file {file_path}: {e}")
+            stats["status"] = "failed"
             self._update_checkpoint(os.path.basename(file_path))
             logger.error(f"Error processing file {file_path}: {e}")
+
+        stats["seconds"] = time.perf_counter() - start
+        return stats
@@ -1,6 +1,7 @@
 import re
 import os
 import sys
+from typing import Iterable
 from app.core.logger import get_logger
 from app.core.config import get_settings
 # Get the absolute path to the project root directory
@@ -28,6 +29,15 @@ class TextCleaner:
         self.emoji_pattern = re.compile(r'[^\x00-\x7F]+')
         self.whitespace_pattern = re.compile(r'\s+')
 
+        # Batch patterns: the same steps as clean_text, rewritten to scan less without changing the result.
+        # A lazy `.*?` retries ">" after every character, and a "<" with no ">" (e.g. "p < 0.05") rescans
+        # the rest of its line from every later "<". Matching up to the first ">" or line end in one
+        # loop, and keeping unterminated spans as they are, visits each character once.
+        self.fast_html_pattern = re.compile(r'<[^>\n]*>?')
+        # Non-ASCII runs become spaces that the whitespace pass then collapses, so one pass does both.
+        # Runs that are already a single space are left alone instead of being replaced by themselves.
+        self.space_pattern = re.compile(r' [\s\x80-\U0010FFFF]+|[\t\n\r\f\v\x1c-\x1f\x80-\U0010FFFF][\s\x80-\U0010FFFF]*')
+
     def clean_text(self, text: str) -> str:
         try:
             if not isinstance(text, str):
@@ -51,8 +61,55 @@ class TextCleaner:
             logger.error(f"[TextCleaner] Error cleaning text: {e}")
             return ""
 
-    def clean_batch(self, texts: list) -> list:
+    @staticmethod
+    def _replace_tag(match) -> str:
+        span = match.group()
+        return ' ' if span.endswith('>') else span
+
+    def _clean_fast(self, text: str) -> str:
+        # Each pass only runs when its pattern can match at all
+        if "<" in text:
+            text = self.fast_html_pattern.sub(self._replace_tag, text)
+        if "@" in text:
+            text = self.email_pattern.sub(' ', text)
+        if "http" in text or "www" in text:
+            text = self.url_pattern.sub(' ', text)
+        return self.space_pattern.sub(' ', text).strip().lower()
+
+    def clean_batch(self, texts: Iterable) -> list:
         """
-        Clean a batch of text strings.
+        Clean a batch of text strings (e.g. a full `body_text` column).
+
+        Gives exactly the same result as calling `clean_text` on each item, with the non-ASCII and
+        whitespace passes fused into one, cheaper equivalent patterns, and passes skipped for texts
+        they cannot match.
+
+        Args:
+            texts (Iterable): List or pandas Series of texts. Non-strings clean to "".
+
+        Returns:
+            list: Cleaned texts, in input order.
         """
-        return [self.clean_text(text) for text in texts]
+        cleaned = []
+        non_strings = 0
+        empty = 0
+
+        for text in texts:
+            if not isinstance(text, str):
+                non_strings += 1
+                cleaned.append("")
+                continue
+
+            try:
+                text = self._clean_fast(text)
+            except Exception as e:
+                logger.error(f"[TextCleaner] Error cleaning text: {e}")
+                text = ""
+
+            empty += text == ""
+            cleaned.append(text)
+
+        if non_strings or empty:
+            logger.warning(f"[TextCleaner] {non_strings} inputs were not strings and {empty} cleaned texts are empty.")
+
+        return cleaned
\ No newline at end of file
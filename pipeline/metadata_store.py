@@ -0,0 +1,101 @@
+import os
+import sys
+from typing import Optional
+import pandas as pd
+import pyarrow.parquet as pq
+from app.core.logger import get_logger
+from app.core.config import get_settings
+
+# Ensure project root is in system path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+logger = get_logger("MetadataStore")
+settings = get_settings()
+
+# Metadata fields joined onto every processed paper
+METADATA_COLUMNS = ['publish_time', 'journal', 'doi', 'license', 'url']
+
+# Columns of the parquet cache besides the key: CORD-19's paper identifier, then the joined fields
+CACHE_COLUMNS = ['cord_uid'] + METADATA_COLUMNS
+
+
+class MetadataStore:
+    """
+    CORD-19 `metadata.csv`, keyed by paper id and loaded once per pipeline run.
+
+    The CSV is converted once into a columnar parquet cache (rebuilt only when the CSV is newer),
+    and papers are joined with a keyed index lookup instead of a full merge per batch file.
+    Rows are keyed by every `sha` (the field can list several, separated by "; ") and by `pmcid`,
+    so both pdf_json and pmc_json paper ids resolve, and both resolve to the paper's `cord_uid`.
+
+    Attributes:
+        metadata (pd.DataFrame): cord_uid and metadata columns indexed by paper id.
+    """
+
+    def __init__(self, metadata_path: Optional[str] = None, cache_path: Optional[str] = None, load: bool = True):
+        """
+        Initialize the store, building the parquet cache if needed.
+
+        Args:
+            metadata_path (str): Path to CORD-19 `metadata.csv`. Defaults to config setting.
+            cache_path (str): Path of the parquet cache. Defaults to config setting.
+            load (bool): Load the cache into memory. False only builds (or refreshes) the cache file,
+                e.g. in a parent process whose workers each load their own store.
+        """
+        self.metadata_path = metadata_path or settings.cord19_metadata_path
+        self.cache_path = cache_path or settings.cord19_metadata_cache_path
+        self.metadata = None
+
+        if not self._cache_is_fresh():
+            self._build_cache()
+
+        if load:
+            self.metadata = pd.read_parquet(self.cache_path).set_index("paper_key")
+            logger.info(f"[MetadataStore] Loaded metadata for {len(self.metadata)} paper ids from {self.cache_path}")
+
+    def _cache_is_fresh(self) -> bool:
+        if not os.path.exists(self.cache_path):
+            return False
+        if not set(CACHE_COLUMNS) <= set(pq.read_schema(self.cache_path).names):
+            return False  # Written before a column was added
+        if not os.path.exists(self.metadata_path):
+            return True
+        return os.path.getmtime(self.cache_path) >= os.path.getmtime(self.metadata_path)
+
+    def _build_cache(self) -> None:
+        logger.info(f"[MetadataStore] Building metadata cache from {self.metadata_path}")
+        df = pd.read_csv(self.metadata_path, usecols=['sha', 'pmcid'] + CACHE_COLUMNS,
+                         dtype=str, low_memory=False)
+
+        by_sha = df.dropna(subset=['sha']).assign(paper_key=lambda d: d['sha'].str.split(';')).explode('paper_key')
+        by_pmcid = df.dropna(subset=['pmcid']).assign(paper_key=lambda d: d['pmcid'])
+
+        keyed = pd.concat([by_sha, by_pmcid], ignore_index=True)
+        keyed['paper_key'] = keyed['paper_key'].str.strip()
+        keyed = keyed[keyed['paper_key'] != ""].drop_duplicates(subset=['paper_key'], keep='first')
+
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        tmp_path = self.cache_path + ".tmp"
+        keyed[['paper_key'] + CACHE_COLUMNS].to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, self.cache_path)
+        logger.info(f"[MetadataStore] Metadata cache written with {len(keyed)} keys to {self.cache_path}")
+
+    def lookup(self, paper_ids: pd.Series) -> pd.DataFrame:
+        """
+        Fetch metadata rows aligned with `paper_ids` (missing ids give empty values).
+
+        Args:
+            paper_ids (pd.Series): Paper ids to look up.
+
+        Returns:
+            pd.DataFrame: One row of metadata columns per paper id, in the same order.
+        """
+        return self.metadata.reindex(paper_ids.to_numpy())[METADATA_COLUMNS].reset_index(drop=True)
+
+    def cord_uids(self, paper_ids: pd.Series) -> pd.Series:
+        """
+        CORD-19 `cord_uid` of each paper id (a sha or a PMCID), aligned with `paper_ids` (NaN when unknown).
+
+        The pdf_json and pmc_json parses of one paper have different paper ids but the same cord_uid.
+        """
+        return self.metadata["cord_uid"].reindex(paper_ids.to_numpy()).reset_index(drop=True)
@@ -0,0 +1,104 @@
+import os
+import sys
+from typing import List, Optional, Tuple
+import spacy
+from app.core.logger import get_logger
+from app.core.config import get_settings
+from pipeline.sentence_view import sentence_spans
+
+# Ensure project root is in system path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+logger = get_logger("SentenceEntityExtractor")
+settings = get_settings()
+
+
+class SentenceEntityExtractor:
+    """
+    Splits sentences and extracts named entities in a single batched spaCy pass.
+
+    Produces the same output as SentenceSplitter.split_sentences and NERExtractor.extract_entities,
+    but parses each text once with `nlp.pipe` and disables the components neither output needs.
+
+    Attributes:
+        nlp: Preloaded spaCy language model with only tok2vec, parser and ner active.
+    """
+
+    # Sentence boundaries come from the parser and entities from ner; these feed neither
+    UNUSED_COMPONENTS = ("tagger", "attribute_ruler", "lemmatizer")
+
+    def __init__(self, model_name: Optional[str] = None, batch_size: Optional[int] = None,
+                 n_process: Optional[int] = None):
+        """
+        Initialize the extractor with a specified spaCy model.
+
+        Args:
+            model_name (str): Name of the spaCy model to load. Defaults to config setting.
+            batch_size (int): Texts per `nlp.pipe` batch. Defaults to config setting.
+            n_process (int): Processes used by `nlp.pipe`. Defaults to config setting.
+        """
+        model_name = model_name or settings.SPACY_MODEL_NAME
+        self.batch_size = batch_size or settings.NLP_PIPE_BATCH_SIZE
+        self.n_process = n_process or settings.NLP_PIPE_N_PROCESS
+
+        try:
+            logger.info(f"[SentenceEntityExtractor] Loading spaCy model: {model_name}")
+            self.nlp = spacy.load(model_name)
+            for name in self.UNUSED_COMPONENTS:
+                if name in self.nlp.pipe_names:
+                    self.nlp.disable_pipe(name)
+            logger.info(f"[SentenceEntityExtractor] Active components: {self.nlp.pipe_names}")
+        except Exception as e:
+            logger.error(f"[SentenceEntityExtractor] Error loading spaCy model: {e}")
+            raise RuntimeError(f"Failed to load spaCy model: {model_name}") from e
+
+    @staticmethod
+    def _from_doc(doc, offsets: bool = False, entity_offsets: bool = False):
+        if offsets:
+            sentences = sentence_spans(doc.text, doc.sents)
+        else:
+            sentences = [sent.text.strip() for sent in doc.sents if sent.text.strip()]
+        if entity_offsets:
+            entities = [(ent.start_char, ent.end_char, ent.label_) for ent in doc.ents]
+        else:
+            entities = [(ent.text, ent.label_) for ent in doc.ents]
+        return sentences, entities
+
+    def _process_one(self, text: str, offsets: bool = False, entity_offsets: bool = False):
+        try:
+            return self._from_doc(self.nlp(text), offsets, entity_offsets)
+        except Exception as e:
+            logger.error(f"[SentenceEntityExtractor] Error processing text: {e}")
+            return sentence_spans(text, []) if offsets else [], []
+
+    def process(self, texts: List[str], offsets: bool = False,
+                entity_offsets: bool = False) -> Tuple[list, List[list]]:
+        """
+        Split sentences and extract entities for a batch of cleaned texts.
+
+        Args:
+            texts (List[str]): Cleaned input texts.
+            offsets (bool): Return each text's sentences as int32 (starts, ends) offset arrays
+                into the text instead of as strings.
+            entity_offsets (bool): Return entities as (start, end, label) spans instead of (text, label).
+
+        Returns:
+            Tuple[list, List[list]]: Sentences (strings or offsets) and entities per text.
+        """
+        texts = [text if isinstance(text, str) else "" for text in texts]
+        sentences_list = []
+        entities_list = []
+
+        try:
+            for doc in self.nlp.pipe(texts, batch_size=self.batch_size, n_process=self.n_process):
+                sentences, entities = self._from_doc(doc, offsets, entity_offsets)
+                sentences_list.append(sentences)
+                entities_list.append(entities)
+            return sentences_list, entities_list
+
+        except Exception as e:
+            # One bad text (e.g. longer than nlp.max_length) fails the whole batch; isolate it
+            logger.error(f"[SentenceEntityExtractor] Batch failed, retrying text by text: {e}")
+
+        results = [self._process_one(text, offsets, entity_offsets) for text in texts]
+        return [sentences for sentences, _ in results], [entities for _, entities in results]
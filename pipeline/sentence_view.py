@@ -0,0 +1,97 @@
+import os
+import sys
+from collections.abc import Sequence
+from typing import List, Tuple
+import numpy as np
+import pandas as pd
+
+# Ensure project root is in system path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+
+def sentence_spans(text: str, sents) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Character offsets into `text` of each non-empty, stripped sentence.
+
+    `text[start:end]` equals `sent.text.strip()` for every sentence SentenceSplitter would keep.
+
+    Args:
+        text (str): The text the sentences were split from.
+        sents: Iterable of spaCy sentence spans (e.g. `doc.sents`).
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: int32 start and end offsets.
+    """
+    starts, ends = [], []
+    for sent in sents:
+        span = text[sent.start_char:sent.end_char]
+        stripped = span.strip()
+        if not stripped:
+            continue
+        start = sent.start_char + len(span) - len(span.lstrip())
+        starts.append(start)
+        ends.append(start + len(stripped))
+    return np.asarray(starts, dtype=np.int32), np.asarray(ends, dtype=np.int32)
+
+
+class SentenceView(Sequence):
+    """
+    Read-only list of sentences backed by (start, end) offsets into the cleaned text.
+
+    Sentence strings are only sliced out of `text` when indexed or iterated, so a row
+    keeps one copy of its text instead of two.
+    """
+
+    __slots__ = ("text", "starts", "ends")
+
+    def __init__(self, text: str, starts, ends):
+        self.text = text if isinstance(text, str) else ""
+        self.starts = starts
+        self.ends = ends
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return self.text[self.starts[index]:self.ends[index]]
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (Sequence, np.ndarray)) and not isinstance(other, str):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"SentenceView({len(self)} sentences)"
+
+    def to_list(self) -> List[str]:
+        return list(self)
+
+
+def get_sentences(df: pd.DataFrame, text_column: str = "clean_text") -> pd.Series:
+    """
+    Sentences of every row of an enriched batch, whichever way they were stored.
+
+    Files written with STORE_SENTENCE_OFFSETS hold `sentence_starts`/`sentence_ends` and get lazy
+    SentenceView objects; older files hold a `sentences` column of strings, returned unchanged.
+
+    Args:
+        df (pd.DataFrame): Enriched batch DataFrame.
+        text_column (str): Column the offsets point into.
+
+    Returns:
+        pd.Series: One sequence of sentence strings per row.
+    """
+    if "sentences" in df.columns:
+        return df["sentences"]
+
+    if "sentence_starts" not in df.columns:
+        raise KeyError("DataFrame has neither a 'sentences' column nor sentence offsets.")
+
+    return pd.Series(
+        [SentenceView(text, starts, ends)
+         for text, starts, ends in zip(df[text_column], df["sentence_starts"], df["sentence_ends"])],
+        index=df.index,
+        name="sentences"
+    )
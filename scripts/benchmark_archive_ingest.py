@@ -0,0 +1,83 @@
+import os
+import sys
+import argparse
+import itertools
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.core.config import get_settings
+from app.core.logger import get_logger
+from app.services.archive_service import iter_archive_members
+from app.services.text_extraction_service import load_json_file, load_json_bytes, extract_sections
+from scripts.benchmark_utils import ResultTable, rate, timed
+
+settings = get_settings()
+logger = get_logger("ArchiveIngestBenchmark")
+
+
+def iter_json_files(sources):
+    """
+    Yield (path, source) for every JSON paper in the unpacked folders of `sources`.
+    """
+    for source in sources:
+        dir_path = os.path.join(settings.cord19_extracted_path, source)
+        if not os.path.exists(dir_path):
+            logger.warning(f"Directory not found: {dir_path}")
+            continue
+
+        for root, _, files in os.walk(dir_path):
+            for file in files:
+                if file.endswith(".json"):
+                    yield os.path.join(root, file), source
+
+
+def benchmark_directory(sources, limit: int) -> dict:
+    """
+    Read + extract papers from the unpacked JSON folders.
+    """
+    stats = {"files": 0, "bytes": 0}
+
+    def run():
+        for file_path, source in itertools.islice(iter_json_files(sources), limit):
+            stats["bytes"] += os.path.getsize(file_path)
+            extract_sections(load_json_file(file_path) or {}, source)
+            stats["files"] += 1
+
+    _, stats["seconds"] = timed(run)
+    return stats
+
+
+def benchmark_archive(sources, limit: int, archive_path: str = None) -> dict:
+    """
+    Stream + extract papers straight out of the compressed release.
+    """
+    stats = {}
+
+    def run():
+        members = iter_archive_members(archive_path, sources, stats=stats)
+        for key, source, _, _, raw in members:
+            extract_sections(load_json_bytes(raw, key) or {}, source)
+            if stats["files"] >= limit:
+                break
+        members.close()
+
+    _, stats["seconds"] = timed(run)
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare archive streaming against unpacked-directory extraction")
+    parser.add_argument("--sources", nargs="+", default=["pdf_json", "pmc_json"])
+    parser.add_argument("--limit", type=int, default=5000, help="Papers to read in each mode")
+    parser.add_argument("--archive", type=str, default=None, help="Path to the CORD-19 .tar.gz release")
+    args = parser.parse_args()
+
+    directory_stats = benchmark_directory(args.sources, args.limit)
+    archive_stats = benchmark_archive(args.sources, args.limit, args.archive)
+
+    table = ResultTable(("mode", 12), ("files", 8, "d"), ("MB", 10, ".1f"), ("seconds", 10, ".2f"),
+                        ("files/sec", 12, ".1f"), ("MB/sec", 10, ".1f"))
+    table.print_header()
+    for label, stats in (("directory", directory_stats), ("archive", archive_stats)):
+        table.print_row(label, int(stats["files"]), stats["bytes"] / 1e6, stats["seconds"],
+                        rate(stats["files"], stats["seconds"]), rate(stats["bytes"] / 1e6, stats["seconds"]))
@@ -0,0 +1,63 @@
+import os
+import sys
+import argparse
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pandas as pd
+from app.core.config import get_settings
+from app.core.logger import get_logger
+from app.services.chunking_service import ChunkingService
+from pipeline.sentence_view import get_sentences
+from scripts.benchmark_utils import ResultTable, parquet_files, rate, timed
+
+settings = get_settings()
+logger = get_logger("ChunkingBenchmark")
+
+
+def load_papers(batch_dir: str, limit: int) -> pd.DataFrame:
+    """
+    Load up to `limit` enriched NLP batch files (clean_text plus sentences or sentence offsets).
+    """
+    batch_files = parquet_files(batch_dir)[:limit]
+    return pd.concat((pd.read_parquet(f) for f in batch_files), ignore_index=True)
+
+
+RESULTS = ResultTable(("chunker", 12), ("chunks", 10, "d"), ("chunks/sec", 14, ".0f"),
+                      ("papers/sec", 14, ".1f"), ("mean words", 12, ".1f"), ("max words", 11, "d"))
+
+
+def run(label: str, chunker, papers: pd.DataFrame) -> None:
+    chunks, seconds = timed(lambda: [chunk for paper_chunks in chunker(papers) for chunk in paper_chunks])
+
+    words = [len(chunk.split()) for chunk in chunks] or [0]
+    RESULTS.print_row(label, len(chunks), rate(len(chunks), seconds), rate(len(papers), seconds),
+                      sum(words) / len(words), max(words))
+
+
+def benchmark(batch_dir: str, limit: int, chunk_size: int):
+    papers = load_papers(batch_dir, limit)
+    if papers.empty:
+        print("No papers found.")
+        return
+
+    word_chunker = ChunkingService(chunk_size=chunk_size, mode="words")
+    sentence_chunker = ChunkingService(chunk_size=chunk_size, mode="sentences")
+
+    print(f"Sample: {len(papers)} papers | chunk size: {chunk_size} words | "
+          f"sentence overlap: {settings.CHUNK_SENTENCE_OVERLAP}, word overlap: {settings.CHUNK_OVERLAP}")
+    RESULTS.print_header()
+
+    # Both chunkers work on the same cleaned text the sentences point into
+    run("words", lambda df: word_chunker.chunk_texts(df["clean_text"].tolist()), papers)
+    run("sentences", lambda df: [sentence_chunker.pack_sentences(s) for s in get_sentences(df)], papers)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare sentence-packing and word-window chunking")
+    parser.add_argument("--batch-dir", type=str, default=settings.input_for_embedding)
+    parser.add_argument("--limit", type=int, default=2, help="NLP batch files to read")
+    parser.add_argument("--chunk-size", type=int, default=settings.CHUNK_SIZE, help="Words per chunk")
+    args = parser.parse_args()
+
+    benchmark(args.batch_dir, args.limit, args.chunk_size)
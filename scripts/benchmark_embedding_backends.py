@@ -0,0 +1,69 @@
+import os
+import sys
+import argparse
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.core.config import get_settings
+from app.core.logger import get_logger
+from app.services.embedding_service import EmbeddingService
+from scripts.benchmark_utils import ResultTable, load_sample_chunks, rate, timed
+
+settings = get_settings()
+logger = get_logger("EmbeddingBackendBenchmark")
+
+BACKENDS = ["torch", "onnx", "onnx-int8"]
+
+
+def encode_timed(service: EmbeddingService, texts, batch_size: int):
+    # Warm-up call so one-off graph/kernel initialization is not timed
+    service.model.encode(texts[:batch_size], batch_size=batch_size, normalize_embeddings=True)
+
+    vectors, seconds = timed(lambda: service.model.encode(texts, batch_size=batch_size, show_progress_bar=False,
+                                                          normalize_embeddings=True))
+    return np.asarray(vectors, dtype=np.float32), seconds
+
+
+def benchmark(input_path: str, limit: int, offset: int, batch_size: int, backends, threads: int):
+    # Held-out sample: skip the first `offset` chunks (e.g. those used to pick settings)
+    texts = load_sample_chunks(input_path, offset + limit)[offset:]
+    if not texts:
+        print("No sample chunks found.")
+        return
+
+    if threads:
+        import torch
+        torch.set_num_threads(threads)
+
+    print(f"Sample: {len(texts)} chunks | batch: {batch_size} | model: {settings.EMBEDDING_MODEL_NAME}")
+    table = ResultTable(("backend", 12), ("seconds", 10, ".2f"), ("chunks/sec", 12, ".1f"),
+                        ("speedup", 10, ".2f"), ("mean cos", 10, ".4f"), ("min cos", 10, ".4f"))
+    table.print_header()
+
+    reference = reference_seconds = None
+    for backend in ["torch"] + [b for b in backends if b != "torch"]:
+        service = EmbeddingService(backend=backend, num_threads=threads or None)
+        vectors, seconds = encode_timed(service, texts, batch_size)
+
+        # Agreement with fp32 torch: cosine between each chunk's two (unit-length) vectors
+        if reference is None:
+            reference, reference_seconds = vectors, seconds
+        cosine = np.einsum("ij,ij->i", vectors, reference)
+
+        table.print_row(backend, seconds, rate(len(texts), seconds), reference_seconds / seconds,
+                        cosine.mean(), cosine.min())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare throughput and fp32 agreement of embedding backends")
+    parser.add_argument("--input", type=str, default=settings.embedding_output_path,
+                        help="Chunk parquet file or directory of chunk/embedding batches")
+    parser.add_argument("--limit", type=int, default=1000, help="Held-out chunks to encode per backend")
+    parser.add_argument("--offset", type=int, default=0, help="Chunks to skip before the held-out sample")
+    parser.add_argument("--batch-size", type=int, default=settings.EMBEDDING_ENCODE_BATCH_SIZE)
+    parser.add_argument("--backends", nargs="+", default=BACKENDS, choices=BACKENDS)
+    parser.add_argument("--threads", type=int, default=0, help="Threads per backend (0 = library default)")
+    args = parser.parse_args()
+
+    benchmark(args.input, args.limit, args.offset, args.batch_size, args.backends, args.threads)
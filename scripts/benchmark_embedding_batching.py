@@ -0,0 +1,85 @@
+import os
+import sys
+import argparse
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.core.config import get_settings
+from app.core.logger import get_logger
+from app.services.embedding_service import EmbeddingService, padded_tokens
+from scripts.benchmark_utils import ResultTable, load_sample_chunks, rate, timed
+
+settings = get_settings()
+logger = get_logger("EmbeddingBatchingBenchmark")
+
+
+def encode_dataframe_order(service: EmbeddingService, window):
+    vectors = [service.model.encode(window[i:i + service.encode_batch_size], batch_size=service.encode_batch_size,
+                                    show_progress_bar=False, normalize_embeddings=True)
+               for i in range(0, len(window), service.encode_batch_size)]
+    return np.vstack(vectors)
+
+
+def encode_current(service: EmbeddingService, window):
+    # sentence-transformers sorts each encode() call by character length internally
+    return service.model.encode(window, batch_size=service.encode_batch_size,
+                                show_progress_bar=False, normalize_embeddings=True)
+
+
+def padding_ratio(service: EmbeddingService, texts, window_size: int, mode: str) -> float:
+    tokens = padded = 0
+    for i in range(0, len(texts), window_size):
+        window = texts[i:i + window_size]
+        lengths = service.token_lengths(window)
+        if mode == "token buckets":
+            lengths = lengths[np.argsort(lengths, kind="stable")]
+        elif mode == "current":
+            lengths = lengths[np.argsort([-len(text) for text in window], kind="stable")]
+        tokens += int(lengths.sum())
+        padded += padded_tokens(lengths, service.encode_batch_size)
+    return 1 - tokens / padded if padded else 0.0
+
+
+def benchmark(input_path: str, limit: int, window_size: int):
+    texts = load_sample_chunks(input_path, limit)
+    if not texts:
+        print("No sample chunks found.")
+        return
+
+    service = EmbeddingService(length_bucketing=True)
+    service.cache = None  # Measure encoding only
+
+    modes = {
+        "dataframe order": lambda window: encode_dataframe_order(service, window),
+        "current": lambda window: encode_current(service, window),
+        "token buckets": service._encode_bucketed,
+    }
+
+    print(f"Sample: {len(texts)} chunks | window: {window_size} | encode batch: {service.encode_batch_size} | "
+          f"model: {service.model_name}")
+    table = ResultTable(("mode", 18), ("padding", 10, ".1%"), ("seconds", 10, ".2f"),
+                        ("chunks/sec", 12, ".1f"), ("max |diff|", 12, ".2e"))
+    table.print_header()
+
+    reference = None
+    for mode, encode in modes.items():
+        vectors, seconds = timed(
+            lambda: np.vstack([encode(texts[i:i + window_size]) for i in range(0, len(texts), window_size)])
+        )
+
+        # Every mode must return the same vectors in the same order
+        reference = vectors if reference is None else reference
+        table.print_row(mode, padding_ratio(service, texts, window_size, mode), seconds,
+                        rate(len(texts), seconds), float(np.abs(vectors - reference).max()))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare padding and throughput of embedding batch orders")
+    parser.add_argument("--input", type=str, default=settings.embedding_output_path,
+                        help="Chunk parquet file or directory of chunk/embedding batches")
+    parser.add_argument("--limit", type=int, default=2000, help="Chunks to encode in each mode")
+    parser.add_argument("--window", type=int, default=1000, help="Chunks per processing window")
+    args = parser.parse_args()
+
+    benchmark(args.input, args.limit, args.window)
@@ -0,0 +1,89 @@
+import os
+import sys
+import argparse
+import statistics
+import tracemalloc
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.core.config import get_settings
+from app.core.logger import get_logger
+from app.services.text_extraction_service import load_json_file, extract_sections, json_backend
+from scripts.benchmark_utils import ResultTable, timed
+
+settings = get_settings()
+logger = get_logger("JSONDecodeBenchmark")
+
+
+def collect_sample_files(sources, limit: int):
+    """
+    Collect up to `limit` JSON files per source from the extracted CORD-19 folders.
+    """
+    files = []
+    for source in sources:
+        dir_path = os.path.join(settings.cord19_extracted_path, source)
+        if not os.path.exists(dir_path):
+            logger.warning(f"Directory not found: {dir_path}")
+            continue
+
+        source_files = []
+        for root, _, names in os.walk(dir_path):
+            source_files.extend(os.path.join(root, name) for name in names if name.endswith(".json"))
+            if len(source_files) >= limit:
+                break
+        files.extend((path, source) for path in sorted(source_files)[:limit])
+    return files
+
+
+def measure(files, fast: bool):
+    """
+    Time each file's parse + extraction, then measure its peak traced memory in a separate pass.
+    """
+    timings = [
+        timed(lambda: extract_sections(load_json_file(path, fast=fast) or {}, source))[1]
+        for path, source in files
+    ]
+
+    peaks = []
+    for path, source in files:
+        tracemalloc.start()
+        extract_sections(load_json_file(path, fast=fast) or {}, source)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+    return timings, peaks
+
+
+def benchmark(sources, limit: int):
+    files = collect_sample_files(sources, limit)
+    if not files:
+        print("No sample files found.")
+        return
+
+    # Both paths must produce identical records before their speed is compared
+    mismatches = sum(
+        1 for path, source in files
+        if extract_sections(load_json_file(path, fast=False) or {}, source)
+        != extract_sections(load_json_file(path, fast=True) or {}, source)
+    )
+
+    print(f"Sample: {len(files)} files | JSON backend: {json_backend()} ({settings.JSON_BACKEND}) | "
+          f"skip reference sections: {settings.JSON_SKIP_REFERENCE_SECTIONS}")
+    print(f"Records differing between paths: {mismatches}")
+    table = ResultTable(("path", 10), ("mean ms", 10, ".2f"), ("median ms", 12, ".2f"),
+                        ("mean peak KB", 15, ".1f"), ("max peak KB", 14, ".1f"))
+    table.print_header()
+
+    for label, fast in (("current", False), ("fast", True)):
+        timings, peaks = measure(files, fast)
+        table.print_row(label, statistics.mean(timings) * 1000, statistics.median(timings) * 1000,
+                        statistics.mean(peaks) / 1024, max(peaks) / 1024)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare CORD-19 JSON decoding paths")
+    parser.add_argument("--sources", nargs="+", default=["pdf_json", "pmc_json"])
+    parser.add_argument("--limit", type=int, default=200, help="Sample files per source")
+    args = parser.parse_args()
+
+    benchmark(args.sources, args.limit)
@@ -0,0 +1,74 @@
+import os
+import sys
+import argparse
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pyarrow.parquet as pq
+from app.core.config import get_settings
+from app.core.logger import get_logger
+from pipeline.cleaning import TextCleaner
+from scripts.benchmark_utils import ResultTable, parquet_files, rate, timed
+
+settings = get_settings()
+logger = get_logger("TextCleaningBenchmark")
+
+
+def load_column(batch_dir: str, column: str, limit: int) -> list:
+    """
+    Read the text column of up to `limit` extracted batch files.
+    """
+    texts = []
+    for path in parquet_files(batch_dir, prefix="batch_")[:limit]:
+        texts.extend(pq.read_table(path, columns=[column]).column(column).to_pylist())
+    return texts
+
+
+def benchmark(batch_dir: str, column: str, limit: int, repeats: int):
+    texts = load_column(batch_dir, column, limit)
+    if not texts:
+        print("No texts found.")
+        return
+
+    megabytes = sum(len(t.encode("utf-8")) for t in texts if isinstance(t, str)) / 1e6
+    cleaner = TextCleaner()
+
+    # The batch path skips the HTML, email and URL passes on texts that cannot match them,
+    # so its gain depends on how often these markers occur in the corpus
+    strings = [t for t in texts if isinstance(t, str)]
+    prefilters = (
+        ("html '<'", lambda t: "<" in t),
+        ("email '@'", lambda t: "@" in t),
+        ("url 'http'/'www'", lambda t: "http" in t or "www" in t),
+    )
+    for label, matches in prefilters:
+        hits = sum(1 for t in strings if matches(t))
+        print(f"Texts running the {label} pass: {hits} of {len(strings)} ({hits / max(len(strings), 1):.1%})")
+
+    modes = (
+        ("per-text", lambda: [cleaner.clean_text(t) for t in texts]),
+        ("batch", lambda: cleaner.clean_batch(texts)),
+    )
+
+    results = {}
+    print(f"Sample: {len(texts)} texts, {megabytes:.1f} MB of {column}")
+    table = ResultTable(("mode", 10), ("best s", 10, ".2f"), ("MB/sec", 10, ".1f"))
+    table.print_header()
+    for label, run in modes:
+        results[label], best = timed(run, repeats=repeats)
+        table.print_row(label, best, rate(megabytes, best))
+
+    # Batch cleaning must be byte-identical to the per-text cleaner
+    mismatches = sum(1 for a, b in zip(results["per-text"], results["batch"]) if a != b)
+    print(f"Texts differing between modes: {mismatches}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare per-text and batch text cleaning throughput")
+    parser.add_argument("--batch-dir", type=str, default=settings.extracted_parquet_path)
+    parser.add_argument("--column", type=str, default="body_text")
+    parser.add_argument("--limit", type=int, default=2, help="Batch files to read")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    benchmark(args.batch_dir, args.column, args.limit, args.repeats)
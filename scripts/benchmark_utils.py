@@ -0,0 +1,84 @@
+import os
+import sys
+import time
+from typing import Any, Callable, List, Tuple
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pyarrow.parquet as pq
+
+
+def timed(fn: Callable[[], Any], repeats: int = 1) -> Tuple[Any, float]:
+    """
+    Run `fn` `repeats` times.
+
+    Returns:
+        Tuple[Any, float]: The result of the last run and the best wall-clock time in seconds.
+    """
+    result, best = None, float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def rate(count: float, seconds: float) -> float:
+    """
+    Items per second, NaN when nothing was timed.
+    """
+    return count / seconds if seconds else float("nan")
+
+
+class ResultTable:
+    """
+    Fixed-width results table: a left-aligned label column followed by right-aligned value columns.
+
+    Args:
+        label (Tuple[str, int]): Header and width of the label column.
+        columns (Tuple[str, int, str]): Header, width and format spec (e.g. ".2f") of each value column.
+    """
+
+    def __init__(self, label: Tuple[str, int], *columns: Tuple[str, int, str]):
+        self.label = label
+        self.columns = columns
+
+    def print_header(self) -> None:
+        header, width = self.label
+        print(f"{header:<{width}}" + "".join(f"{name:>{col_width}}" for name, col_width, _ in self.columns))
+
+    def print_row(self, label: str, *values) -> None:
+        _, width = self.label
+        print(f"{label:<{width}}" + "".join(
+            f"{value:>{col_width}{spec}}" for value, (_, col_width, spec) in zip(values, self.columns)
+        ))
+
+
+def parquet_files(path: str, prefix: str = "") -> List[str]:
+    """
+    The parquet file at `path`, or the parquet files in directory `path` (optionally only those
+    starting with `prefix`), with batch files in batch-number order.
+    """
+    if not os.path.isdir(path):
+        return [path]
+
+    names = [f for f in os.listdir(path) if f.startswith(prefix) and f.endswith(".parquet")]
+
+    def order(name: str):
+        stem = name[:-len(".parquet")]
+        number = stem.rsplit("_", 1)[-1]
+        return (stem.rsplit("_", 1)[0], int(number)) if number.isdigit() else (stem, -1)
+
+    return [os.path.join(path, f) for f in sorted(names, key=order)]
+
+
+def load_sample_chunks(input_path: str, limit: int) -> List[str]:
+    """
+    Read up to `limit` chunk texts from a chunk/embedding parquet file or a directory of batches.
+    """
+    texts = []
+    for path in parquet_files(input_path):
+        texts.extend(text for text in pq.read_table(path, columns=["chunk_text"]).column("chunk_text").to_pylist() if text)
+        if len(texts) >= limit:
+            break
+    return texts[:limit]
@@ -0,0 +1,26 @@
+import sys
+import os
+from app.services.entity_index_service import EntityIndex
+from app.core.config import get_settings
+from app.core.logger import get_logger
+
+# Get the absolute path to the project root directory
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+settings = get_settings()
+logger = get_logger("EntityIndexBuilder")
+
+def building_of_entity_index():
+    try:
+        entity_index = EntityIndex.build(
+            entity_dir=os.path.join(settings.input_for_embedding, "entities"),  # Written by the NLP pipeline
+            chunk_dir=settings.input_chroma_data                                 # Chunks that went into FAISS
+        )
+        entity_index.save(settings.entity_index_path)
+
+    except Exception as e:
+        logger.exception(f"Error occurred: {str(e)}")
+        print(f"Error occurred: {str(e)}")
+
+if __name__ == "__main__":
+    building_of_entity_index()
@@ -1,13 +1,21 @@
 import os
 import sys
+import time
+import multiprocessing as mp
+from typing import Dict, List
 from app.core.config import get_settings
 from app.core.logger import get_logger
 from pipeline.batch_processor import BatchProcessor
+from pipeline.metadata_store import MetadataStore
+from pipeline.sentence_entity_extractor import SentenceEntityExtractor
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
 
 logger = get_logger("BatchRunner")
 
+# Per-worker models, loaded once by the pool initializer
+_worker_state: Dict = {}
+
 def get_batch_files(parquet_path: str):
     """
     Retrieve a list of batch files from the provided base directory.
@@ -25,9 +33,75 @@ def get_batch_files(parquet_path: str):
 
     return batch_files
 
-def nlp_pipeline():
+def _init_worker(metadata_path: str, output_base_dir: str, checkpoint_lock) -> None:
+    """
+    Pool initializer: load the metadata store and spaCy model once per worker.
+    """
+    _worker_state["metadata_path"] = metadata_path
+    _worker_state["output_base_dir"] = output_base_dir
+    _worker_state["checkpoint_lock"] = checkpoint_lock
+    _worker_state["metadata_store"] = MetadataStore(metadata_path)
+    # Workers already run in parallel; nlp.pipe must not start its own processes inside them
+    _worker_state["extractor"] = SentenceEntityExtractor(n_process=1)
+
+
+def _process_batch_file(batch_file: str) -> dict:
+    """
+    Process one batch file with the models held by the current process.
+    """
+    logger.info(f"Starting processing for batch file: {batch_file}")
+
+    try:
+        processor = BatchProcessor(
+            input_file_path=batch_file,
+            output_base_dir=_worker_state["output_base_dir"],
+            batch_name=os.path.basename(batch_file),
+            metadata_path=_worker_state["metadata_path"],
+            metadata_store=_worker_state["metadata_store"],
+            extractor=_worker_state["extractor"],
+            checkpoint_lock=_worker_state["checkpoint_lock"]
+        )
+        stats = processor.process_file(batch_file)
+        logger.info(f"Batch file {batch_file} processing completed successfully.\n")
+        return stats
+
+    except Exception as e:
+        logger.error(f"Error processing batch file {batch_file}: {e}")
+        return {"file": os.path.basename(batch_file), "status": "failed", "papers": 0, "characters": 0, "seconds": 0.0}
+
+
+def log_throughput_summary(file_stats: List[dict], wall_seconds: float, workers: int) -> None:
+    """
+    Log per-file and total throughput of a pipeline run.
+    """
+    for stats in sorted(file_stats, key=lambda s: s["file"]):
+        rate = stats["papers"] / stats["seconds"] if stats["seconds"] else 0.0
+        logger.info(f"{stats['file']}: {stats['status']}, {stats['papers']} papers, "
+                    f"{stats['characters'] / 1e6:.1f}M chars in {stats['seconds']:.1f}s ({rate:.1f} papers/sec)")
+
+    processed = [s for s in file_stats if s["status"] == "processed"]
+    papers = sum(s["papers"] for s in processed)
+    characters = sum(s["characters"] for s in processed)
+    busy_seconds = sum(s["seconds"] for s in file_stats)
+
+    logger.info(
+        f"Processed {len(processed)}/{len(file_stats)} files "
+        f"({sum(s['status'] == 'skipped' for s in file_stats)} skipped, "
+        f"{sum(s['status'] == 'failed' for s in file_stats)} failed) with {workers} worker(s): "
+        f"{papers} papers, {characters / 1e6:.1f}M chars in {wall_seconds:.1f}s "
+        f"({papers / wall_seconds if wall_seconds else 0.0:.1f} papers/sec, "
+        f"{characters / 1e6 / wall_seconds if wall_seconds else 0.0:.2f}M chars/sec, "
+        f"parallel efficiency {busy_seconds / (wall_seconds * workers) if wall_seconds else 0.0:.0%})"
+    )
+
+
+def nlp_pipeline(workers: int = None):
     """
     Executes the complete NLP processing pipeline across all batch files.
+
+    Args:
+        workers (int): Batch files processed in parallel. 1 runs serially in this process,
+            0 uses all cores. Defaults to config setting.
     """
     try:
         settings = get_settings()
@@ -36,30 +110,41 @@ def nlp_pipeline():
         output_base_dir = settings.input_for_embedding  # Output directory from config.py
         metadata_path = settings.cord19_metadata_path
 
-        batch_files = get_batch_files(input_base_dir)
+        batch_files = sorted(get_batch_files(input_base_dir))
 
         if not batch_files:
             logger.warning("No batch files found to process. Exiting pipeline.")
             return
 
-        for batch_file in batch_files:
-            logger.info(f"Starting processing for batch file: {batch_file}")
-            input_file_path = batch_file  # Full path already
-
-            try:
-                processor = BatchProcessor(
-                    input_file_path=input_file_path,
-                    output_base_dir=output_base_dir,
-                    batch_name=os.path.basename(batch_file),
-                    metadata_path=metadata_path
-                )
-                processor.process_file(batch_file)
-                logger.info(f"Batch file {batch_file} processing completed successfully.\n")
-
-            except Exception as e:
-                logger.error(f"Error processing batch file {batch_file}: {e}")
-                continue
-
+        workers = settings.NLP_POOL_WORKERS if workers is None else workers
+        workers = min(workers or os.cpu_count() or 1, len(batch_files))
+
+        os.makedirs(output_base_dir, exist_ok=True)
+
+        start = time.perf_counter()
+
+        if workers <= 1:
+            # Load metadata and the spaCy model once and share them across all batch files
+            _worker_state.update(
+                metadata_path=metadata_path,
+                output_base_dir=output_base_dir,
+                checkpoint_lock=None,
+                metadata_store=MetadataStore(metadata_path),
+                extractor=SentenceEntityExtractor()
+            )
+            file_stats = [_process_batch_file(batch_file) for batch_file in batch_files]
+        else:
+            # Build the metadata cache up front so workers only ever read it; each worker loads
+            # its own copy, so the parent does not keep one in memory for the whole run
+            MetadataStore(metadata_path, load=False)
+            logger.info(f"Processing {len(batch_files)} batch files with {workers} workers")
+            checkpoint_lock = mp.Lock()
+            with mp.Pool(workers, initializer=_init_worker,
+                         initargs=(metadata_path, output_base_dir, checkpoint_lock)) as pool:
+                # Workers pull the next file from the shared task queue as soon as they finish one
+                file_stats = list(pool.imap_unordered(_process_batch_file, batch_files, chunksize=1))
+
+        log_throughput_summary(file_stats, time.perf_counter() - start, workers)
         logger.info("All batch files processed successfully.")
 
     except Exception as e:
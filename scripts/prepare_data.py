@@ -3,9 +3,9 @@ import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 
-import pandas as pd 
+import pyarrow.dataset as ds
 from app.core.logger import get_logger
-from app.services import text_extraction_service, data_storage_service
+from app.services import text_extraction_service, data_storage_service, dedup_service
 
 logger = get_logger("Data_Prepare_logger")
 
@@ -15,29 +15,35 @@ def prepare_and_store_data():
         
         # Step 0: Extract documents and generate batch parquet files
         text_extraction_service.extract_all_document()
-        logger.info("Document extraction complete. Proceeding to combine batches...")
+        logger.info("Document extraction complete. Removing duplicate papers...")
         
-        # Step 1: Combine parquet batch files
-        df = text_extraction_service.combine_parquet_batches()
+        # Step 0.5: Drop papers present in several sources so later stages only see unique content
+        dedup_stats = dedup_service.deduplicate_batches()
+        logger.info(f"Deduplication removed {dedup_stats['papers_removed']} papers "
+                    f"(~{dedup_stats['chunks_removed_estimate']} chunks, estimated). Proceeding to combine batches...")
         
-        if df.empty:
+        # Step 1: Combine parquet batch files (lazily, straight from the batch files)
+        dataset = text_extraction_service.combine_parquet_batches(lazy=True)
+        total_rows = dataset.count_rows()
+        
+        if total_rows == 0:
             logger.info(f"No data extracted from documents. Exiting process.")
             return
         
-        logger.info(f"Extracted {len(df)} records. Proceeding to save data...")
-        saved_path = data_storage_service.save_dataframe(df)
+        logger.info(f"Extracted {total_rows} records. Proceeding to save data...")
+        saved_path = data_storage_service.save_dataset(dataset)
         logger.info(f"Data preparation complete. File saved to: {saved_path}")
         
         
-        # load the data frame 
-        logger.info(f"Load the dataframe..")
-        loaded_df = data_storage_service.load_dataframe(str(saved_path))
+        # load a sample of the saved data
+        logger.info(f"Load a sample of the saved data..")
+        saved = ds.dataset(str(saved_path), format="parquet")
         
         # show the df 
         print("\nSample of loaded data:")
-        print(len(loaded_df))
-        print(loaded_df.head(5))
-        loaded_df.info()
+        print(saved.count_rows())
+        print(saved.head(5).to_pandas())
+        print(saved.schema)
 
         
     except Exception as e:
@@ -65,13 +65,17 @@
 
 import os
 import sys
+import copy
 import pandas as pd
+import pyarrow.parquet as pq
 
 # Ensure the project root is in the system path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
 
 from app.services.chunking_service import ChunkingService
 from app.services.embedding_service import EmbeddingService
+from app.services.data_storage_service import iter_dataframe_batches
+from app.utils.vector_db import EMBEDDING_COLUMN
 from app.core.logger import get_logger
 from app.core.config import get_settings
 
@@ -81,13 +85,15 @@ logger = get_logger("EmbeddingPipelineRunner")
 
 def run_chunking_and_embedding_pipeline(input_file_path: str = None):
     """
-    Runs the complete chunking and embedding pipeline in memory and saves combined embeddings.
+    Runs the complete chunking and embedding pipeline, streaming papers through chunking into embedding,
+    and saves combined embeddings.
 
     Args:
         input_file_path (str): Path to the cleaned input file.
 
     Returns:
-        pd.DataFrame: Combined DataFrame containing chunked text and corresponding embeddings.
+        Optional[pa.Table]: Combined table containing chunked text and corresponding embeddings,
+        or None when no batches were embedded.
     """
     input_file_path = input_file_path or settings.parquet_input_path 
 
@@ -98,31 +104,37 @@ def run_chunking_and_embedding_pipeline(input_file_path: str = None):
     try:
         logger.info("Starting the chunking and embedding pipeline...")
 
-        # Load cleaned data
-        logger.info(f"Loading cleaned data from: {input_file_path}")
-        df = pd.read_parquet(input_file_path)
-        logger.info(f"Data loaded successfully with {len(df)} records.")
-
-        # Step 1: Chunking
-        chunking_service = ChunkingService()
-        chunked_df = chunking_service.chunk_dataframe(df, text_column='body_text', max_tokens=settings.CHUNK_SIZE)
-        logger.info(f"Chunking completed. Total chunks: {len(chunked_df)}")
-        print(chunked_df.head(5))
-        print(chunked_df.info())
-
-        # Step 2: Embedding
         embedding_service = EmbeddingService()
-        embedding_service.generate_embeddings(chunked_df, column='chunk_text', batch_size=settings.EMBEDDING_BATCH_SIZE, process_chunk_size=settings.PROCESS_CHUNK_SIZE)
+
+        # Step 1: Paper-level fields are stored once per paper, chunks reference them by paper_id.
+        # In "tokens" mode chunks are sized with the embedding model's own tokenizer and limit.
+        # Chunking runs in the embedding prefetch thread, so it gets its own tokenizer copy
+        chunking_service = ChunkingService(
+            tokenizer=copy.deepcopy(embedding_service.model.tokenizer),
+            max_seq_length=embedding_service.model.max_seq_length
+        )
+        chunking_service.write_paper_table(input_file_path, settings.papers_table_path)
+
+        # Step 2: Stream papers from the cleaned data through chunking into embedding
+        logger.info(f"Streaming cleaned data from: {input_file_path}")
+        input_columns = chunking_service.input_columns(pq.read_schema(input_file_path).names, text_column='body_text')
+        paper_batches = iter_dataframe_batches(input_file_path, columns=input_columns)
+        # No size override: each chunking mode uses its own configured size (and chunk id params)
+        chunk_batches = chunking_service.iter_chunk_batches(paper_batches, text_column='body_text')
+        embedding_service.generate_embeddings(chunk_batches, column='chunk_text', batch_size=settings.EMBEDDING_BATCH_SIZE, process_chunk_size=settings.PROCESS_CHUNK_SIZE)
         logger.info(f"Embedding completed and batches saved successfully!")
 
         # Step 3: Combine all batches into a single file
-        combined_df = embedding_service.combine_batches()
-        logger.info(f"Combined embedding file created successfully! Total records: {len(combined_df)}")
-        print(combined_df.head(5))
+        combined_table = embedding_service.combine_batch_tables()
+        if combined_table is None:
+            logger.warning("No embedding batches found; nothing was embedded, so there is nothing to combine.")
+            return None
+        logger.info(f"Combined embedding file created successfully! Total records: {combined_table.num_rows}")
+        print(combined_table.slice(0, 5).drop([EMBEDDING_COLUMN]).to_pandas())
 
         logger.info("Chunking, embedding, and combination pipeline executed successfully!")
 
-        return combined_df  # Return combined DataFrame for next phase like FAISS indexing
+        return combined_table  # Return combined table for next phase like FAISS indexing
 
     except Exception as e:
         logger.exception(f"Pipeline execution failed: {e}")
@@ -0,0 +1,47 @@
+# test_cleaning.py
+
+import random
+
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from pipeline.cleaning import TextCleaner
+
+cleaner = TextCleaner()
+
+SAMPLES = [
+    "Plain text.",
+    "  <p>Tagged</p> <b>bold</b>  text ",
+    "p < 0.05 and q<0.01 with no closing bracket",
+    "unterminated <tag\nacross a line > end",
+    "Mail someone@example.org or visit https://doi.org/10.1000/xyz and www.who.int today",
+    "Café naïve – résumé “quotes” 😷 emoji",
+    "tabs\tnewlines\n\rform\ffeeds\vand\x1cseparators\x1f",
+    "non breaking spaces 　 ideographic",
+    " é ",
+    "<<>><a<b>c>",
+    "",
+    "   ",
+    "😷",
+]
+
+
+def test_clean_batch_matches_clean_text():
+    # Step 1: Clean the same texts both ways
+    texts = SAMPLES + [None, 42, float("nan")]
+    expected = [cleaner.clean_text(text) for text in texts]
+
+    # Step 2: Compare
+    assert cleaner.clean_batch(texts) == expected, "❌ Mismatch between clean_batch and clean_text"
+    print("✅ Batch cleaning verified successfully!")
+
+
+def test_clean_batch_matches_clean_text_on_random_texts():
+    # Random mixes of the characters each pass reacts to
+    alphabet = list("ab <>/@.:wh tp") + ["http", "www", "\t", "\n", "\r", "\x1d", " ", "é", "😷", "  "]
+    rng = random.Random(0)
+    texts = ["".join(rng.choice(alphabet) for _ in range(rng.randint(0, 40))) for _ in range(2000)]
+
+    for text, cleaned in zip(texts, cleaner.clean_batch(texts)):
+        assert cleaned == cleaner.clean_text(text), f"❌ Mismatch for {text!r}"
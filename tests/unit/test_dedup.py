@@ -0,0 +1,121 @@
+# test_dedup.py
+
+import pandas as pd
+import pytest
+
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import app.services.dedup_service as dedup_service
+from app.services.dedup_service import deduplicate_batches
+from pipeline.metadata_store import MetadataStore
+
+
+def write_batch(batch_dir, number: int, rows) -> None:
+    pd.DataFrame(rows, columns=["paper_id", "source", "body_text"]).to_parquet(
+        os.path.join(batch_dir, f"batch_{number}.parquet"), index=False
+    )
+
+
+def kept_papers(batch_dir) -> list:
+    return sorted(
+        paper_id
+        for f in os.listdir(batch_dir) if f.endswith(".parquet")
+        for paper_id in pd.read_parquet(os.path.join(batch_dir, f))["paper_id"]
+    )
+
+
+@pytest.fixture(autouse=True)
+def nlp_output(tmp_path, monkeypatch):
+    # NLP checkpoint of this test only, not the one configured on this machine
+    output_dir = tmp_path / "nlp"
+    output_dir.mkdir()
+    monkeypatch.setattr(dedup_service.settings, "input_for_embedding", str(output_dir))
+    return output_dir
+
+
+@pytest.fixture
+def no_metadata(monkeypatch):
+    # Ignore any metadata.csv configured on this machine
+    monkeypatch.setattr(dedup_service, "_load_metadata_store", lambda: None)
+
+
+@pytest.fixture
+def metadata_store(tmp_path):
+    # One paper with both a PDF parse (sha) and a PMC parse (PMCID), one with two PDF shas
+    metadata = pd.DataFrame({
+        "cord_uid": ["u1", "u2"],
+        "sha": ["sha1", "sha2a; sha2b"],
+        "pmcid": ["PMC1", None],
+        "publish_time": ["2020-01-01", "2021-01-01"],
+        "journal": ["J", "J"],
+        "doi": ["10.1/a", "10.1/b"],
+        "license": ["cc-by", "cc-by"],
+        "url": ["", ""],
+    })
+    metadata_path = tmp_path / "metadata.csv"
+    metadata.to_csv(metadata_path, index=False)
+    return MetadataStore(str(metadata_path), str(tmp_path / "metadata.parquet"))
+
+
+def test_preferred_source_wins_for_the_same_paper(tmp_path, metadata_store):
+    batch_dir = tmp_path / "batches"
+    batch_dir.mkdir()
+
+    # Step 1: PDF parse first, PMC parse of the same paper (different id and text) later
+    write_batch(batch_dir, 1, [("sha1", "pdf_json", "pdf parse of paper one"),
+                               ("sha2a", "pdf_json", "paper two")])
+    write_batch(batch_dir, 2, [("PMC1", "pmc_json", "pmc parse of paper one"),
+                               ("sha2b", "pdf_json", "another pdf of paper two")])
+
+    # Step 2: Deduplicate with PMC preferred
+    stats = deduplicate_batches(str(batch_dir), ["pmc_json", "pdf_json"], metadata_store=metadata_store)
+
+    # Step 3: The PMC parse and the first PDF of paper two are kept
+    assert kept_papers(batch_dir) == ["PMC1", "sha2a"], "❌ Wrong parse kept for a duplicated paper"
+    assert stats["papers_scanned"] == 4 and stats["papers_removed"] == 2
+    assert stats["chunks_removed_estimate"] > 0
+    print("✅ Source preference verified successfully!")
+
+
+def test_identical_bodies_keep_the_earliest_batch(tmp_path, no_metadata):
+    batch_dir = tmp_path / "batches"
+    batch_dir.mkdir()
+
+    # batch_10 sorts before batch_2 as text; the earlier batch must still win
+    write_batch(batch_dir, 2, [("a", "pdf_json", "Same   Body text"), ("empty1", "pdf_json", "")])
+    write_batch(batch_dir, 10, [("b", "pdf_json", "same body text"), ("empty2", "pdf_json", "")])
+
+    stats = deduplicate_batches(str(batch_dir), ["pmc_json", "pdf_json"])
+
+    # Empty bodies are never duplicates of each other
+    assert kept_papers(batch_dir) == ["a", "empty1", "empty2"], "❌ Later batch won the tie"
+    assert stats["papers_removed"] == 1
+
+
+def test_without_metadata_parses_of_one_paper_are_both_kept(tmp_path, no_metadata):
+    batch_dir = tmp_path / "batches"
+    batch_dir.mkdir()
+    write_batch(batch_dir, 1, [("sha1", "pdf_json", "pdf parse"), ("PMC1", "pmc_json", "pmc parse")])
+
+    deduplicate_batches(str(batch_dir), ["pmc_json", "pdf_json"])
+    assert kept_papers(batch_dir) == ["PMC1", "sha1"], "❌ Parses dropped without metadata to link them"
+
+
+def test_processed_batches_are_not_rewritten(tmp_path, metadata_store, nlp_output):
+    batch_dir = tmp_path / "batches"
+    batch_dir.mkdir()
+    write_batch(batch_dir, 1, [("sha1", "pdf_json", "pdf parse of paper one")])
+    (nlp_output / "processed_files.txt").write_text("batch_1.parquet\n")
+    processed_file = batch_dir / "batch_1.parquet"
+    processed_bytes = processed_file.read_bytes()
+
+    # Step 1: A later extraction adds the preferred PMC parse of the processed paper
+    write_batch(batch_dir, 2, [("PMC1", "pmc_json", "pmc parse of paper one"), ("p3", "pdf_json", "paper three")])
+    stats = deduplicate_batches(str(batch_dir), ["pmc_json", "pdf_json"], metadata_store=metadata_store)
+
+    # Step 2: The new copy is dropped, the processed batch is left as it is
+    assert processed_file.read_bytes() == processed_bytes, "❌ Processed batch was rewritten"
+    assert kept_papers(batch_dir) == ["p3", "sha1"]
+    assert stats["papers_removed"] == 1
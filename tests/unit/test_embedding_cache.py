@@ -0,0 +1,93 @@
+# test_embedding_cache.py
+
+import numpy as np
+
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import app.services.embedding_cache_service as cache_service
+from app.services.embedding_cache_service import EmbeddingCache, cache_namespace, get_embedding_cache
+
+NAMESPACE = cache_namespace("test-model", normalize=True)
+
+
+class CountingEncoder:
+    """
+    Deterministic stand-in for a model that records which texts it had to encode.
+    """
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, texts):
+        self.calls.append(list(texts))
+        return np.array([[len(text), text.count("a"), 1.0] for text in texts], dtype=np.float32)
+
+
+def test_hits_and_misses(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "cache.sqlite"), max_entries=0)
+    encoder = CountingEncoder()
+
+    # Step 1: First call encodes each distinct text once
+    first = cache.encode(["alpha", "beta", "alpha"], NAMESPACE, encoder)
+    assert encoder.calls == [["alpha", "beta"]], "❌ Texts encoded more than once"
+    assert (cache.hits, cache.misses) == (1, 2)
+
+    # Step 2: Second call is served from the cache (whitespace differences included)
+    cache.reset_stats()
+    second = cache.encode(["beta", "alpha ", "gamma"], NAMESPACE, encoder)
+    assert encoder.calls[-1] == ["gamma"], "❌ Cached texts were encoded again"
+    assert (cache.hits, cache.misses) == (2, 1)
+    np.testing.assert_array_equal(second[:2], first[[1, 0]])
+
+    # Step 3: Another namespace does not share vectors
+    cache.encode(["alpha"], cache_namespace("test-model", normalize=True, backend="onnx-int8"), encoder)
+    assert encoder.calls[-1] == ["alpha"]
+    cache.close()
+    print("✅ Cache hits and misses verified successfully!")
+
+
+def test_vectors_survive_reopening(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = EmbeddingCache(path, max_entries=0)
+    vectors = cache.encode(["alpha", "beta"], NAMESPACE, CountingEncoder())
+    cache.close()
+
+    encoder = CountingEncoder()
+    reopened = EmbeddingCache(path, max_entries=0)
+    np.testing.assert_array_equal(reopened.encode(["alpha", "beta"], NAMESPACE, encoder), vectors)
+    assert encoder.calls == [], "❌ Cache was not persisted"
+    reopened.close()
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "cache.sqlite"), max_entries=10)
+    encoder = CountingEncoder()
+
+    # Step 1: Fill to the cap, then use the first two entries again
+    cache.encode([f"text {i}" for i in range(10)], NAMESPACE, encoder)
+    cache.encode(["text 0", "text 1"], NAMESPACE, encoder)
+
+    # Step 2: Going past the cap evicts down to the low-water mark, oldest first
+    cache.encode(["text 10"], NAMESPACE, encoder)
+    assert cache._count() == int(10 * cache_service.EVICTION_LOW_WATER), "❌ Cache not trimmed"
+
+    encoder.calls.clear()
+    cache.encode(["text 0", "text 1", "text 10"], NAMESPACE, encoder)
+    assert encoder.calls == [], "❌ Recently used entries were evicted"
+    cache.encode([f"text {i}" for i in range(2, 10)], NAMESPACE, encoder)
+    assert len(encoder.calls[0]) == 2, "❌ Evicted entries were not the least recently used"
+    cache.close()
+
+
+def test_get_embedding_cache_is_shared_per_process(tmp_path, monkeypatch):
+    settings = cache_service.settings
+    monkeypatch.setattr(settings, "EMBEDDING_CACHE_ENABLED", True)
+    monkeypatch.setattr(settings, "embedding_cache_path", str(tmp_path / "cache.sqlite"))
+    monkeypatch.setattr(cache_service, "_caches", {})
+
+    assert get_embedding_cache() is get_embedding_cache(), "❌ A new cache was opened per call"
+
+    monkeypatch.setattr(settings, "EMBEDDING_CACHE_ENABLED", False)
+    assert get_embedding_cache() is None
@@ -0,0 +1,87 @@
+# test_embedding_manifest.py
+
+import json
+
+import pandas as pd
+
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import app.services.embedding_manifest_service as manifest_service
+from app.services.embedding_manifest_service import EmbeddingManifest, EMBEDDING_MANIFEST_FILE, key_digests
+
+
+def write_batch(output_dir, number: int, chunk_ids) -> str:
+    batch_file = f"batch_{number}.parquet"
+    pd.DataFrame({
+        "chunk_id": list(chunk_ids),
+        "paper_id": "p1",
+        "chunk_text": [f"text {chunk_id}" for chunk_id in chunk_ids],
+    }).to_parquet(os.path.join(output_dir, batch_file), index=False)
+    return batch_file
+
+
+def digests(keys) -> set:
+    return set(key_digests(keys).tolist())
+
+
+def test_resume_from_recorded_batches(tmp_path, monkeypatch):
+    # Step 1: Record two batches
+    manifest = EmbeddingManifest(str(tmp_path)).load()
+    manifest.record_batch(write_batch(tmp_path, 0, ["a", "b"]), ["a", "b"])
+    manifest.record_batch(write_batch(tmp_path, 1, ["c"]), ["c"])
+
+    # Step 2: A new run recovers the embedded chunks from the manifest alone, without reading the batch files
+    def no_reads(*args, **kwargs):
+        raise AssertionError("batch file read on resume")
+
+    monkeypatch.setattr(manifest_service.pq, "read_table", no_reads)
+    resumed = EmbeddingManifest(str(tmp_path)).load()
+    resumed.reconcile()
+    assert resumed.embedded_keys() == digests(["a", "b", "c"]), "❌ Embedded chunks not recovered"
+    assert resumed.last_batch_number() == 1
+
+    # Step 3: Each entry records its row count
+    with open(os.path.join(tmp_path, EMBEDDING_MANIFEST_FILE)) as f:
+        entries = [json.loads(line) for line in f]
+    assert [entry["rows"] for entry in entries] == [2, 1]
+    print("✅ Manifest resume verified successfully!")
+
+
+def test_resume_after_crash_between_batch_write_and_manifest_update(tmp_path):
+    # Step 1: Batch 1 is on disk but the run stopped before recording it
+    manifest = EmbeddingManifest(str(tmp_path)).load()
+    manifest.record_batch(write_batch(tmp_path, 0, ["a", "b"]), ["a", "b"])
+    write_batch(tmp_path, 1, ["c", "d"])
+
+    # Step 2: Reconcile records it, so its chunks are not embedded again
+    resumed = EmbeddingManifest(str(tmp_path)).load()
+    resumed.reconcile()
+    assert resumed.entries["batch_1.parquet"]["status"] == "done", "❌ Unrecorded batch was not adopted"
+    assert resumed.entries["batch_1.parquet"]["rows"] == 2
+    assert resumed.embedded_keys() == digests(["a", "b", "c", "d"])
+    assert resumed.last_batch_number() == 1
+
+
+def test_deleted_batch_is_embedded_again(tmp_path):
+    manifest = EmbeddingManifest(str(tmp_path)).load()
+    manifest.record_batch(write_batch(tmp_path, 0, ["a"]), ["a"])
+    manifest.record_batch(write_batch(tmp_path, 1, ["b"]), ["b"])
+    os.remove(os.path.join(tmp_path, "batch_1.parquet"))
+
+    resumed = EmbeddingManifest(str(tmp_path)).load()
+    resumed.reconcile()
+    assert resumed.entries["batch_1.parquet"]["status"] == "missing", "❌ Deleted batch still counted as done"
+    assert resumed.embedded_keys() == digests(["a"])
+
+
+def test_torn_last_line_is_skipped(tmp_path):
+    manifest = EmbeddingManifest(str(tmp_path)).load()
+    manifest.record_batch(write_batch(tmp_path, 0, ["a", "b"]), ["a", "b"])
+    with open(os.path.join(tmp_path, EMBEDDING_MANIFEST_FILE), "a") as f:
+        f.write('{"batch": "batch_1.par')
+
+    resumed = EmbeddingManifest(str(tmp_path)).load()
+    resumed.reconcile()
+    assert resumed.embedded_keys() == digests(["a", "b"]), "❌ Torn manifest line was not skipped"
@@ -0,0 +1,134 @@
+# test_embeddings.py
+
+import threading
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import app.services.embedding_service as embedding_service
+from app.services.embedding_service import EmbeddingService
+from app.utils.vector_db import EMBEDDING_COLUMN, arrow_to_matrix
+
+
+class FakeModel:
+    """
+    Deterministic stand-in for a SentenceTransformer: one normalized vector per text.
+    """
+
+    dimension = 4
+
+    def __init__(self):
+        self.encoded = []
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dimension
+
+    def encode(self, texts, batch_size=32, show_progress_bar=False, normalize_embeddings=True):
+        self.encoded.extend(texts)
+        vectors = np.array([[len(text), text.count("a"), text.count("e"), 1.0] for text in texts], dtype=np.float32)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    monkeypatch.setattr(embedding_service.settings, "embedding_output_path", str(tmp_path / "embeddings"))
+    monkeypatch.setattr(EmbeddingService, "_load_model", lambda self: FakeModel())
+    return EmbeddingService("fake-model", length_bucketing=False, backend="torch")
+
+
+def make_chunks(count: int) -> pd.DataFrame:
+    return pd.DataFrame({
+        "chunk_id": [f"c{i}" for i in range(count)],
+        "paper_id": [f"p{i // 3}" for i in range(count)],
+        "chunk_text": [f"chunk {'a' * i} text {'e' * (i % 5)}" for i in range(count)],
+    })
+
+
+def embedded_rows() -> pd.DataFrame:
+    output_dir = embedding_service.settings.embedding_output_path
+    files = sorted((f for f in os.listdir(output_dir) if f.endswith(".parquet")),
+                   key=lambda f: int(f.split("_")[1].split(".")[0]))
+    return pd.concat([pd.read_parquet(os.path.join(output_dir, f)) for f in files], ignore_index=True)
+
+
+def test_resume_embeds_exactly_the_missing_chunks_after_a_batch_size_change(service):
+    # Step 1: Embed the first seven chunks
+    chunks = make_chunks(10)
+    service.generate_embeddings(chunks.iloc[:7], batch_size=2, process_chunk_size=100, workers=1)
+
+    # Step 2: The rerun uses another batch size and only encodes the three new chunks
+    service.model.encoded.clear()
+    service.generate_embeddings(chunks, batch_size=5, process_chunk_size=100, workers=1)
+    assert service.model.encoded == chunks["chunk_text"].tolist()[7:], "❌ Already embedded chunks were encoded again"
+    assert embedded_rows()["chunk_id"].tolist() == chunks["chunk_id"].tolist()
+    print("✅ Embedding resume verified successfully!")
+
+
+def test_run_stops_exactly_at_the_chunk_limit(service):
+    chunks = make_chunks(10)
+    service.generate_embeddings(chunks, batch_size=4, process_chunk_size=5, workers=1)
+
+    # The second batch is cut down to the one chunk left under the limit
+    assert service.model.encoded == chunks["chunk_text"].tolist()[:5], "❌ Run went past the chunk limit"
+    assert embedded_rows()["chunk_id"].tolist() == chunks["chunk_id"].tolist()[:5]
+
+
+def test_failed_batch_is_embedded_again(service, monkeypatch):
+    chunks = make_chunks(6)
+    write = embedding_service.write_batch_file
+
+    def fail_second_batch(table, path):
+        if path.endswith("batch_1.parquet"):
+            raise OSError("disk full")
+        write(table, path)
+
+    # Step 1: The second batch fails to write
+    with monkeypatch.context() as patch:
+        patch.setattr(embedding_service, "write_batch_file", fail_second_batch)
+        with pytest.raises(RuntimeError):
+            service.generate_embeddings(chunks, batch_size=2, process_chunk_size=100, workers=1, pipeline_depth=0)
+
+    # Step 2: The rerun encodes every chunk from the failed batch on
+    service.model.encoded.clear()
+    service.generate_embeddings(chunks, batch_size=2, process_chunk_size=100, workers=1)
+    assert service.model.encoded == chunks["chunk_text"].tolist()[2:], "❌ Failed batch was not embedded again"
+    assert sorted(embedded_rows()["chunk_id"]) == sorted(chunks["chunk_id"])
+
+
+def test_encoding_error_is_not_replaced_by_a_background_write_error(service, monkeypatch):
+    chunks = make_chunks(4)
+    encode_failed = threading.Event()
+    encode = service.model.encode
+
+    def fail_second_batch(texts, **kwargs):
+        if texts == chunks["chunk_text"].tolist()[2:]:
+            encode_failed.set()
+            raise ValueError("out of memory")
+        return encode(texts, **kwargs)
+
+    def fail_after_encoding(table, path):
+        encode_failed.wait(timeout=5)
+        raise OSError("disk full")
+
+    # The write of batch 0 fails only after the encoding of batch 1 has failed
+    monkeypatch.setattr(service.model, "encode", fail_second_batch)
+    monkeypatch.setattr(embedding_service, "write_batch_file", fail_after_encoding)
+    with pytest.raises(RuntimeError, match="out of memory"):
+        service.generate_embeddings(chunks, batch_size=2, process_chunk_size=100, workers=1, pipeline_depth=1)
+
+
+def test_vectors_are_stored_as_a_fixed_size_column(service):
+    chunks = make_chunks(3)
+    service.generate_embeddings(chunks, batch_size=10, process_chunk_size=100, workers=1)
+
+    output_dir = embedding_service.settings.embedding_output_path
+    table = pq.read_table(os.path.join(output_dir, "batch_0.parquet"))
+    assert table.schema.field(EMBEDDING_COLUMN).type.list_size == FakeModel.dimension, "❌ Vectors not stored fixed-size"
+    np.testing.assert_allclose(arrow_to_matrix(table.column(EMBEDDING_COLUMN)),
+                               FakeModel().encode(chunks["chunk_text"].tolist()))
@@ -0,0 +1,97 @@
+# test_entity_index.py
+
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from app.services.entity_filtered_retriever import rows_for_entities
+from app.services.entity_index_service import EntityIndex, build_entity_table, entity_table_path
+
+TEXTS = {
+    "p1": "remdesivir binds ace2 on the cell surface",
+    "p2": "ace2 expression and ibuprofen",
+}
+ENTITY_SPANS = {
+    "p1": [(0, 10, "CHEMICAL"), (17, 21, "GENE")],
+    "p2": [(0, 4, "GENE"), (20, 29, "CHEMICAL")],
+}
+
+
+@pytest.fixture
+def nlp_output(tmp_path):
+    output_dir = tmp_path / "nlp"
+    entity_file = entity_table_path(str(output_dir), "batch_1.parquet")
+    os.makedirs(os.path.dirname(entity_file))
+    pq.write_table(build_entity_table(list(TEXTS), list(TEXTS.values()), list(ENTITY_SPANS.values())), entity_file)
+    return output_dir
+
+
+@pytest.fixture
+def chunk_dir(tmp_path):
+    chunk_dir = tmp_path / "chunks"
+    chunk_dir.mkdir()
+    pd.DataFrame({
+        "chunk_id": ["c1", "c2", "c3"],
+        "paper_id": ["p1", "p1", "p2"],
+        "chunk_text": ["Remdesivir binds ACE2", "on the cell surface", "ACE2 expression"],
+    }).to_parquet(chunk_dir / "batch_0.parquet", index=False)
+    return str(chunk_dir)
+
+
+def test_entity_table_is_normalized_and_dictionary_encoded():
+    table = build_entity_table(list(TEXTS), list(TEXTS.values()), list(ENTITY_SPANS.values()))
+    assert table.column("text").to_pylist() == ["remdesivir", "ace2", "ace2", "ibuprofen"], "❌ Entity text not normalized"
+    assert table.column("label").type.value_type == "string"
+    assert table.column("label").combine_chunks().dictionary.to_pylist() == ["CHEMICAL", "GENE"]
+
+
+def test_postings_for_docs_and_chunks(nlp_output, chunk_dir):
+    # Step 1: Build document and chunk postings
+    index = EntityIndex.build(str(nlp_output / "entities"), chunk_dir)
+
+    # Step 2: Look up papers
+    assert index.docs_for(["ACE2"]) == ["p1", "p2"], "❌ Wrong papers for an entity"
+    assert index.docs_for(["ace2", "ibuprofen"], match_all=True) == ["p2"]
+
+    # Step 3: Chunks are posted only under entities they mention themselves
+    assert index.chunks_for(["remdesivir"]) == ["c1"], "❌ Wrong chunks for an entity"
+    assert index.chunks_for(["ace2"]) == ["c1", "c3"]
+    assert index.chunks_for(["unknown"]) == []
+    print("✅ Entity postings verified successfully!")
+
+
+def test_labels_filter_and_save_load_round_trip(nlp_output, chunk_dir, tmp_path):
+    index = EntityIndex.build(str(nlp_output / "entities"), chunk_dir, labels=["CHEMICAL"])
+    assert sorted(index.doc_postings) == ["ibuprofen", "remdesivir"], "❌ Label filter not applied"
+
+    index.save(str(tmp_path / "index"))
+    loaded = EntityIndex.load(str(tmp_path / "index"))
+    assert loaded.docs_for(["remdesivir"]) == index.docs_for(["remdesivir"]), "❌ Mismatch between saved and loaded index"
+    assert loaded.chunks_for(["remdesivir"]) == ["c1"]
+
+
+def test_named_entities_column_is_read_without_entity_tables(tmp_path):
+    output_dir = tmp_path / "nlp"
+    output_dir.mkdir()
+    pd.DataFrame({
+        "paper_id": ["p1", "p2"],
+        "named_entities": [[("Remdesivir", "CHEMICAL")], [("ACE2", "GENE"), ("ibuprofen", "CHEMICAL")]],
+    }).to_parquet(output_dir / "batch_1.parquet", index=False)
+
+    index = EntityIndex.build(str(output_dir / "entities"))
+    assert index.docs_for(["remdesivir", "ibuprofen"]) == ["p1", "p2"], "❌ named_entities column not indexed"
+
+
+def test_rows_for_entities_maps_ids_to_faiss_rows(nlp_output, chunk_dir):
+    row_lookup = {"chunk_id": {"c1": [0], "c2": [1], "c3": [2]}, "paper_id": {"p1": [0, 1], "p2": [2]}}
+
+    with_chunks = EntityIndex.build(str(nlp_output / "entities"), chunk_dir)
+    assert rows_for_entities(with_chunks, row_lookup, ["remdesivir"]).tolist() == [0], "❌ Wrong rows from chunk postings"
+
+    # Without chunk postings, every chunk of a matching paper is a candidate
+    docs_only = EntityIndex.build(str(nlp_output / "entities"))
+    assert rows_for_entities(docs_only, row_lookup, ["remdesivir"]).tolist() == [0, 1], "❌ Wrong rows from paper postings"
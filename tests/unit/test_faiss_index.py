@@ -0,0 +1,97 @@
+# test_faiss_index.py
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import app.services.faiss_service as faiss_service
+from app.services.faiss_service import FAISSService
+from app.utils.vector_db import EMBEDDING_COLUMN, save_embedding_info, vectors_to_arrow
+
+MODEL = "fake-model"
+DIMENSION = 4
+
+
+def write_batch(input_dir, number: int, chunk_ids) -> np.ndarray:
+    rng = np.random.default_rng(number)
+    vectors = rng.normal(size=(len(chunk_ids), DIMENSION)).astype(np.float32)
+    table = pa.Table.from_pandas(pd.DataFrame({
+        "chunk_id": list(chunk_ids),
+        "paper_id": [f"paper-{chunk_id}" for chunk_id in chunk_ids],
+        "chunk_text": [f"text of {chunk_id}" for chunk_id in chunk_ids],
+    }), preserve_index=False).append_column(EMBEDDING_COLUMN, vectors_to_arrow(vectors))
+    pq.write_table(table, os.path.join(input_dir, f"batch_{number}.parquet"))
+    return vectors
+
+
+@pytest.fixture
+def dirs(tmp_path, monkeypatch):
+    monkeypatch.setattr(faiss_service.settings, "papers_table_path", str(tmp_path / "papers.parquet"))
+    input_dir = tmp_path / "embeddings"
+    input_dir.mkdir()
+    save_embedding_info(str(input_dir), MODEL, DIMENSION, backend="torch", normalized=True)
+    return str(input_dir), str(tmp_path / "index")
+
+
+def build(input_dir, output_dir) -> FAISSService:
+    service = FAISSService(input_dir, output_dir, embedding_model=MODEL, use_precomputed=True)
+    service.build_faiss_index_with_resume()
+    return service
+
+
+def test_index_holds_the_stored_vectors_in_batch_order(dirs):
+    input_dir, output_dir = dirs
+    # Step 1: Write two batches; batch_10 sorts before batch_2 as text
+    second = write_batch(input_dir, 10, ["c", "d"])
+    first = write_batch(input_dir, 2, ["a", "b"])
+
+    # Step 2: Build the index from the stored vectors
+    service = build(input_dir, output_dir)
+
+    # Step 3: Rows follow batch-number order and hold the stored vectors
+    store = service.faiss_vector_store
+    assert [store.index_to_docstore_id[i] for i in range(4)] == ["a", "b", "c", "d"], "❌ Batches indexed out of order"
+    np.testing.assert_array_equal(service.index.reconstruct_n(0, 4), np.vstack([first, second]))
+    assert store.docstore.search("c").page_content == "text of c"
+    # Nothing was encoded, so the model was never loaded
+    assert service.embedding_function._embeddings is None, "❌ Model loaded although vectors were stored"
+    print("✅ Index from precomputed vectors verified successfully!")
+
+
+def test_rebuild_skips_chunks_already_indexed(dirs):
+    input_dir, output_dir = dirs
+    # Step 1: Index a first batch
+    write_batch(input_dir, 0, ["a", "b"])
+    build(input_dir, output_dir)
+
+    # Step 2: A later batch repeats chunk "b" (and twice "c" within itself)
+    new_vectors = write_batch(input_dir, 1, ["b", "c", "c"])
+    service = build(input_dir, output_dir)
+
+    assert service.index.ntotal == 3, "❌ Chunks indexed twice"
+    assert sorted(service.faiss_vector_store.index_to_docstore_id.values()) == ["a", "b", "c"]
+    np.testing.assert_array_equal(service.index.reconstruct(2), new_vectors[1])
+
+
+def test_vectors_of_another_model_or_dimension_are_rejected(dirs, tmp_path):
+    input_dir, output_dir = dirs
+    write_batch(input_dir, 0, ["a"])
+    service = build(input_dir, output_dir)
+
+    with pytest.raises(ValueError):
+        service._check_precomputed_dimension(DIMENSION + 1)
+
+    # Vectors of another backend may not join the index
+    with pytest.raises(ValueError):
+        service._use_vectors("onnx-int8", True)
+    service._use_vectors("torch", True)
+
+    other_model = FAISSService(input_dir, str(tmp_path / "other"), embedding_model="other-model", use_precomputed=True)
+    with pytest.raises(ValueError):
+        other_model._check_precomputed_dimension(DIMENSION)
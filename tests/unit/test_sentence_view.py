@@ -0,0 +1,56 @@
+# test_sentence_view.py
+
+import pandas as pd
+import spacy
+
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from pipeline.sentence_view import SentenceView, get_sentences, sentence_spans
+
+# Rule-based sentence boundaries: no model download needed
+nlp = spacy.blank("en")
+nlp.add_pipe("sentencizer")
+
+TEXTS = [
+    "The virus spreads quickly.  Masks reduce transmission! Does it work? Yes.",
+    "  leading and trailing whitespace .   ",
+    "café résumé – naïve. second sentence with 😷 emoji. third",
+    "no terminal punctuation",
+    "",
+]
+
+
+def test_sentence_spans_point_at_stripped_sentences():
+    for text in TEXTS:
+        # Step 1: Split with spaCy and compute offsets
+        doc = nlp(text)
+        starts, ends = sentence_spans(text, doc.sents)
+
+        # Step 2: Each offset pair slices out the stripped sentence; whitespace-only ones are dropped
+        expected = [sent.text.strip() for sent in doc.sents if sent.text.strip()]
+        assert [text[start:end] for start, end in zip(starts, ends)] == expected, f"❌ Wrong offsets for {text!r}"
+        assert starts.dtype == ends.dtype == "int32"
+    print("✅ Sentence offsets verified successfully!")
+
+
+def test_get_sentences_reads_offsets_and_sentence_lists():
+    # Step 1: Offsets stored as in an enriched batch file
+    spans = [sentence_spans(text, nlp(text).sents) for text in TEXTS]
+    df = pd.DataFrame({
+        "clean_text": TEXTS,
+        "sentence_starts": [starts for starts, _ in spans],
+        "sentence_ends": [ends for _, ends in spans],
+    })
+
+    # Step 2: Lazy views give the same sentences as a list column would
+    sentences = get_sentences(df)
+    expected = [[sent.text.strip() for sent in nlp(text).sents if sent.text.strip()] for text in TEXTS]
+    assert all(isinstance(view, SentenceView) for view in sentences)
+    assert [view.to_list() for view in sentences] == expected, "❌ Mismatch between views and sentences"
+    assert sentences.iloc[0][1:] == expected[0][1:], "❌ Slicing a view failed"
+
+    # Step 3: Files written with a `sentences` column are returned as they are
+    legacy = pd.DataFrame({"clean_text": TEXTS, "sentences": expected})
+    assert get_sentences(legacy).tolist() == expected
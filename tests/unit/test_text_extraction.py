@@ -0,0 +1,168 @@
+# test_text_extraction.py
+
+import json
+
+import pandas as pd
+import pytest
+
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import app.services.text_extraction_service as extraction
+from app.services.text_extraction_service import (
+    decode_paper, extract_sections, extract_all_document, load_manifest, open_batch_dataset,
+)
+
+
+def make_paper(paper_id: str, body: str = "Body text.") -> dict:
+    # Same key order as the CORD-19 parses: reference sections follow body_text
+    return {
+        "paper_id": paper_id,
+        "metadata": {"title": f"Title {paper_id}", "authors": [{"first": "Ada", "last": "Lovelace"}]},
+        "abstract": [{"text": "Abstract text.", "section": "Abstract"}],
+        "body_text": [{"text": body, "section": "Introduction"}, {"text": "More text.", "section": "Methods"}],
+        "bib_entries": {"BIBREF0": {"title": "Ref \"bib_entries\" one"}, "BIBREF1": {"title": "Ref two"}},
+        "ref_entries": {"FIGREF0": {"text": "Figure."}, "TABREF0": {"text": "Table."}, "TABREF1": {"text": "T."}},
+        "back_matter": [{"text": "Acknowledgements.", "section": "Acknowledgements"}],
+    }
+
+
+def test_decode_paper_fast_path_matches_full_decode():
+    # Step 1: Decode the same document both ways
+    raw = json.dumps(make_paper("abc123"), indent=2).encode("utf-8")
+    full = decode_paper(raw, skip_references=False)
+    fast = decode_paper(bytearray(raw), skip_references=True)
+
+    # Step 2: The fast path skips the reference sections but keeps their sizes
+    assert "bib_entries" not in fast and "ref_entries" not in fast, "❌ Reference sections were decoded"
+    assert (fast["bib_entry_count"], fast["ref_entry_count"]) == (2, 3), "❌ Wrong reference counts"
+
+    # Step 3: Both give the same extracted record
+    assert extract_sections(fast, "pdf_json") == extract_sections(full, "pdf_json"), \
+        "❌ Mismatch between fast and full decode"
+    print("✅ Fast decode verified successfully!")
+
+
+def test_decode_paper_leaves_buffer_unchanged():
+    raw = json.dumps(make_paper("abc123")).encode("utf-8")
+    buffer = bytearray(raw)
+    decode_paper(buffer, skip_references=True)
+    assert bytes(buffer) == raw, "❌ Input buffer was modified"
+
+
+def test_decode_paper_falls_back_for_other_layouts():
+    # Reference sections before body_text do not fit the fast path: decode in full
+    paper = make_paper("abc123")
+    reordered = {key: paper[key] for key in ("paper_id", "bib_entries", "ref_entries", "metadata", "body_text")}
+    raw = json.dumps(reordered).encode("utf-8")
+    assert decode_paper(bytearray(raw), skip_references=True) == reordered, "❌ Fallback decode differs"
+
+
+@pytest.fixture
+def corpus(tmp_path, monkeypatch):
+    """
+    Three pdf_json papers and empty extraction output, wired into the settings.
+    """
+    settings = extraction.settings
+    monkeypatch.setattr(settings, "cord19_extracted_path", str(tmp_path / "raw"))
+    monkeypatch.setattr(settings, "extracted_parquet_path", str(tmp_path / "batches"))
+    monkeypatch.setattr(settings, "extraction_manifest_path", str(tmp_path / "manifest.jsonl"))
+
+    source_dir = tmp_path / "raw" / "pdf_json"
+    source_dir.mkdir(parents=True)
+    for paper_id in ("p1", "p2", "p3"):
+        write_paper(source_dir / f"{paper_id}.json", make_paper(paper_id))
+    return source_dir
+
+
+def write_paper(path, paper: dict) -> None:
+    path.write_text(json.dumps(paper), encoding="utf-8")
+
+
+def extracted_rows() -> pd.DataFrame:
+    batch_dir = extraction.settings.extracted_parquet_path
+    files = sorted(f for f in os.listdir(batch_dir) if f.endswith(".parquet"))
+    return pd.concat([pd.read_parquet(os.path.join(batch_dir, f)) for f in files], ignore_index=True)
+
+
+def extract(**kwargs):
+    return extract_all_document(sources=["pdf_json"], batch_size=2, workers=1, from_archive=False, **kwargs)
+
+
+def test_resume_extracts_each_paper_once(corpus):
+    # Step 1: First run extracts everything
+    assert len(extract()) == 2, "❌ Expected two batch files"
+    assert sorted(extracted_rows()["paper_id"]) == ["p1", "p2", "p3"]
+
+    # Step 2: A rerun (also after touching a file without changing it) has nothing to do
+    os.utime(corpus / "p1.json", (1, 1))
+    assert extract() == [], "❌ Unchanged files were extracted again"
+
+    # Step 3: A changed file replaces its earlier row
+    write_paper(corpus / "p2.json", make_paper("p2", body="Revised body."))
+    assert len(extract()) == 1
+    rows = extracted_rows().set_index("paper_id")
+    assert sorted(rows.index) == ["p1", "p2", "p3"], "❌ Superseded row was kept"
+    assert rows.loc["p2", "body_text"].startswith("Revised body."), "❌ Changed file was not re-extracted"
+    print("✅ Resume verified successfully!")
+
+
+def test_resume_retries_failed_files(corpus):
+    (corpus / "p3.json").write_text("{not json", encoding="utf-8")
+    extract()
+    assert load_manifest()["pdf_json/p3.json"]["status"] == "failed"
+
+    # Fixed file is parsed again on the next run
+    write_paper(corpus / "p3.json", make_paper("p3"))
+    extract()
+    assert load_manifest()["pdf_json/p3.json"]["status"] == "done", "❌ Failed file was not retried"
+    assert sorted(extracted_rows()["paper_id"]) == ["p1", "p2", "p3"]
+
+
+def test_resume_after_crash_between_batch_write_and_manifest_update(corpus, monkeypatch):
+    # Step 1: Crash right after the first batch file is in place, before its manifest entries
+    def crash(entries, manifest_path=None):
+        raise KeyboardInterrupt
+
+    with monkeypatch.context() as patch:
+        patch.setattr(extraction, "update_manifest", crash)
+        with pytest.raises(KeyboardInterrupt):
+            extract()
+    assert len(extracted_rows()) == 2, "❌ Expected the first batch on disk"
+
+    # Step 2: The rerun extracts every paper exactly once
+    extract()
+    paper_ids = sorted(extracted_rows()["paper_id"])
+    assert paper_ids == ["p1", "p2", "p3"], f"❌ Papers extracted twice or lost: {paper_ids}"
+    assert all(entry["status"] == "done" for entry in load_manifest().values())
+
+
+def test_batches_written_before_the_manifest_are_adopted(corpus):
+    extract()
+    os.remove(extraction.settings.extraction_manifest_path)
+
+    # The batch files are recorded in the new manifest instead of being removed and extracted again
+    assert extract() == []
+    assert sorted(extracted_rows()["paper_id"]) == ["p1", "p2", "p3"]
+    manifest = load_manifest()
+    assert all(entry["status"] == "done" for entry in manifest.values())
+    assert sorted((entry["paper_id"], entry["batch"]) for entry in manifest.values()) == [("p1", 1), ("p2", 1), ("p3", 2)]
+
+
+def test_open_batch_dataset_reads_batches_in_numeric_order(tmp_path):
+    # batch_10 sorts before batch_2 as a string; the stray combined file is not a batch
+    for number in (10, 2, 1):
+        pd.DataFrame({"paper_id": [f"p{number}"]}).to_parquet(tmp_path / f"batch_{number}.parquet")
+    pd.DataFrame({"paper_id": ["combined"]}).to_parquet(tmp_path / "combined.parquet")
+    pd.DataFrame({"paper_id": ["final"]}).to_parquet(tmp_path / "batch_final.parquet")
+
+    paper_ids = open_batch_dataset(str(tmp_path)).to_table().column("paper_id").to_pylist()
+    assert paper_ids == ["p1", "p2", "p10"], f"❌ Unexpected batch order: {paper_ids}"
+
+
+def test_open_batch_dataset_without_readable_batches(tmp_path):
+    (tmp_path / "batch_1.parquet").write_bytes(b"not parquet")
+
+    with pytest.raises(FileNotFoundError):
+        open_batch_dataset(str(tmp_path))